@@ -1,21 +1,65 @@
 """Bot and Dispatcher setup"""
 import logging
 import os
+from typing import List
 from aiogram import Bot, Dispatcher
-from config import TOKEN, RESUME_FOLDER
+from config import TOKEN, RESUME_FOLDER, FSM_STORAGE
 from database.migrations import init_db
+from database.connection import close_all_connections
+from database.executor import shutdown_db_executor
+from services.category_service import CategoryService
+from middlewares import UserContextMiddleware, HandlerMetricsMiddleware, api_timing
+from app.send_scheduler import send_scheduler
+from app.fsm_storage import SQLiteStorage
+from handlers.start import router as start_router
+from handlers.admin import router as admin_router
+from handlers.employer import router as employer_router
+from handlers.graduate import router as graduate_router
+from handlers.student import router as student_router
 
 logger = logging.getLogger(__name__)
 
+# Handler routers, in registration order
+ROUTERS = (start_router, admin_router, employer_router, graduate_router, student_router)
+
 
 def create_bot() -> Bot:
     """Create bot instance"""
-    return Bot(token=TOKEN)
+    bot = Bot(token=TOKEN)
+    # Outermost, so the handler's API time includes rate-limit waits
+    bot.session.middleware(api_timing)
+    # Every outgoing request goes through the rate-limiting scheduler
+    bot.session.middleware(send_scheduler)
+    return bot
 
 
 def create_dispatcher() -> Dispatcher:
     """Create dispatcher instance"""
-    return Dispatcher()
+    if FSM_STORAGE == "sqlite":
+        dp = Dispatcher(storage=SQLiteStorage())
+    else:
+        dp = Dispatcher()
+    dp.update.outer_middleware(UserContextMiddleware())
+    return dp
+
+
+def used_update_types() -> List[str]:
+    """Update types the handler routers listen to (for allowed_updates)"""
+    types = set()
+    for router in ROUTERS:
+        types.update(router.resolve_used_update_types())
+    return sorted(types)
+
+
+def include_routers(dp: Dispatcher) -> None:
+    """Register the handler routers"""
+    logger.info("Handlerlar ro'yxatdan o'tkazilmoqda...")
+    metrics = HandlerMetricsMiddleware()
+    for router in ROUTERS:
+        # Inner middlewares also apply to the routers nested in these
+        router.message.middleware(metrics)
+        router.callback_query.middleware(metrics)
+        dp.include_router(router)
 
 
 async def setup_bot():
@@ -30,6 +74,10 @@ async def setup_bot():
     init_db()
     logger.info("Database muvaffaqiyatli initsializatsiya qilindi!")
     
+    # Load the category catalog before the first update needs it
+    categories = CategoryService().get_all_categories()
+    logger.info(f"Kategoriyalar katalogi yuklandi: {len(categories)} ta")
+    
     logger.info("Bot setup yakunlandi!")
 
 
@@ -38,5 +86,7 @@ async def shutdown_bot(bot: Bot):
     logger.info("Bot to'xtatilmoqda...")
     if hasattr(bot, 'session') and bot.session:
         await bot.session.close()
+    shutdown_db_executor()
+    close_all_connections()
     logger.info("Bot to'xtatildi!")
 
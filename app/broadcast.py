@@ -0,0 +1,193 @@
+"""Admin broadcast worker
+
+A broadcast walks the ``users`` table with a keyset cursor (user_id
+order), sends the text to each recipient at BROADCAST_RATE and stores
+each recipient's result as soon as its send finishes, even when the
+broadcast is being cancelled. The stored cursor only moves past
+recipients whose results are all stored. A restart resumes running
+broadcasts from it, skipping recipients already recorded; users that
+blocked the bot are recorded in ``blocked_users`` and skipped afterwards.
+Progress is shown by editing one admin message.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from app.send_scheduler import TokenBucket
+from database.executor import AsyncFacade
+from repositories.broadcast_repository import BroadcastRepository
+from config import BROADCAST_RATE, BROADCAST_BATCH_SIZE, BROADCAST_PROGRESS_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# broadcast_id -> running task
+_tasks: Dict[int, asyncio.Task] = {}
+_cancelled: set = set()
+
+
+def format_progress(broadcast: Tuple, rate: float = 0.0) -> str:
+    """Format broadcast progress for the admin message"""
+    (broadcast_id, text, created_by, chat_id, progress_message_id, status,
+     last_user_id, total, sent, failed, blocked, created_at, finished_at) = broadcast
+    remaining = max(0, total - sent - failed - blocked)
+    status_text = {
+        'running': "⏳ Yuborilmoqda",
+        'done': "✅ Yakunlandi",
+        'cancelled': "⛔ To'xtatildi",
+    }.get(status, status)
+    return (
+        f"📣 <b>Xabar yuborish #{broadcast_id}</b>\n"
+        f"{status_text}\n\n"
+        f"✅ Yuborildi: {sent}\n"
+        f"❌ Xato: {failed}\n"
+        f"🚫 Bloklagan: {blocked}\n"
+        f"⏳ Qoldi: {remaining}\n"
+        f"⚡ Tezlik: {rate:.1f} xabar/s"
+    )
+
+
+def progress_keyboard(broadcast_id: int, running: bool) -> Optional[InlineKeyboardMarkup]:
+    """Cancel button while the broadcast runs"""
+    if not running:
+        return None
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="⛔ To'xtatish", callback_data=f"broadcast_cancel_{broadcast_id}")]
+    ])
+
+
+async def _send(bot: Bot, bucket: TokenBucket, user_id: int, text: str) -> Tuple[int, str, Optional[str]]:
+    delay = bucket.reserve()
+    if delay:
+        await asyncio.sleep(delay)
+    try:
+        await bot.send_message(user_id, text, parse_mode="HTML")
+        return user_id, 'sent', None
+    except TelegramForbiddenError as e:
+        # Bot blocked or user deactivated
+        return user_id, 'blocked', str(e)[:200]
+    except TelegramBadRequest as e:
+        if "chat not found" in str(e).lower():
+            return user_id, 'blocked', str(e)[:200]
+        return user_id, 'failed', str(e)[:200]
+    except Exception as e:
+        return user_id, 'failed', str(e)[:200]
+
+
+async def _record(
+    repository: AsyncFacade,
+    broadcast_id: int,
+    result: Tuple[int, str, Optional[str]],
+    cursor: int
+) -> None:
+    """Store one recipient's result, even if the broadcast is cancelled meanwhile"""
+    # Telegram may already have accepted the message, so a shutdown must
+    # not drop the row: wait for the write before letting the cancel through
+    save = asyncio.ensure_future(repository.record_delivery(broadcast_id, *result, cursor))
+    try:
+        await asyncio.shield(save)
+    except asyncio.CancelledError:
+        await asyncio.gather(save, return_exceptions=True)
+        raise
+
+
+async def _update_progress(bot: Bot, broadcast: Tuple, rate: float) -> None:
+    chat_id, message_id = broadcast[3], broadcast[4]
+    if not chat_id or not message_id:
+        return
+    try:
+        await bot.edit_message_text(
+            format_progress(broadcast, rate),
+            chat_id=chat_id,
+            message_id=message_id,
+            reply_markup=progress_keyboard(broadcast[0], broadcast[5] == 'running'),
+            parse_mode="HTML"
+        )
+    except TelegramBadRequest as e:
+        if "not modified" not in str(e).lower():
+            logger.warning(f"Broadcast #{broadcast[0]} progress xabari yangilanmadi: {e}")
+
+
+async def run_broadcast(bot: Bot, broadcast_id: int) -> None:
+    """Send a broadcast to all remaining recipients"""
+    repository = AsyncFacade(BroadcastRepository())
+    bucket = TokenBucket(BROADCAST_RATE, 1)
+    broadcast = await repository.get_by_id(broadcast_id)
+    if not broadcast or broadcast[5] != 'running':
+        return
+    
+    text, cursor = broadcast[1], broadcast[6]
+    started = time.monotonic()
+    processed = 0
+    last_progress = 0.0
+    logger.info(f"Broadcast #{broadcast_id} boshlandi (cursor {cursor})")
+    
+    try:
+        while broadcast_id not in _cancelled:
+            recipients = await repository.get_recipients(broadcast_id, cursor, BROADCAST_BATCH_SIZE)
+            if not recipients:
+                break
+            
+            # The cursor advances only past a stored prefix of the batch
+            stored = [False] * len(recipients)
+            stored_prefix = 0
+            
+            async def deliver(index: int, user_id: int) -> None:
+                nonlocal cursor, stored_prefix
+                result = await _send(bot, bucket, user_id, text)
+                await _record(repository, broadcast_id, result, cursor)
+                stored[index] = True
+                while stored_prefix < len(recipients) and stored[stored_prefix]:
+                    cursor = recipients[stored_prefix]
+                    stored_prefix += 1
+            
+            await asyncio.gather(*(deliver(index, user_id) for index, user_id in enumerate(recipients)))
+            processed += len(recipients)
+            
+            now = time.monotonic()
+            if now - last_progress >= BROADCAST_PROGRESS_INTERVAL:
+                last_progress = now
+                broadcast = await repository.get_by_id(broadcast_id)
+                await _update_progress(bot, broadcast, processed / (now - started))
+        
+        status = 'cancelled' if broadcast_id in _cancelled else 'done'
+        await repository.finish(broadcast_id, status)
+        broadcast = await repository.get_by_id(broadcast_id)
+        elapsed = time.monotonic() - started
+        await _update_progress(bot, broadcast, processed / elapsed if elapsed else 0.0)
+        logger.info(
+            f"Broadcast #{broadcast_id} {status}: yuborildi {broadcast[8]}, "
+            f"xato {broadcast[9]}, bloklagan {broadcast[10]}"
+        )
+    except asyncio.CancelledError:
+        # Shutdown: the broadcast stays 'running' and resumes on next start
+        raise
+    except Exception as e:
+        logger.error(f"Broadcast #{broadcast_id} xatoligi: {str(e)}", exc_info=True)
+    finally:
+        _tasks.pop(broadcast_id, None)
+        _cancelled.discard(broadcast_id)
+
+
+def start_broadcast(bot: Bot, broadcast_id: int) -> None:
+    """Run a broadcast in the background"""
+    if broadcast_id not in _tasks:
+        _tasks[broadcast_id] = asyncio.create_task(run_broadcast(bot, broadcast_id))
+
+
+def cancel_broadcast(broadcast_id: int) -> bool:
+    """Ask a running broadcast to stop after the current batch"""
+    if broadcast_id not in _tasks:
+        return False
+    _cancelled.add(broadcast_id)
+    return True
+
+
+async def resume_broadcasts(bot: Bot) -> None:
+    """Resume broadcasts interrupted by a restart"""
+    repository = AsyncFacade(BroadcastRepository())
+    for broadcast in await repository.get_running():
+        logger.info(f"Broadcast #{broadcast[0]} davom ettirilmoqda")
+        start_broadcast(bot, broadcast[0])
@@ -0,0 +1,140 @@
+"""Streaming file downloads
+
+Telegram files are streamed chunk by chunk into a temporary file while
+being hashed, and the size limit is enforced as the bytes arrive rather
+than trusted from the metadata. Disk writes and hashing run in a worker
+thread, and at most DOWNLOAD_CONCURRENCY downloads run at once, so a
+burst of uploads neither blocks the event loop nor saturates the link.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional
+from aiogram import Bot
+from config import (
+    MAX_FILE_SIZE, DOWNLOAD_CONCURRENCY, DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_WRITE_BUFFER, DOWNLOAD_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+class FileTooLarge(Exception):
+    """The file exceeds the allowed size"""
+
+
+@dataclass
+class DownloadedFile:
+    """A completed download in a temporary file"""
+    path: str
+    sha256: str
+    size: int
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+    return _semaphore
+
+
+def _write_chunks(f, digest, chunks: List[bytes]) -> None:
+    for chunk in chunks:
+        digest.update(chunk)
+        f.write(chunk)
+
+
+def _copy_local(source: str, destination: str, max_size: int) -> DownloadedFile:
+    """Copy a file served by a local Bot API server"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        for chunk in iter(lambda: src.read(DOWNLOAD_CHUNK_SIZE), b''):
+            size += len(chunk)
+            if size > max_size:
+                raise FileTooLarge(size)
+            digest.update(chunk)
+            dst.write(chunk)
+    return DownloadedFile(destination, digest.hexdigest(), size)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _stream(bot: Bot, file_path: str, destination: str, max_size: int) -> DownloadedFile:
+    digest = hashlib.sha256()
+    size = 0
+    buffered: List[bytes] = []
+    buffered_size = 0
+    f = await asyncio.to_thread(open, destination, 'wb')
+    try:
+        url = bot.session.api.file_url(bot.token, file_path)
+        async for chunk in bot.session.stream_content(
+            url=url,
+            timeout=DOWNLOAD_TIMEOUT,
+            chunk_size=DOWNLOAD_CHUNK_SIZE,
+            raise_for_status=True
+        ):
+            size += len(chunk)
+            if size > max_size:
+                raise FileTooLarge(size)
+            buffered.append(chunk)
+            buffered_size += len(chunk)
+            if buffered_size >= DOWNLOAD_WRITE_BUFFER:
+                await asyncio.to_thread(_write_chunks, f, digest, buffered)
+                buffered = []
+                buffered_size = 0
+        await asyncio.to_thread(_write_chunks, f, digest, buffered)
+    finally:
+        await asyncio.to_thread(f.close)
+    return DownloadedFile(destination, digest.hexdigest(), size)
+
+
+async def download_to_temp(
+    bot: Bot,
+    file_id: str,
+    tmp_folder: str,
+    suffix: str = '',
+    max_size: int = MAX_FILE_SIZE
+) -> DownloadedFile:
+    """Download a Telegram file into ``tmp_folder``
+
+    The caller moves the result to its final place (``os.replace``, which is
+    atomic on the same filesystem) or removes it.
+
+    Raises:
+        FileTooLarge: the file is larger than ``max_size``
+    """
+    async with _get_semaphore():
+        file_info = await bot.get_file(file_id)
+        if file_info.file_size and file_info.file_size > max_size:
+            raise FileTooLarge(file_info.file_size)
+
+        await asyncio.to_thread(os.makedirs, tmp_folder, exist_ok=True)
+        destination = os.path.join(tmp_folder, uuid.uuid4().hex + suffix)
+        try:
+            if bot.session.api.is_local:
+                source = bot.session.api.wrap_local_file.to_local(file_info.file_path)
+                return await asyncio.to_thread(_copy_local, str(source), destination, max_size)
+            return await _stream(bot, file_info.file_path, destination, max_size)
+        except BaseException:
+            await asyncio.to_thread(_remove, destination)
+            raise
+
+
+def move_into_place(tmp_path: str, path: str) -> None:
+    """Atomically move a download to ``path`` (dropped if already there)"""
+    if os.path.exists(path):
+        os.remove(tmp_path)
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp_path, path)
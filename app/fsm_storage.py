@@ -0,0 +1,152 @@
+"""SQLite-backed FSM storage
+
+Conversation state and data live in the ``fsm_storage`` table, so a
+half-finished flow survives a restart. Reads and writes go to an
+in-memory layer: ``state.update_data`` inside a flow only changes memory,
+and changed keys are written in one transaction every FSM_FLUSH_INTERVAL
+seconds, or as soon as FSM_FLUSH_BATCH keys are dirty. Entries idle for
+FSM_CACHE_IDLE_SECONDS leave memory once flushed. Rows untouched for
+FSM_TTL_HOURS (abandoned conversations) are deleted.
+
+The memory layer is per process. With worker processes every user is
+handled by one worker, so no two caches hold the same key.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Mapping, Optional, Set
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from database.executor import AsyncFacade
+from repositories.fsm_repository import FsmRepository
+from config import FSM_FLUSH_INTERVAL, FSM_FLUSH_BATCH, FSM_CACHE_IDLE_SECONDS, FSM_TTL_HOURS
+
+logger = logging.getLogger(__name__)
+
+# Seconds between expiry passes
+EXPIRE_INTERVAL = 3600
+
+
+class _Record:
+    __slots__ = ("state", "data", "last_used")
+
+    def __init__(self, state: Optional[str], data: Dict[str, Any]):
+        self.state = state
+        self.data = data
+        self.last_used = time.monotonic()
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM storage persisted in SQLite with a write-behind memory layer"""
+
+    def __init__(self):
+        self.repository = AsyncFacade(FsmRepository())
+        self._records: Dict[str, _Record] = {}
+        self._dirty: Set[str] = set()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._last_expire = time.monotonic()
+
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        return ":".join(str(part) if part is not None else "" for part in (
+            key.bot_id, key.chat_id, key.user_id, key.thread_id,
+            key.business_connection_id, key.destiny
+        ))
+
+    async def _record(self, key: StorageKey) -> _Record:
+        storage_key = self._key(key)
+        record = self._records.get(storage_key)
+        if record is None:
+            row = await self.repository.get(storage_key)
+            state, data = (row[0], json.loads(row[1])) if row else (None, {})
+            # Another coroutine may have loaded (and changed) it meanwhile
+            record = self._records.setdefault(storage_key, _Record(state, data))
+        record.last_used = time.monotonic()
+        return record
+
+    def _mark_dirty(self, key: StorageKey) -> None:
+        self._dirty.add(self._key(key))
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+        if len(self._dirty) >= FSM_FLUSH_BATCH:
+            self._wakeup.set()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(key)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._record(key)).state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(
+                f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            )
+        record = await self._record(key)
+        record.data = data.copy()
+        self._mark_dirty(key)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._record(key)).data.copy()
+
+    async def flush(self) -> None:
+        """Write dirty keys to the database"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            rows = []
+            deleted = []
+            for storage_key in dirty:
+                record = self._records.get(storage_key)
+                if record is None or (record.state is None and not record.data):
+                    deleted.append(storage_key)
+                else:
+                    rows.append((storage_key, record.state, json.dumps(record.data, ensure_ascii=False)))
+            try:
+                await self.repository.save_many(rows, deleted)
+            except Exception:
+                # Keep them dirty for the next attempt
+                self._dirty |= dirty
+                raise
+
+    def _evict_idle(self) -> None:
+        """Drop flushed records that have not been used for a while"""
+        cutoff = time.monotonic() - FSM_CACHE_IDLE_SECONDS
+        idle = [
+            storage_key for storage_key, record in self._records.items()
+            if record.last_used < cutoff and storage_key not in self._dirty
+        ]
+        for storage_key in idle:
+            del self._records[storage_key]
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), FSM_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                self._evict_idle()
+                if time.monotonic() - self._last_expire > EXPIRE_INTERVAL:
+                    self._last_expire = time.monotonic()
+                    expired = await self.repository.delete_expired(FSM_TTL_HOURS)
+                    if expired:
+                        logger.info(f"FSM: {expired} ta eskirgan suhbat o'chirildi")
+            except Exception as e:
+                logger.error(f"FSM flush xatosi: {str(e)}", exc_info=True)
+
+    async def close(self) -> None:
+        """Stop the flusher and write what is still pending"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
@@ -0,0 +1,99 @@
+"""Outbox worker
+
+Delivers the Telegram messages queued in the ``outbox`` table (channel
+posts and user notifications on moderation). Entries are committed
+together with the change they belong to and removed only after Telegram
+accepted them, so nothing is lost on a crash; an entry may be delivered
+twice if the process dies between sending and deleting it.
+"""
+import asyncio
+import json
+import logging
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from database.executor import AsyncFacade
+from repositories.outbox_repository import OutboxRepository
+from keyboards.graduate_keyboards import graduate_main_menu
+from keyboards.employer_keyboards import employer_main_menu
+from config import (
+    OUTBOX_POLL_INTERVAL, OUTBOX_BATCH_SIZE,
+    OUTBOX_MAX_ATTEMPTS, OUTBOX_MAX_BACKOFF
+)
+
+logger = logging.getLogger(__name__)
+
+# Reply keyboards referenced by the 'menu' field of a payload
+MENUS = {
+    'graduate': graduate_main_menu,
+    'employer': employer_main_menu,
+}
+
+_wakeup = asyncio.Event()
+
+
+def wake_outbox() -> None:
+    """Wake the worker after queueing new entries"""
+    _wakeup.set()
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before the next attempt: 5s, 10s, 20s, ... capped"""
+    return min(OUTBOX_MAX_BACKOFF, 5 * 2 ** attempts)
+
+
+async def deliver(bot: Bot, kind: str, payload: dict) -> None:
+    """Send one outbox entry"""
+    payload = dict(payload)
+    menu = payload.pop('menu', None)
+    language = payload.pop('language', "uz")
+    if menu:
+        payload['reply_markup'] = MENUS[menu](language)
+    
+    if kind == 'send_message':
+        await bot.send_message(**payload)
+    elif kind == 'send_document':
+        await bot.send_document(**payload)
+    else:
+        raise ValueError(f"Noma'lum outbox turi: {kind}")
+
+
+async def _process_entry(bot: Bot, outbox: AsyncFacade, entry: tuple) -> None:
+    outbox_id, kind, payload, attempts = entry
+    try:
+        await deliver(bot, kind, json.loads(payload))
+    except (TelegramForbiddenError, TelegramBadRequest, ValueError) as e:
+        # Blocked bot, unknown chat, bad payload: retrying will not help
+        logger.warning(f"Outbox #{outbox_id} ({kind}) yuborilmadi: {e}")
+        await outbox.mark_failed(outbox_id, str(e))
+    except Exception as e:
+        if attempts + 1 >= OUTBOX_MAX_ATTEMPTS:
+            logger.error(f"Outbox #{outbox_id} ({kind}) {attempts + 1} urinishdan keyin bekor qilindi: {e}")
+            await outbox.mark_failed(outbox_id, str(e))
+        else:
+            delay = retry_delay(attempts)
+            logger.warning(f"Outbox #{outbox_id} ({kind}) xatolik, {delay:.0f}s dan keyin qayta: {e}")
+            await outbox.mark_retry(outbox_id, str(e), delay)
+    else:
+        await outbox.mark_sent(outbox_id)
+
+
+async def outbox_worker(bot: Bot):
+    """Drain the outbox; runs until cancelled"""
+    outbox = AsyncFacade(OutboxRepository())
+    
+    while True:
+        _wakeup.clear()
+        try:
+            entries = await outbox.get_due(OUTBOX_BATCH_SIZE)
+            if entries:
+                # Different chats are sent in parallel; the send scheduler
+                # keeps entries for the same chat in queue order
+                await asyncio.gather(*(_process_entry(bot, outbox, entry) for entry in entries))
+                continue
+        except Exception as e:
+            logger.error(f"Outbox worker xatoligi: {str(e)}", exc_info=True)
+        
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=OUTBOX_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
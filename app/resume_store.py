@@ -0,0 +1,66 @@
+"""Content-addressed resume store
+
+Resumes are stored once per content, under
+``RESUME_FOLDER/<aa>/<bb>/<sha256><ext>``. The two shard levels keep
+directories small. A Telegram ``file_unique_id`` seen before is not
+downloaded again, and the same content uploaded as a different file
+reuses the stored copy.
+
+Ads reference a stored file through ``ads.file_path``. When no live ad
+references a file any more, ``collect_garbage`` deletes it.
+"""
+import asyncio
+import logging
+import os
+from aiogram import Bot
+from aiogram.types import Document
+from database.executor import AsyncFacade, run_db
+from repositories.file_repository import FileRepository
+from services.file_cleanup_service import FileCleanupService
+from app.downloads import download_to_temp, move_into_place
+from config import RESUME_FOLDER, MAX_FILE_SIZE
+
+logger = logging.getLogger(__name__)
+
+TMP_FOLDER = os.path.join(RESUME_FOLDER, ".tmp")
+
+file_repo = AsyncFacade(FileRepository())
+cleanup_service = FileCleanupService()
+
+
+def shard_path(sha256: str, ext: str) -> str:
+    """Path of stored content"""
+    return os.path.join(RESUME_FOLDER, sha256[:2], sha256[2:4], sha256 + ext)
+
+
+async def store_resume(bot: Bot, document: Document, max_size: int = MAX_FILE_SIZE) -> str:
+    """Store an uploaded resume and return its path (downloading only if new)
+
+    Raises:
+        FileTooLarge: the file is larger than ``max_size``
+    """
+    path = await file_repo.get_path_by_unique_id(document.file_unique_id)
+    if path and await asyncio.to_thread(os.path.exists, path):
+        logger.info(f"Resume allaqachon saqlangan: {path}")
+        return path
+
+    ext = os.path.splitext(document.file_name or '')[1].lower()
+    download = await download_to_temp(bot, document.file_id, TMP_FOLDER, ext, max_size)
+    try:
+        path = await file_repo.add(
+            document.file_unique_id, download.sha256,
+            shard_path(download.sha256, ext), download.size
+        )
+    except BaseException:
+        await asyncio.to_thread(os.remove, download.path)
+        raise
+    await asyncio.to_thread(move_into_place, download.path, path)
+    return path
+
+
+async def collect_garbage() -> int:
+    """Delete stored files that no live ad references; returns the count"""
+    result = await run_db(cleanup_service.cleanup_orphaned_files)
+    if result['deleted_count']:
+        logger.info(f"Resume store: {result['deleted_count']} ta fayl o'chirildi")
+    return result['deleted_count']
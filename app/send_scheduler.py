@@ -0,0 +1,204 @@
+"""Outbound Telegram send scheduler
+
+Every API request made through the bot session passes through
+``SendScheduler`` (a session request middleware), so handlers keep calling
+``bot.send_message``/``message.answer`` as usual. Send-type requests are
+throttled by:
+
+- a global token bucket (Telegram's ~30 messages/second per bot);
+- a per-chat token bucket (~1/second in private chats, ~20/minute in
+  groups and channels).
+
+Requests to one chat are serialized through a FIFO lock, so they are
+delivered in the order they were made; different chats proceed in
+parallel. ``TelegramRetryAfter`` responses are retried after the delay
+Telegram asks for; the delay pauses both the chat and the global bucket.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Union
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from config import (
+    SEND_GLOBAL_RATE, SEND_CHAT_RATE, SEND_CHAT_BURST,
+    SEND_GROUP_RATE, SEND_GROUP_BURST, SEND_MAX_RETRIES
+)
+
+logger = logging.getLogger(__name__)
+
+# Requests counted against Telegram's sending limits
+THROTTLED_PREFIXES = ("Send", "Copy", "Forward", "Edit")
+UNTHROTTLED_METHODS = frozenset({"SendChatAction"})
+
+# Idle per-chat state is dropped after this many seconds
+CHAT_IDLE_SECONDS = 60.0
+
+
+class TokenBucket:
+    """Token bucket handing out reservations
+
+    ``reserve()`` always takes a token and returns how long the caller
+    must wait for it, so waiters are served in reservation order.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take a token; return the delay in seconds before it is valid"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Make the next reservation wait at least ``seconds``"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class _ChatQueue:
+    """Ordering lock and rate bucket of one chat"""
+
+    __slots__ = ("lock", "bucket", "waiting", "last_used")
+
+    def __init__(self, bucket: TokenBucket):
+        self.lock = asyncio.Lock()
+        self.bucket = bucket
+        self.waiting = 0
+        self.last_used = time.monotonic()
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Rate-limiting, order-preserving session middleware"""
+
+    def __init__(self):
+        self.global_bucket = TokenBucket(SEND_GLOBAL_RATE, SEND_GLOBAL_RATE)
+        self.share = 1.0
+        self._chats: Dict[Union[int, str], _ChatQueue] = {}
+        self._last_prune = time.monotonic()
+        self.stats: Dict[str, Any] = {
+            'queued': 0,        # requests currently waiting or in flight
+            'max_queued': 0,
+            'sent': 0,
+            'failed': 0,
+            'retries': 0,
+            'total_latency': 0.0,
+            'max_latency': 0.0,
+        }
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = self._throttled_chat(method)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        queue = self._chat_queue(chat_id)
+        queue.waiting += 1
+        self.stats['queued'] += 1
+        self.stats['max_queued'] = max(self.stats['max_queued'], self.stats['queued'])
+        started = time.monotonic()
+        try:
+            async with queue.lock:
+                result = await self._send(make_request, bot, method, queue)
+            latency = time.monotonic() - started
+            self.stats['sent'] += 1
+            self.stats['total_latency'] += latency
+            self.stats['max_latency'] = max(self.stats['max_latency'], latency)
+            return result
+        except Exception:
+            self.stats['failed'] += 1
+            raise
+        finally:
+            queue.waiting -= 1
+            queue.last_used = time.monotonic()
+            self.stats['queued'] -= 1
+
+    async def _send(self, make_request, bot, method, queue: _ChatQueue):
+        """Wait for both buckets, then send, retrying on RetryAfter"""
+        attempt = 0
+        while True:
+            # The chat bucket is reserved first: while waiting for it this
+            # request does not hold a global token other chats could use
+            delay = queue.bucket.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+            delay = self.global_bucket.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > SEND_MAX_RETRIES:
+                    raise
+                self.stats['retries'] += 1
+                logger.warning(
+                    f"RetryAfter {e.retry_after}s ({type(method).__name__}), "
+                    f"urinish {attempt}/{SEND_MAX_RETRIES}"
+                )
+                # Flood limits often apply to the whole bot, so hold back
+                # every send in this process, not only this chat's
+                queue.bucket.pause(e.retry_after)
+                self.global_bucket.pause(e.retry_after)
+
+    def set_share(self, share: float) -> None:
+        """Use only ``share`` of the bot-wide limits
+        
+        Worker processes split the global and group limits between them;
+        private chats stay on one worker, so their limit is not split.
+        """
+        self.share = share
+        rate = SEND_GLOBAL_RATE * share
+        self.global_bucket = TokenBucket(rate, max(rate, 1))
+        self._chats.clear()
+
+    def _throttled_chat(self, method) -> Optional[Union[int, str]]:
+        """Get the target chat of a send-type request (None if not throttled)"""
+        name = type(method).__name__
+        if not name.startswith(THROTTLED_PREFIXES) or name in UNTHROTTLED_METHODS:
+            return None
+        return getattr(method, "chat_id", None)
+
+    def _chat_queue(self, chat_id: Union[int, str]) -> _ChatQueue:
+        queue = self._chats.get(chat_id)
+        if queue is None:
+            # Negative ids and @usernames are groups/channels
+            if isinstance(chat_id, str) or chat_id < 0:
+                bucket = TokenBucket(SEND_GROUP_RATE * self.share, max(SEND_GROUP_BURST * self.share, 1))
+            else:
+                bucket = TokenBucket(SEND_CHAT_RATE, SEND_CHAT_BURST)
+            queue = self._chats[chat_id] = _ChatQueue(bucket)
+        self._prune()
+        return queue
+
+    def _prune(self) -> None:
+        """Drop state of chats that have been idle for a while"""
+        now = time.monotonic()
+        if now - self._last_prune < CHAT_IDLE_SECONDS:
+            return
+        self._last_prune = now
+        idle = [
+            chat_id for chat_id, queue in self._chats.items()
+            if not queue.waiting and now - queue.last_used > CHAT_IDLE_SECONDS
+        ]
+        for chat_id in idle:
+            del self._chats[chat_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and latency statistics"""
+        stats = dict(self.stats)
+        stats['chats'] = len(self._chats)
+        stats['avg_latency'] = stats['total_latency'] / stats['sent'] if stats['sent'] else 0.0
+        return stats
+
+
+send_scheduler = SendScheduler()
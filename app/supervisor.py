@@ -0,0 +1,307 @@
+"""Multi-process supervisor
+
+With WORKER_PROCESSES > 1 the main process only receives updates (long
+polling or webhook) and forwards each raw update to one of N worker
+processes, each with its own Bot, Dispatcher and event loop. The worker
+is chosen by the sender's user id, so a user's FSM conversation (cached
+in the worker's memory) always stays on the same worker.
+
+Shared background jobs (file cleanup, outbox delivery, broadcasts, ...)
+run in worker 0 only. Updates from admins are routed to worker 0 as well:
+moderation wakes the outbox worker and broadcasts are started and
+cancelled through in-process state, which only worker 0 owns. Every worker revalidates its category catalog
+against the database, because a category edited through one worker is
+not visible in the others' in-process caches. The global and group send
+limits are split evenly between the workers. Handler metrics are per
+worker: each writes its own metrics file, and /perf reports the worker
+that handled the command.
+"""
+import asyncio
+import logging
+import multiprocessing
+import queue as queue_module
+import signal
+from typing import Any, Callable, Dict, List, Optional
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from app.bot import create_bot, create_dispatcher, include_routers, shutdown_bot, used_update_types
+from app.broadcast import resume_broadcasts
+from app.send_scheduler import send_scheduler
+from app.tasks import start_background_tasks, start_outbox_worker, start_metrics_export, revalidate_category_catalog
+from app.webhook import DrainingRequestHandler, run_webhook, wait_for_shutdown_signal
+from database.executor import run_db
+from repositories.category_repository import CategoryRepository
+from config import (
+    ADMIN_IDS, RUN_MODE, WEBHOOK_SECRET, WEBHOOK_DRAIN_TIMEOUT, WORKER_QUEUE_SIZE,
+    CATALOG_REVALIDATE_SECONDS, FILE_CLEANUP_HOURS, CLEANUP_INTERVAL_HOURS
+)
+
+logger = logging.getLogger(__name__)
+
+# Sent to a worker's queue to make it finish and exit
+STOP = None
+
+# Seconds between worker liveness checks
+WATCH_INTERVAL = 5.0
+
+
+def shard_for(update: Dict[str, Any], workers: int) -> int:
+    """Worker index of a raw update: by sender, falling back to the chat
+
+    Admins always go to worker 0, which runs the outbox and broadcasts.
+    """
+    for value in update.values():
+        if not isinstance(value, dict):
+            continue
+        user = value.get('from') or value.get('user')
+        if user:
+            if user['id'] in ADMIN_IDS:
+                return 0
+            return user['id'] % workers
+        chat = value.get('chat') or (value.get('message') or {}).get('chat')
+        if chat:
+            return chat['id'] % workers
+    return 0
+
+
+async def _feed(dp: Dispatcher, bot: Bot, update: Dict[str, Any]) -> None:
+    try:
+        result = await dp.feed_raw_update(bot, update)
+        if isinstance(result, TelegramMethod):
+            await dp.silent_call_request(bot, result)
+    except Exception as e:
+        logger.error(f"Update {update.get('update_id')} xatosi: {str(e)}", exc_info=True)
+
+
+async def _cancel_background_tasks() -> None:
+    """Stop cleanup, outbox, broadcasts, ... before the database is closed"""
+    current = asyncio.current_task()
+    tasks = [task for task in asyncio.all_tasks() if task is not current]
+    for task in tasks:
+        task.cancel()
+    # Interrupted broadcasts stay 'running' and resume on the next start
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _run_worker(
+    index: int,
+    workers: int,
+    updates: multiprocessing.Queue,
+    processed: Any,
+    background_jobs: bool,
+    bot_factory: Optional[Callable[[], Bot]]
+) -> None:
+    bot = bot_factory() if bot_factory else create_bot()
+    send_scheduler.set_share(1 / workers)
+    dp = create_dispatcher()
+    include_routers(dp)
+
+    if background_jobs and index == 0:
+        start_background_tasks(cleanup_hours=FILE_CLEANUP_HOURS, interval_hours=CLEANUP_INTERVAL_HOURS)
+        start_outbox_worker(bot)
+        await resume_broadcasts(bot)
+    # Load the category catalog before the first update needs it
+    await run_db(CategoryRepository().reload_catalog)
+    asyncio.create_task(revalidate_category_catalog(CATALOG_REVALIDATE_SECONDS))
+    start_metrics_export(worker=index)
+    logger.info(f"Worker {index} ishga tushdi")
+
+    loop = asyncio.get_running_loop()
+    running = set()
+
+    def done(task: asyncio.Task) -> None:
+        running.discard(task)
+        processed[index] += 1
+
+    stopping = False
+    while not stopping:
+        batch = [await loop.run_in_executor(None, updates.get)]
+        # Take whatever else is already queued without another thread hop
+        while len(batch) < 100:
+            try:
+                batch.append(updates.get_nowait())
+            except queue_module.Empty:
+                break
+        for update in batch:
+            if update is STOP:
+                stopping = True
+                break
+            task = asyncio.create_task(_feed(dp, bot, update))
+            running.add(task)
+            task.add_done_callback(done)
+
+    if running:
+        await asyncio.wait(running, timeout=WEBHOOK_DRAIN_TIMEOUT)
+    await _cancel_background_tasks()
+    # Updates are fed without start_polling, so the dispatcher's shutdown
+    # (which closes the storage) never runs: write the pending FSM changes
+    # here, before shutdown_bot closes the database
+    await dp.storage.close()
+    await shutdown_bot(bot)
+    logger.info(f"Worker {index} to'xtadi")
+
+
+def worker_main(
+    index: int,
+    workers: int,
+    updates: multiprocessing.Queue,
+    processed: Any,
+    background_jobs: bool = True,
+    bot_factory: Optional[Callable[[], Bot]] = None
+) -> None:
+    """Entry point of a worker process"""
+    # The supervisor decides when workers stop (after draining their queue)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    asyncio.run(_run_worker(index, workers, updates, processed, background_jobs, bot_factory))
+
+
+class Supervisor:
+    """Starts the worker processes and routes updates to them"""
+
+    def __init__(
+        self,
+        workers: int,
+        background_jobs: bool = True,
+        bot_factory: Optional[Callable[[], Bot]] = None
+    ):
+        self.workers = workers
+        self.background_jobs = background_jobs
+        self.bot_factory = bot_factory
+        self._context = multiprocessing.get_context('spawn')
+        self.queues = [self._context.Queue(WORKER_QUEUE_SIZE) for _ in range(workers)]
+        # Updates finished per worker (each slot is written by its worker only)
+        self.processed = self._context.Array('q', workers, lock=False)
+        self.processes: List[Any] = [None] * workers
+        self.routed = 0
+        self.stopping = False
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            self._spawn(index)
+
+    def _spawn(self, index: int) -> None:
+        process = self._context.Process(
+            target=worker_main,
+            args=(index, self.workers, self.queues[index], self.processed,
+                  self.background_jobs, self.bot_factory),
+            name=f"worker-{index}",
+            daemon=True
+        )
+        process.start()
+        self.processes[index] = process
+
+    def route(self, update: Dict[str, Any]) -> bool:
+        """Queue an update for its worker; False if that worker is backlogged"""
+        try:
+            self.queues[shard_for(update, self.workers)].put_nowait(update)
+        except queue_module.Full:
+            return False
+        self.routed += 1
+        return True
+
+    async def watch(self) -> None:
+        """Restart workers that died"""
+        while not self.stopping:
+            await asyncio.sleep(WATCH_INTERVAL)
+            for index, process in enumerate(self.processes):
+                if not self.stopping and not process.is_alive():
+                    logger.error(f"Worker {index} to'xtab qoldi (exit {process.exitcode}), qayta ishga tushirilmoqda")
+                    self._spawn(index)
+
+    def stop(self, timeout: float = WEBHOOK_DRAIN_TIMEOUT + 10) -> None:
+        """Let workers finish their queued updates, then stop them"""
+        self.stopping = True
+        for updates in self.queues:
+            updates.put(STOP)
+        for index, process in enumerate(self.processes):
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning(f"Worker {index} o'z vaqtida to'xtamadi")
+                process.terminate()
+        logger.info(f"Workerlar to'xtadi, qayta ishlangan: {list(self.processed)}")
+
+
+class RoutingRequestHandler(DrainingRequestHandler):
+    """Webhook handler that forwards updates to the worker processes"""
+
+    def __init__(self, *args: Any, supervisor: Supervisor, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.supervisor = supervisor
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        update = await request.json(loads=bot.session.json_loads)
+        if not self.supervisor.route(update):
+            # Telegram redelivers the update later
+            return web.Response(status=503, text="Busy")
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+
+class UpdatePoller:
+    """Long-polls getUpdates and routes the updates"""
+
+    def __init__(self, bot: Bot, supervisor: Supervisor):
+        self.bot = bot
+        self.allowed_updates = used_update_types()
+        self.supervisor = supervisor
+        self.offset: Optional[int] = None
+
+    async def run(self) -> None:
+        failures = 0
+        while True:
+            try:
+                updates = await self.bot.get_updates(
+                    offset=self.offset, timeout=30, allowed_updates=self.allowed_updates
+                )
+                failures = 0
+            except Exception as e:
+                failures += 1
+                logger.error(f"getUpdates xatosi: {str(e)}")
+                await asyncio.sleep(min(2 ** failures, 60))
+                continue
+
+            for update in updates:
+                raw = update.model_dump(mode='json', exclude_unset=True, by_alias=True)
+                # Back-pressure: wait for the worker rather than drop the update
+                while not self.supervisor.route(raw):
+                    await asyncio.sleep(0.1)
+                self.offset = update.update_id + 1
+
+    async def confirm(self) -> None:
+        """Tell Telegram the routed updates were received"""
+        if self.offset is not None:
+            await self.bot.get_updates(offset=self.offset, timeout=0, limit=1)
+
+
+async def run_supervisor(bot: Bot, workers: int) -> None:
+    """Run ``workers`` worker processes until SIGINT/SIGTERM
+
+    This process only receives updates: its dispatcher has no routers and
+    no FSM storage.
+    """
+    dp = Dispatcher()
+    supervisor = Supervisor(workers)
+    supervisor.start()
+    logger.info(f"Supervisor: {workers} ta worker ishga tushirildi")
+    watch_task = asyncio.create_task(supervisor.watch())
+    try:
+        if RUN_MODE == "webhook":
+            handler = RoutingRequestHandler(
+                dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET, supervisor=supervisor
+            )
+            await run_webhook(bot, dp, handler)
+        else:
+            await bot.delete_webhook()
+            poller = UpdatePoller(bot, supervisor)
+            poll_task = asyncio.create_task(poller.run())
+            try:
+                await wait_for_shutdown_signal()
+            finally:
+                poll_task.cancel()
+                # The open long poll must end before confirm() polls again
+                await asyncio.gather(poll_task, return_exceptions=True)
+                await poller.confirm()
+    finally:
+        watch_task.cancel()
+        await asyncio.to_thread(supervisor.stop)
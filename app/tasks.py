@@ -1,10 +1,31 @@
 """Background tasks for the bot"""
 import asyncio
 import logging
+import os
+import time
+from typing import Optional
 from services.file_cleanup_service import FileCleanupService
+from app.send_scheduler import send_scheduler
+from app.outbox import outbox_worker
+from database.executor import run_db
+from repositories.ad_repository import AdRepository
+from repositories.category_repository import CategoryRepository
+from utils.metrics import format_prometheus
+from config import (
+    RESUME_QUOTA_BYTES, LOOP_MONITOR_INTERVAL, HISTORY_COMPACTION_INTERVAL_HOURS, HISTORY_COMPACTION_BATCH,
+    METRICS_FILE, METRICS_EXPORT_SECONDS
+)
 
 logger = logging.getLogger(__name__)
 
+# Event loop lag statistics, filled by monitor_event_loop_lag
+loop_lag_stats = {
+    'samples': 0,
+    'total_lag': 0.0,
+    'max_lag': 0.0,
+    'blocked_count': 0,  # samples with lag > 100 ms
+}
+
 
 async def periodic_file_cleanup(cleanup_hours: int = 24, interval_hours: int = 6):
     """
@@ -16,25 +37,43 @@ async def periodic_file_cleanup(cleanup_hours: int = 24, interval_hours: int = 6
     """
     cleanup_service = FileCleanupService(cleanup_hours=cleanup_hours)
     
+    # Files saved before the files table existed (no-op once registered)
+    try:
+        await run_db(cleanup_service.backfill_legacy_files)
+    except Exception as e:
+        logger.error(f"Error in legacy file backfill: {str(e)}", exc_info=True)
+    
     while True:
         try:
             logger.info("Starting periodic file cleanup...")
-            result = cleanup_service.cleanup_old_files()
+            result = await run_db(cleanup_service.cleanup_old_files)
             
             logger.info(
                 f"Cleanup completed: {result['deleted_count']} files deleted, "
-                f"{result['total_size_freed'] / 1024 / 1024:.2f} MB freed"
+                f"{result['total_size_freed'] / 1024 / 1024:.2f} MB freed, "
+                f"{result['scanned']} scanned in {result['duration'] * 1000:.0f} ms"
             )
             
             if result['errors']:
                 logger.warning(f"Cleanup errors: {result['errors']}")
             
-            # Also cleanup orphaned files
-            orphaned_result = cleanup_service.cleanup_orphaned_files()
+            # Files no ad references any more
+            orphaned_result = await run_db(cleanup_service.cleanup_orphaned_files)
             logger.info(
-                f"Orphaned cleanup: {orphaned_result['deleted_count']} files deleted"
+                f"Orphaned cleanup: {orphaned_result['deleted_count']} files deleted, "
+                f"{orphaned_result['scanned']} scanned in {orphaned_result['duration'] * 1000:.0f} ms"
             )
             
+            # Keep the stored resumes within the byte quota
+            if RESUME_QUOTA_BYTES > 0:
+                quota_result = await run_db(cleanup_service.enforce_quota, RESUME_QUOTA_BYTES)
+                if quota_result['deleted_count']:
+                    logger.info(
+                        f"Quota cleanup: {quota_result['deleted_count']} files evicted, "
+                        f"{quota_result['total_size_freed'] / 1024 / 1024:.2f} MB freed, "
+                        f"{quota_result['total_bytes'] / 1024 / 1024:.2f} MB stored"
+                    )
+            
         except Exception as e:
             logger.error(f"Error in periodic cleanup: {str(e)}", exc_info=True)
         
@@ -42,7 +81,153 @@ async def periodic_file_cleanup(cleanup_hours: int = 24, interval_hours: int = 6
         await asyncio.sleep(interval_hours * 3600)
 
 
+async def monitor_event_loop_lag(interval: float = 0.5, report_seconds: int = 60):
+    """
+    Measure how long the event loop is blocked
+    
+    The task sleeps for ``interval`` seconds and records how late it wakes
+    up. Any delay is time the loop spent running blocking code, e.g.
+    synchronous database calls. Run once with DB_EXECUTOR_ENABLED=false
+    and once with it enabled to compare.
+    
+    Args:
+        interval: Sampling interval in seconds
+        report_seconds: How often to log a summary
+    """
+    window_max = 0.0
+    window_total = 0.0
+    window_samples = 0
+    last_report = time.monotonic()
+    
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.monotonic() - started - interval)
+        
+        loop_lag_stats['samples'] += 1
+        loop_lag_stats['total_lag'] += lag
+        loop_lag_stats['max_lag'] = max(loop_lag_stats['max_lag'], lag)
+        if lag > 0.1:
+            loop_lag_stats['blocked_count'] += 1
+        
+        window_max = max(window_max, lag)
+        window_total += lag
+        window_samples += 1
+        
+        now = time.monotonic()
+        if now - last_report >= report_seconds:
+            logger.info(
+                f"Event loop lag: avg {window_total / window_samples * 1000:.1f} ms, "
+                f"max {window_max * 1000:.1f} ms ({window_samples} samples)"
+            )
+            window_max = 0.0
+            window_total = 0.0
+            window_samples = 0
+            last_report = now
+
+
+async def report_send_stats(report_seconds: int = 60):
+    """Log send scheduler queue depth and latency"""
+    last_sent = 0
+    while True:
+        await asyncio.sleep(report_seconds)
+        stats = send_scheduler.get_stats()
+        if stats['sent'] == last_sent and not stats['queued']:
+            continue
+        last_sent = stats['sent']
+        logger.info(
+            f"Send scheduler: navbatda {stats['queued']} (max {stats['max_queued']}), "
+            f"yuborildi {stats['sent']}, xato {stats['failed']}, retry {stats['retries']}, "
+            f"latency avg {stats['avg_latency'] * 1000:.0f} ms, max {stats['max_latency'] * 1000:.0f} ms"
+        )
+
+
+async def periodic_history_compaction(interval_hours: int = 24, batch_size: int = 200):
+    """Convert legacy full-blob ad_history entries to diffs, batch by batch"""
+    ad_repo = AdRepository()
+    
+    while True:
+        try:
+            total = {'ads': 0, 'rows': 0, 'bytes_saved': 0}
+            while True:
+                result = await run_db(ad_repo.compact_history, batch_size)
+                for key in total:
+                    total[key] += result[key]
+                if result['ads'] < batch_size:
+                    break
+                # Let handlers use the DB between batches
+                await asyncio.sleep(0)
+            
+            if total['rows']:
+                logger.info(
+                    f"Tarix siqildi: {total['ads']} e'lon, {total['rows']} yozuv, "
+                    f"{total['bytes_saved'] / 1024:.1f} KB tejaldi"
+                )
+        except Exception as e:
+            logger.error(f"Error in history compaction: {str(e)}", exc_info=True)
+        
+        await asyncio.sleep(interval_hours * 3600)
+
+
+async def revalidate_category_catalog(interval: float = 5.0):
+    """Reload the category catalog when another process changed categories"""
+    category_repo = CategoryRepository()
+    seen = await run_db(category_repo.get_version)
+    
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            version = await run_db(category_repo.get_version)
+            if version != seen:
+                seen = version
+                await run_db(category_repo.reload_catalog)
+        except Exception as e:
+            logger.error(f"Error in catalog revalidation: {str(e)}", exc_info=True)
+
+
+def _write_metrics_file(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    # Scrapers never see a half-written file
+    os.replace(tmp, path)
+
+
+async def export_metrics(path: str, interval: float = 60.0, labels: str = ""):
+    """Periodically write the handler histograms to a Prometheus text file"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(_write_metrics_file, path, format_prometheus(labels))
+        except Exception as e:
+            logger.error(f"Error in metrics export: {str(e)}", exc_info=True)
+
+
+def start_metrics_export(worker: Optional[int] = None):
+    """Start the metrics file export; each worker process writes its own file"""
+    if not METRICS_FILE or METRICS_EXPORT_SECONDS <= 0:
+        return
+    path, labels = METRICS_FILE, ""
+    if worker is not None:
+        root, ext = os.path.splitext(METRICS_FILE)
+        path, labels = f"{root}.worker{worker}{ext}", f'worker="{worker}"'
+    asyncio.create_task(export_metrics(path, METRICS_EXPORT_SECONDS, labels))
+
+
 def start_background_tasks(cleanup_hours: int = 24, interval_hours: int = 6):
     """Start background tasks"""
     asyncio.create_task(periodic_file_cleanup(cleanup_hours=cleanup_hours, interval_hours=interval_hours))
+    if LOOP_MONITOR_INTERVAL > 0:
+        asyncio.create_task(monitor_event_loop_lag(interval=LOOP_MONITOR_INTERVAL))
+    asyncio.create_task(report_send_stats())
+    if HISTORY_COMPACTION_INTERVAL_HOURS > 0:
+        asyncio.create_task(periodic_history_compaction(
+            interval_hours=HISTORY_COMPACTION_INTERVAL_HOURS,
+            batch_size=HISTORY_COMPACTION_BATCH
+        ))
+
 
+def start_outbox_worker(bot):
+    """Start the outbox delivery worker (needs the bot instance)"""
+    asyncio.create_task(outbox_worker(bot))
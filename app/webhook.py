@@ -0,0 +1,140 @@
+"""Webhook run mode
+
+Telegram POSTs updates to WEBHOOK_PATH on an aiohttp server. Requests
+without the right secret token (WEBHOOK_SECRET, required in this mode)
+are rejected with 401. Each update is
+acknowledged at once and handled in a background task. On shutdown the
+server stops accepting updates and waits up to WEBHOOK_DRAIN_TIMEOUT for
+in-flight handlers before the bot session is closed. Updates refused
+meanwhile are retried by Telegram.
+"""
+import asyncio
+import logging
+import signal
+import time
+from typing import Any, Optional
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from app.bot import used_update_types
+from config import (
+    WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET,
+    WEB_SERVER_HOST, WEB_SERVER_PORT, WEBHOOK_DRAIN_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PATH = "/health"
+
+
+class DrainingRequestHandler(SimpleRequestHandler):
+    """Webhook handler that drains in-flight updates on shutdown"""
+
+    def __init__(self, *args: Any, drain_timeout: float = WEBHOOK_DRAIN_TIMEOUT, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.drain_timeout = drain_timeout
+        self.accepting = True
+        self.received = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._background_feed_update_tasks)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if not self.accepting:
+            # Telegram redelivers the update later
+            return web.Response(status=503, text="Shutting down")
+        response = await super().handle(request)
+        # Requests rejected by the secret check are not updates
+        if response.status != 401:
+            self.received += 1
+        return response
+
+    async def drain(self) -> None:
+        """Stop accepting updates and wait for the running handlers"""
+        self.accepting = False
+        pending = set(self._background_feed_update_tasks)
+        if not pending:
+            return
+        logger.info(f"Webhook: {len(pending)} ta update yakunlanishi kutilmoqda...")
+        _, pending = await asyncio.wait(pending, timeout=self.drain_timeout)
+        if pending:
+            logger.warning(f"Webhook: {len(pending)} ta update {self.drain_timeout}s ichida tugamadi")
+
+    async def close(self) -> None:
+        # The bot session is closed by shutdown_bot after the drain
+        await self.drain()
+
+
+def create_web_app(
+    bot: Bot,
+    dp: Dispatcher,
+    secret_token: Optional[str] = None,
+    handler: Optional[DrainingRequestHandler] = None
+) -> web.Application:
+    """Build the aiohttp application serving the webhook and health check"""
+    app = web.Application()
+    if handler is None:
+        handler = DrainingRequestHandler(dispatcher=dp, bot=bot, secret_token=secret_token or None)
+    handler.register(app, path=WEBHOOK_PATH)
+    started_at = time.monotonic()
+
+    async def health(request: web.Request) -> web.Response:
+        return web.json_response({
+            'status': 'ok' if handler.accepting else 'draining',
+            'uptime': round(time.monotonic() - started_at),
+            'received': handler.received,
+            'in_flight': handler.in_flight,
+        }, status=200 if handler.accepting else 503)
+
+    app.router.add_get(HEALTH_PATH, health)
+    app['webhook_handler'] = handler
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def wait_for_shutdown_signal() -> None:
+    """Wait for SIGINT or SIGTERM"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.remove_signal_handler(sig)
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher, handler: Optional[DrainingRequestHandler] = None) -> None:
+    """Register the webhook and serve updates until SIGINT/SIGTERM
+
+    ``handler`` replaces the default request handler (the supervisor
+    passes one that forwards updates to worker processes).
+    """
+    if not WEBHOOK_BASE_URL:
+        raise RuntimeError("RUN_MODE=webhook uchun WEBHOOK_BASE_URL kerak")
+    if not WEBHOOK_SECRET:
+        # Without it anyone who finds the URL could post fake updates
+        raise RuntimeError("RUN_MODE=webhook uchun WEBHOOK_SECRET kerak")
+
+    app = create_web_app(bot, dp, WEBHOOK_SECRET, handler)
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    site = web.TCPSite(runner, WEB_SERVER_HOST, WEB_SERVER_PORT)
+    await site.start()
+    logger.info(f"Webhook server {WEB_SERVER_HOST}:{WEB_SERVER_PORT} da ishga tushdi")
+
+    await bot.set_webhook(
+        url=WEBHOOK_BASE_URL.rstrip('/') + WEBHOOK_PATH,
+        secret_token=WEBHOOK_SECRET,
+        allowed_updates=used_update_types(),
+    )
+    logger.info("Webhook o'rnatildi")
+
+    try:
+        await wait_for_shutdown_signal()
+    finally:
+        logger.info("Webhook server to'xtatilmoqda...")
+        # Stops the listener, then drains in-flight updates (on_shutdown)
+        await runner.cleanup()
@@ -0,0 +1,91 @@
+"""Shared setup for the local benchmarks
+
+Importing this module points the bot at a throw-away database and
+resume folder (before ``config`` is imported), so benchmarks never touch
+real data. Telegram is replaced by ``LocalSession``.
+"""
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Isolated database and settings, before config is imported. Set
+# BENCHMARK_WORKDIR to keep (and reuse) a generated dataset between runs.
+if "BENCHMARK_WORKDIR" not in os.environ:
+    os.environ["BENCHMARK_WORKDIR"] = tempfile.mkdtemp(prefix="hhbot_bench_")
+os.makedirs(os.environ["BENCHMARK_WORKDIR"], exist_ok=True)
+os.environ["DATABASE_PATH"] = os.path.join(os.environ["BENCHMARK_WORKDIR"], "bot.db")
+os.environ["RESUME_FOLDER"] = os.path.join(os.environ["BENCHMARK_WORKDIR"], "resumes") + "/"
+os.environ.setdefault("TOKEN", "123456:LOCAL")
+os.environ.setdefault("RESUME_ADMIN_GROUP_ID", "-1")
+os.environ.setdefault("VACANCY_ADMIN_GROUP_ID", "-2")
+
+from aiogram import Bot  # noqa: E402
+from aiogram.client.session.base import BaseSession  # noqa: E402
+from aiogram.types import Chat, Message  # noqa: E402
+from middlewares import api_timing  # noqa: E402
+
+
+class LocalSession(BaseSession):
+    """Answers Bot API calls locally"""
+
+    _message_ids = itertools.count(1)
+
+    async def make_request(self, bot: Bot, method: Any, timeout: Any = None) -> Any:
+        returning = getattr(method, "__returning__", None)
+        if returning is bool:
+            return True
+        if returning is Message:
+            chat_id = getattr(method, "chat_id", 0)
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.now(),
+                chat=Chat(id=chat_id if isinstance(chat_id, int) else 0, type="private"),
+            )
+        return None
+
+    async def stream_content(self, *args: Any, **kwargs: Any):
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def local_bot() -> Bot:
+    """Bot whose API calls never leave the process"""
+    bot = Bot(token=os.environ["TOKEN"], session=LocalSession())
+    # Same handler API timing as create_bot (the send scheduler is left out)
+    bot.session.middleware(api_timing)
+    return bot
+
+
+def synthetic_updates(count: int, users: int) -> List[Dict[str, Any]]:
+    """/start, /help and text messages from ``users`` distinct users"""
+    updates = []
+    now = int(time.time())
+    texts = ["/start", "/help", "hello"]
+    for i in range(count):
+        user_id = 1_000_000 + i % users
+        updates.append({
+            "update_id": i + 1,
+            "message": {
+                "message_id": i + 1,
+                "date": now,
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"},
+                "text": texts[i % len(texts)],
+            },
+        })
+    return updates
+
+
+def load_updates(path: str) -> List[Dict[str, Any]]:
+    """Recorded updates, one JSON object per line"""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
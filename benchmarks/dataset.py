@@ -0,0 +1,226 @@
+"""Synthetic dataset generator
+
+Fills the scratch database with users (all roles), ads of both types in
+every status spread over categories and the past year, their ad_history
+rows and student_messages. The data is deterministic for a given seed.
+Rows are bulk-inserted with a plain connection; the schema's triggers
+still maintain the counters.
+
+Usage:
+    python -m benchmarks.dataset --ads 1000000
+    BENCHMARK_WORKDIR=/tmp/hhbot_1m python -m benchmarks.dataset --ads 1000000
+
+With BENCHMARK_WORKDIR set the database is kept for later benchmark runs.
+"""
+import argparse
+import json
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Must come first: points config at a throw-away database
+import benchmarks.common  # noqa: F401
+
+from config import DATABASE_PATH
+from data.languages import get_text
+from database.migrations import init_db
+
+BATCH = 10000
+
+# Share of ads per status (roughly a live bot: mostly published or gone)
+STATUS_WEIGHTS = {
+    'approved': 55,
+    'deleted': 12,
+    'rejected': 8,
+    'draft': 10,
+    'cancelled': 5,
+    'pending': 10,
+}
+
+TECHNOLOGIES = ["Python", "Django", "JavaScript", "React", "Flutter", "Java", "SQL", "Figma", "Go", "PHP"]
+NAMES = ["Aziz", "Dilnoza", "Jasur", "Malika", "Sardor", "Nodira", "Bekzod", "Gulnoza", "Otabek", "Shahzoda"]
+COMPANIES = ["Ustudy", "Tech Solutions", "Digital Group", "Smart Soft", "IT Park", "Uzum", "Click", "Payme"]
+DIRECTIONS = ["Frontend", "Backend", "Mobile", "Design", "Data Science"]
+
+
+def _dates(rng: random.Random, now: datetime) -> Tuple[str, str]:
+    created = now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+    updated = created + timedelta(seconds=rng.randrange(7 * 24 * 3600))
+    return created.isoformat(), min(updated, now).isoformat()
+
+
+def _ad_data(rng: random.Random, ad_type: str, category: str) -> Dict[str, Any]:
+    name = f"{rng.choice(NAMES)} {rng.randrange(1000)}"
+    if ad_type == 'graduate':
+        return {
+            'name': name,
+            'age': str(rng.randint(18, 35)),
+            'technologies': ", ".join(rng.sample(TECHNOLOGIES, 3)),
+            'contact': f"+99890{rng.randrange(10_000_000):07d}",
+            'region': rng.choice(get_text("regions")),
+            'price': f"{rng.randint(3, 30) * 100} $",
+            'profession': category,
+            'contact_time': "09:00 - 18:00",
+            'goal': "Tajriba orttirish va jamoada ishlash",
+        }
+    return {
+        'company': rng.choice(COMPANIES),
+        'name': name,
+        'age': f"{rng.randint(18, 25)}-{rng.randint(26, 40)}",
+        'category': category,
+        'gender': rng.choice(["Erkak", "Ayol", "Farqi yo'q"]),
+        'experience': f"{rng.randint(0, 5)} yil",
+        'work_days': "Dushanba - Juma",
+        'work_hours': "09:00 - 18:00",
+        'location': rng.choice(get_text("regions")),
+        'salary': f"{rng.randint(3, 30) * 100} $",
+        'requirements': ", ".join(rng.sample(TECHNOLOGIES, 4)),
+    }
+
+
+def _batches(rows: Iterator[tuple], size: int = BATCH) -> Iterator[List[tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate(
+    ads: int,
+    users: int = 0,
+    history_per_ad: float = 2.0,
+    messages: int = 0,
+    seed: int = 1
+) -> Dict[str, Any]:
+    """Fill the scratch database; returns the row counts and timing
+
+    ``users`` defaults to one per three ads, ``messages`` to one student
+    message per ten ads.
+    """
+    init_db()
+    rng = random.Random(seed)
+    users = users or max(1, ads // 3)
+    messages = messages if messages else ads // 10
+    now = datetime.utcnow()
+    started = time.perf_counter()
+
+    conn = sqlite3.connect(DATABASE_PATH)
+    conn.execute('PRAGMA synchronous = OFF')
+    categories = conn.execute('SELECT id, name FROM categories ORDER BY id').fetchall()
+
+    # Users: 45% graduates, 35% employers, 20% students
+    first_user = 10_000_000
+    roles = []
+    for index in range(users):
+        roll = index % 20
+        roles.append('graduate' if roll < 9 else 'employer' if roll < 16 else 'student')
+    for batch in _batches(
+        (first_user + index, f"user{index}", role, rng.choice(("uz", "ru")), _dates(rng, now)[0])
+        for index, role in enumerate(roles)
+    ):
+        conn.executemany(
+            'INSERT OR IGNORE INTO users (user_id, username, role, language, created_at) VALUES (?, ?, ?, ?, ?)',
+            batch
+        )
+        conn.commit()
+
+    posters = [first_user + index for index, role in enumerate(roles) if role != 'student']
+    students = [first_user + index for index, role in enumerate(roles) if role == 'student'] or posters
+    admin_id = first_user
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+
+    def ad_rows() -> Iterator[tuple]:
+        for _ in range(ads):
+            user_id = rng.choice(posters)
+            ad_type = roles[user_id - first_user]
+            status = rng.choices(statuses, weights)[0]
+            category_id, category = rng.choice(categories)
+            created_at, updated_at = _dates(rng, now)
+            approved = status == 'approved'
+            has_file = ad_type == 'graduate' and rng.random() < 0.7
+            yield (
+                user_id, ad_type, status,
+                json.dumps(_ad_data(rng, ad_type, category), ensure_ascii=False),
+                f"BQACAgIAAxkBAAI{rng.randrange(10 ** 12)}" if has_file else None,
+                created_at, updated_at,
+                updated_at if approved else None, admin_id if approved else None,
+                category_id
+            )
+
+    ad_count = 0
+    history_count = 0
+    fields = ('name', 'age', 'price', 'salary', 'region', 'experience')
+    for batch in _batches(ad_rows()):
+        cursor = conn.executemany('''
+            INSERT INTO ads (user_id, ad_type, status, data, file_id, created_at, updated_at,
+                             approved_at, approved_by, category_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', batch)
+        last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+        first_id = last_id - len(batch) + 1
+
+        history = []
+        for offset, row in enumerate(batch):
+            ad_id = first_id + offset
+            user_id, data, created_at = row[0], row[3], row[5]
+            history.append((ad_id, 'created', None, data, None, None, None, user_id, created_at))
+            for _ in range(rng.randint(0, int(history_per_ad * 2))):
+                field = rng.choice(fields)
+                history.append((ad_id, 'field_updated', None, None, field, "eski", "yangi", user_id, row[6]))
+        conn.executemany('''
+            INSERT INTO ad_history (ad_id, action, old_data, new_data, field_name, old_value,
+                                    new_value, changed_by, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', history)
+        conn.commit()
+        ad_count += cursor.rowcount
+        history_count += len(history)
+
+    for batch in _batches(
+        (
+            rng.choice(students), rng.randrange(1, 10 ** 6), 100_000 + index, rng.choice(NAMES),
+            rng.choice(DIRECTIONS), f"{rng.randint(1, 60)}-guruh", rng.choice(("question", "complaint")),
+            "Dars jadvali haqida savolim bor", _dates(rng, now)[0]
+        )
+        for index in range(messages)
+    ):
+        conn.executemany('''
+            INSERT INTO student_messages (user_id, message_id, group_message_id, name, direction,
+                                          group_number, message_type, message_text, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', batch)
+        conn.commit()
+
+    conn.close()
+    return {
+        'users': users,
+        'ads': ad_count,
+        'ad_history': history_count,
+        'student_messages': messages,
+        'seconds': round(time.perf_counter() - started, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ads", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=0, help="default: ads / 3")
+    parser.add_argument("--history", type=float, default=2.0, help="average field edits per ad")
+    parser.add_argument("--messages", type=int, default=0, help="default: ads / 10")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    result = generate(args.ads, args.users, args.history, args.messages, args.seed)
+    result['database'] = DATABASE_PATH
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Repository and rendering benchmark suite
+
+Times the hot operations against a generated dataset (see
+benchmarks.dataset): the ad and user repository calls behind the main
+screens, ad text formatting and the keyboard builders. Each operation
+runs with random arguments drawn from the dataset until it reaches
+``--iterations`` or its ``--budget`` seconds. Results are JSON, so two
+runs (e.g. before and after a change) can be compared with ``--compare``.
+
+Usage:
+    python -m benchmarks.hot_paths --ads 100000
+    BENCHMARK_WORKDIR=/tmp/hhbot_1m python -m benchmarks.hot_paths --output after.json --compare before.json
+
+An existing dataset in BENCHMARK_WORKDIR is reused; otherwise ``--ads``
+ads are generated first.
+"""
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Must come first: points config at a throw-away database
+import benchmarks.common  # noqa: F401
+
+from benchmarks.dataset import generate
+from config import DATABASE_PATH, DB_PROFILING, STATS_MODE, DB_CACHE_SIZE_KB
+from database.connection import get_db_connection
+from database.migrations import init_db
+from keyboards.admin_keyboards import pending_ads_list_keyboard
+from keyboards.employer_keyboards import ad_actions_keyboard_employer, browse_categories_keyboard
+from keyboards.graduate_keyboards import ad_actions_keyboard_graduate, my_ads_keyboard
+from repositories.ad_repository import AdRepository
+from repositories.user_repository import UserRepository
+from utils.text_formatters import format_ad_text
+
+STATUSES = ('draft', 'pending', 'approved', 'rejected', 'cancelled')
+
+
+def measure(func: Callable[[], Any], iterations: int, budget: float, warmup: int = 3) -> Dict[str, Any]:
+    """Call ``func`` repeatedly and summarize the per-call times"""
+    for _ in range(warmup):
+        func()
+    times: List[float] = []
+    deadline = time.perf_counter() + budget
+    while len(times) < iterations and (not times or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    times.sort()
+    return {
+        'iterations': len(times),
+        'mean_ms': round(statistics.fmean(times) * 1000, 4),
+        'p50_ms': round(times[len(times) // 2] * 1000, 4),
+        'p95_ms': round(times[int(len(times) * 0.95)] * 1000, 4),
+        'min_ms': round(times[0] * 1000, 4),
+        'max_ms': round(times[-1] * 1000, 4),
+        'ops_per_second': round(len(times) / sum(times), 1),
+    }
+
+
+def dataset_counts() -> Dict[str, int]:
+    with get_db_connection() as conn:
+        return {
+            table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+            for table in ('users', 'ads', 'ad_history', 'student_messages')
+        }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_cases(rng: random.Random) -> Dict[str, Callable[[], Any]]:
+    """Benchmarked operations, each drawing its own random arguments"""
+    ad_repo = AdRepository()
+    user_repo = UserRepository()
+
+    with get_db_connection() as conn:
+        posters = [row[0] for row in conn.execute(
+            "SELECT user_id FROM users WHERE role IN ('graduate', 'employer') LIMIT 50000"
+        )]
+        ad_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM ads WHERE status != 'deleted' ORDER BY random() LIMIT 50000"
+        )]
+        category_ids = [row[0] for row in conn.execute('SELECT id FROM categories')]
+        samples = conn.execute(
+            "SELECT id, user_id, ad_type, status, data, file_id, file_path, created_at, "
+            "updated_at, approved_at, approved_by FROM ads ORDER BY random() LIMIT 200"
+        ).fetchall()
+    graduate_ads = [json.loads(ad[4]) for ad in samples if ad[2] == 'graduate']
+    employer_ads = [json.loads(ad[4]) for ad in samples if ad[2] == 'employer']
+    pending_page = [
+        {'ad_id': ad[0], 'title': json.loads(ad[4]).get('name', 'Nomsiz'), 'ad_type': ad[2], 'has_file': bool(ad[5])}
+        for ad in samples[:20]
+    ]
+    new_user_ids = iter(range(900_000_000, 2_000_000_000))
+
+    def update_field() -> None:
+        ad_repo.update_field(rng.choice(ad_ids), 'price', 'eski', f"{rng.randint(3, 30) * 100} $", rng.choice(posters))
+
+    return {
+        'AdRepository.get_pending': ad_repo.get_pending,
+        'AdRepository.get_pending(graduate)': lambda: ad_repo.get_pending('graduate'),
+        'AdRepository.get_by_user_id': lambda: ad_repo.get_by_user_id(rng.choice(posters)),
+        'AdRepository.get_approved_by_category': lambda: ad_repo.get_approved_by_category(rng.choice(category_ids)),
+        'AdRepository.get_stats': ad_repo.get_stats,
+        'AdRepository.update_field': update_field,
+        'UserRepository.create_or_update(existing)': lambda: user_repo.create_or_update(
+            rng.choice(posters), f"user{rng.randrange(10 ** 6)}"
+        ),
+        'UserRepository.create_or_update(new)': lambda: user_repo.create_or_update(
+            next(new_user_ids), "new_user", "graduate", "uz"
+        ),
+        'format_ad_text(graduate)': lambda: format_ad_text(rng.choice(graduate_ads), 'graduate', 'uz'),
+        'format_ad_text(employer)': lambda: format_ad_text(rng.choice(employer_ads), 'employer', 'ru'),
+        'my_ads_keyboard': lambda: my_ads_keyboard(samples[:10], 'uz', True, True),
+        'pending_ads_list_keyboard': lambda: pending_ads_list_keyboard(pending_page, True, True),
+        'ad_actions_keyboard_graduate': lambda: ad_actions_keyboard_graduate(
+            rng.randrange(10 ** 6), rng.choice(STATUSES), 'uz'
+        ),
+        'ad_actions_keyboard_employer': lambda: ad_actions_keyboard_employer(
+            rng.randrange(10 ** 6), rng.choice(STATUSES), 'ru'
+        ),
+        'browse_categories_keyboard': browse_categories_keyboard,
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline_path: str) -> None:
+    """Add the baseline p50 and the relative change to every result"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and before['p50_ms']:
+            result['baseline_p50_ms'] = before['p50_ms']
+            result['p50_change'] = round(result['p50_ms'] / before['p50_ms'] - 1, 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ads", type=int, default=100000, help="ads to generate if the database is empty")
+    parser.add_argument("--iterations", type=int, default=200, help="calls per operation (at most)")
+    parser.add_argument("--budget", type=float, default=5.0, help="seconds per operation (at most)")
+    parser.add_argument("--only", nargs="+", help="run operations whose name contains one of these")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON output to compare against")
+    args = parser.parse_args()
+
+    init_db()
+    dataset = None
+    if not dataset_counts()['ads']:
+        dataset = generate(args.ads, seed=args.seed)
+
+    rng = random.Random(args.seed)
+    cases = build_cases(rng)
+    if args.only:
+        cases = {name: func for name, func in cases.items() if any(part in name for part in args.only)}
+
+    results = {}
+    for name, func in cases.items():
+        results[name] = measure(func, args.iterations, args.budget)
+
+    if args.compare:
+        compare(results, args.compare)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'database': DATABASE_PATH,
+            'generated': dataset,
+            'dataset': dataset_counts(),
+            'settings': {
+                'DB_PROFILING': DB_PROFILING,
+                'STATS_MODE': STATS_MODE,
+                'DB_CACHE_SIZE_KB': DB_CACHE_SIZE_KB,
+            },
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
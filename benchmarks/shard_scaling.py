@@ -0,0 +1,94 @@
+"""Worker sharding scaling benchmark
+
+Runs the supervisor with 1, 2, 4, ... worker processes and pushes the
+same batch of synthetic updates through it, then reports the throughput
+and the speed-up over one worker. Updates are routed exactly as in
+production (by user id); Telegram is stubbed out and background jobs are
+disabled, so the numbers reflect update handling only (aiogram, handlers,
+SQLite). Writes from all workers still share one SQLite database.
+
+Usage:
+    python -m benchmarks.shard_scaling --workers 1 2 4 --count 20000
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+# Must come first: points config at a throw-away database
+from benchmarks.common import local_bot, synthetic_updates
+
+from app.supervisor import Supervisor
+from database.migrations import init_db
+
+
+def wait_processed(supervisor: Supervisor, total: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while sum(supervisor.processed) < total:
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def route_all(supervisor: Supervisor, updates: List[Dict[str, Any]]) -> None:
+    for update in updates:
+        while not supervisor.route(update):
+            time.sleep(0.001)
+
+
+def measure(workers: int, updates: List[Dict[str, Any]], warmup: List[Dict[str, Any]], timeout: float) -> Dict[str, Any]:
+    supervisor = Supervisor(workers, background_jobs=False, bot_factory=local_bot)
+    supervisor.start()
+    try:
+        # Process start-up and first-use caches are not part of the measurement
+        route_all(supervisor, warmup)
+        if not wait_processed(supervisor, len(warmup), timeout):
+            raise RuntimeError("warm-up timed out")
+        baseline = sum(supervisor.processed)
+
+        started = time.perf_counter()
+        route_all(supervisor, updates)
+        completed = wait_processed(supervisor, baseline + len(updates), timeout)
+        elapsed = time.perf_counter() - started
+        per_worker = [count for count in supervisor.processed]
+    finally:
+        supervisor.stop()
+
+    return {
+        "workers": workers,
+        "completed": completed,
+        "seconds": round(elapsed, 3),
+        "updates_per_second": round(len(updates) / elapsed, 1),
+        "per_worker": per_worker,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--count", type=int, default=10000, help="updates per run")
+    parser.add_argument("--users", type=int, default=1000, help="distinct synthetic users")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    init_db()
+    warmup = synthetic_updates(args.users, args.users)
+    updates = synthetic_updates(args.count, args.users)
+
+    results = [measure(workers, updates, warmup, args.timeout) for workers in args.workers]
+    base = results[0]["updates_per_second"]
+    for result in results:
+        result["speedup"] = round(result["updates_per_second"] / base, 2)
+
+    print(json.dumps({
+        "cpu_count": os.cpu_count(),
+        "updates": args.count,
+        "users": args.users,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Webhook load test
+
+Starts the webhook server on localhost with the real routers and posts
+updates to it, then reports how many requests per second the endpoint
+accepted and how long the handlers took to drain.
+
+Telegram is replaced by a local session that answers every API call
+immediately, so the numbers measure this process (HTTP, aiogram, handlers,
+SQLite) rather than the network or Telegram's rate limits.
+
+Usage:
+    python -m benchmarks.webhook_load --count 5000 --concurrency 50
+    python -m benchmarks.webhook_load --updates recorded_updates.jsonl
+
+Recorded updates are one JSON update per line (as received by the bot).
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+# Must come first: points config at a throw-away database
+from benchmarks.common import local_bot, synthetic_updates, load_updates
+
+from aiohttp import ClientSession, web
+
+from app.bot import create_dispatcher, include_routers
+from app.webhook import create_web_app
+from config import WEBHOOK_PATH
+from database.migrations import init_db
+
+SECRET = "load-test-secret"
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    init_db()
+    updates = load_updates(args.updates) if args.updates else synthetic_updates(args.count, args.users)
+
+    bot = local_bot()
+    dp = create_dispatcher()
+    include_routers(dp)
+
+    app = create_web_app(bot, dp, SECRET)
+    handler = app["webhook_handler"]
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+    url = f"http://127.0.0.1:{args.port}{WEBHOOK_PATH}"
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for update in updates:
+        queue.put_nowait(update)
+    statuses: Dict[int, int] = {}
+    latencies: List[float] = []
+
+    async def client(session: ClientSession) -> None:
+        while not queue.empty():
+            update = queue.get_nowait()
+            sent_at = time.perf_counter()
+            async with session.post(
+                url, json=update, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}
+            ) as resp:
+                await resp.read()
+                statuses[resp.status] = statuses.get(resp.status, 0) + 1
+            latencies.append(time.perf_counter() - sent_at)
+
+    async with ClientSession() as session:
+        # Requests without the secret must be refused
+        async with session.post(url, json=updates[0]) as resp:
+            unauthorized_status = resp.status
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(args.concurrency)))
+        accepted_in = time.perf_counter() - started
+
+        await handler.drain()
+        drained_in = time.perf_counter() - started
+
+        async with session.get(f"http://127.0.0.1:{args.port}/health") as resp:
+            health = await resp.json()
+
+    await runner.cleanup()
+    await bot.session.close()
+
+    latencies.sort()
+    return {
+        "updates": len(updates),
+        "concurrency": args.concurrency,
+        "unauthorized_status": unauthorized_status,
+        "statuses": statuses,
+        "accept_rps": round(len(updates) / accepted_in, 1),
+        "processed_rps": round(len(updates) / drained_in, 1),
+        "latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "latency_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+        "health": health,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", help="recorded updates, one JSON object per line")
+    parser.add_argument("--count", type=int, default=2000, help="synthetic updates to post")
+    parser.add_argument("--users", type=int, default=200, help="distinct synthetic users")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
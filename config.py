@@ -16,4 +16,84 @@ RESUME_FOLDER = os.getenv("RESUME_FOLDER", "files/resumes/")
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", "10485760"))
 ALLOWED_FILE_FORMATS = [x.strip() for x in os.getenv("ALLOWED_FILE_FORMATS", ".pdf,.doc,.docx,.txt").split(",")]
 FILE_CLEANUP_HOURS = int(os.getenv("FILE_CLEANUP_HOURS", "24"))  # Fayllar necha soatdan keyin o'chilsin
-CLEANUP_INTERVAL_HOURS = int(os.getenv("CLEANUP_INTERVAL_HOURS", "6"))  # Necha soatda bir cleanup ishlaydi
\ No newline at end of file
+CLEANUP_INTERVAL_HOURS = int(os.getenv("CLEANUP_INTERVAL_HOURS", "6"))  # Necha soatda bir cleanup ishlaydi
+RESUME_QUOTA_BYTES = int(os.getenv("RESUME_QUOTA_BYTES", "0"))  # Resumelar uchun disk limiti, 0 = cheklanmagan
+FILE_CLEANUP_BATCH = int(os.getenv("FILE_CLEANUP_BATCH", "500"))  # Bir tranzaksiyada o'chiriladigan fayllar
+
+# SQLite connection settings
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", "134217728"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+DB_PROFILING = os.getenv("DB_PROFILING", "true").lower() in ("1", "true", "yes")  # SQL statistikasi
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))  # sekin so'rovlar logga yoziladi
+
+# Async database access
+DB_EXECUTOR_ENABLED = os.getenv("DB_EXECUTOR_ENABLED", "true").lower() in ("1", "true", "yes")
+DB_WORKER_THREADS = int(os.getenv("DB_WORKER_THREADS", "2"))
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.5"))  # 0 - o'chirilgan
+
+# Admin statistics: 'counters' (trigger-maintained) yoki 'scan' (GROUP BY)
+STATS_MODE = os.getenv("STATS_MODE", "counters")
+
+# Per-update user context cache
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))  # soniya
+
+# Outbound Telegram send scheduler
+SEND_GLOBAL_RATE = float(os.getenv("SEND_GLOBAL_RATE", "30"))  # xabar/soniya, butun bot
+SEND_CHAT_RATE = float(os.getenv("SEND_CHAT_RATE", "1"))  # xabar/soniya, shaxsiy chat
+SEND_CHAT_BURST = int(os.getenv("SEND_CHAT_BURST", "3"))
+SEND_GROUP_RATE = float(os.getenv("SEND_GROUP_RATE", "0.33"))  # ~20 xabar/daqiqa, guruh/kanal
+SEND_GROUP_BURST = int(os.getenv("SEND_GROUP_BURST", "5"))
+SEND_MAX_RETRIES = int(os.getenv("SEND_MAX_RETRIES", "3"))
+
+# Outbox (kanal postlari va foydalanuvchi xabarnomalari)
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "30"))  # soniya
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_MAX_BACKOFF = int(os.getenv("OUTBOX_MAX_BACKOFF", "3600"))  # soniya
+
+# Admin broadcast
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "20"))  # xabar/soniya (global limitdan kam)
+BROADCAST_BATCH_SIZE = int(os.getenv("BROADCAST_BATCH_SIZE", "50"))
+BROADCAST_PROGRESS_INTERVAL = float(os.getenv("BROADCAST_PROGRESS_INTERVAL", "5"))  # soniya
+
+# ad_history: har N ta tahrirdan keyin to'liq snapshot saqlanadi
+HISTORY_SNAPSHOT_INTERVAL = int(os.getenv("HISTORY_SNAPSHOT_INTERVAL", "10"))
+HISTORY_COMPACTION_INTERVAL_HOURS = int(os.getenv("HISTORY_COMPACTION_INTERVAL_HOURS", "24"))
+HISTORY_COMPACTION_BATCH = int(os.getenv("HISTORY_COMPACTION_BATCH", "200"))  # e'lon/tranzaksiya
+
+# Resume store: havola qolmagan fayl shu vaqtdan keyin o'chiriladi
+RESUME_STORE_GRACE_SECONDS = int(os.getenv("RESUME_STORE_GRACE_SECONDS", "600"))  # soniya
+
+# Fayl yuklab olish
+DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", "4"))  # bir vaqtda
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", "65536"))  # bayt
+DOWNLOAD_WRITE_BUFFER = int(os.getenv("DOWNLOAD_WRITE_BUFFER", "1048576"))  # bayt, diskka yozishdan oldin
+DOWNLOAD_TIMEOUT = int(os.getenv("DOWNLOAD_TIMEOUT", "60"))  # soniya
+
+# Ishga tushirish rejimi: "polling" yoki "webhook"
+RUN_MODE = os.getenv("RUN_MODE", "polling").lower()
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")  # masalan https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # X-Telegram-Bot-Api-Secret-Token, webhook rejimida majburiy
+WEB_SERVER_HOST = os.getenv("WEB_SERVER_HOST", "0.0.0.0")
+WEB_SERVER_PORT = int(os.getenv("WEB_SERVER_PORT", "8080"))
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "30"))  # soniya
+
+# Supervisor: bir nechta worker jarayonlari (1 = bitta jarayon)
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "1"))
+WORKER_QUEUE_SIZE = int(os.getenv("WORKER_QUEUE_SIZE", "10000"))  # har bir worker navbati
+CATALOG_REVALIDATE_SECONDS = float(os.getenv("CATALOG_REVALIDATE_SECONDS", "5"))  # soniya
+
+# FSM holati (suhbat bosqichlari): "sqlite" yoki "memory"
+FSM_STORAGE = os.getenv("FSM_STORAGE", "sqlite").lower()
+FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL", "2"))  # soniya
+FSM_FLUSH_BATCH = int(os.getenv("FSM_FLUSH_BATCH", "200"))  # shuncha o'zgarishda darhol yoziladi
+FSM_CACHE_IDLE_SECONDS = int(os.getenv("FSM_CACHE_IDLE_SECONDS", "900"))  # xotirada saqlash, soniya
+FSM_TTL_HOURS = int(os.getenv("FSM_TTL_HOURS", "72"))  # tashlab ketilgan suhbatlar o'chiriladi
+
+# Handler metrikalari (Prometheus text format)
+METRICS_FILE = os.getenv("METRICS_FILE", "logs/metrics.prom")  # bo'sh - yozilmaydi
+METRICS_EXPORT_SECONDS = float(os.getenv("METRICS_EXPORT_SECONDS", "60"))  # soniya
@@ -1,4 +1,8 @@
 # languages.py
+import importlib
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, Mapping, Optional, Set
+
 LANGUAGES = {
     "uz": "🇺🇿 O'zbek",
     "ru": "🇷🇺 Русский"
@@ -245,7 +249,93 @@ ru = {
     "label_message": "Текст"
 }
 
+
+# ---------------------------------------------------------------------------
+# Compiled catalog
+#
+# Each language is compiled on first use into an immutable table (lists
+# become tuples). Languages other than the built-in uz/ru are loaded lazily
+# from ``data/locales/<code>.py`` modules exposing a ``TEXTS`` dict; missing
+# keys fall back to the Russian table. Unknown language codes use Russian,
+# as before.
+# ---------------------------------------------------------------------------
+
+FALLBACK_LANGUAGE = "ru"
+
+_BUILTIN = {"uz": uz, "ru": ru}
+_tables: Dict[str, Mapping[str, Any]] = {}
+_reverse_index: Optional[Dict[str, FrozenSet[str]]] = None
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def _load_source(language: str) -> Optional[dict]:
+    """Get the raw text dict of a language (None if there is none)"""
+    if language in _BUILTIN:
+        return _BUILTIN[language]
+    if not language.isidentifier():
+        return None
+    try:
+        module = importlib.import_module(f"data.locales.{language}")
+    except ImportError:
+        return None
+    return getattr(module, "TEXTS", None)
+
+
+def _table(language: str) -> Mapping[str, Any]:
+    """Get the compiled table of a language"""
+    table = _tables.get(language)
+    if table is None:
+        source = _load_source(language)
+        if source is None:
+            table = _table(FALLBACK_LANGUAGE) if language != FALLBACK_LANGUAGE else MappingProxyType({})
+        else:
+            compiled = {}
+            if language != FALLBACK_LANGUAGE:
+                compiled.update(_table(FALLBACK_LANGUAGE))
+            compiled.update((key, _freeze(value)) for key, value in source.items())
+            table = MappingProxyType(compiled)
+        _tables[language] = table
+    return table
+
+
 def get_text(key: str, language: str = "uz"):
     """Get text by key and language"""
-    texts = uz if language == "uz" else ru
-    return texts.get(key, key)
\ No newline at end of file
+    return _table(language).get(key, key)
+
+
+def text_keys(text: str) -> FrozenSet[str]:
+    """Get the keys whose text equals ``text`` in any offered language
+
+    Used by message filters to tell which menu button was pressed with a
+    single dict lookup.
+    """
+    global _reverse_index
+    if _reverse_index is None:
+        index: Dict[str, Set[str]] = {}
+        for language in LANGUAGES:
+            for key, value in _table(language).items():
+                if isinstance(value, str):
+                    index.setdefault(value, set()).add(key)
+        _reverse_index = {value: frozenset(keys) for value, keys in index.items()}
+    return _reverse_index.get(text, frozenset())
+
+
+def button_matcher(*keys: str, prefix: str = "") -> Callable[[Optional[str]], bool]:
+    """Build a predicate matching the localized text of any of ``keys``
+
+    ``prefix`` is the decoration prepended to the text on the button,
+    e.g. ``"🎓 "`` in the graduate main menu.
+    """
+    wanted = frozenset(keys)
+
+    def match(text: Optional[str]) -> bool:
+        if not text or not text.startswith(prefix):
+            return False
+        return not wanted.isdisjoint(text_keys(text[len(prefix):]))
+
+    return match
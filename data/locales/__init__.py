@@ -0,0 +1,7 @@
+"""Additional languages
+
+Each ``<code>.py`` module here defines ``TEXTS = {...}`` with the same keys
+as ``data.languages.uz``; it is imported the first time the language is
+used. Add the code to ``data.languages.LANGUAGES`` to offer it in the
+language keyboard.
+"""
@@ -1,24 +1,114 @@
-"""Database connection management"""
+"""Database connection management
+
+Each thread keeps one long-lived SQLite connection that is opened and
+configured once (WAL journal, synchronous=NORMAL, busy timeout, cache and
+mmap sizes). ``get_db_connection()`` hands out that connection instead of
+opening a new file handle for every query.
+"""
 import sqlite3
+import threading
 from contextlib import contextmanager
-from typing import Generator
-from config import DATABASE_PATH
+from typing import Generator, List
+from config import (
+    DATABASE_PATH, DB_BUSY_TIMEOUT_MS, DB_CACHE_SIZE_KB,
+    DB_MMAP_SIZE, DB_STATEMENT_CACHE_SIZE, DB_PROFILING
+)
+from database.profiling import ProfilingConnection
+
+_local = threading.local()
+_connections: List[sqlite3.Connection] = []
+_connections_lock = threading.Lock()
+
+
+def _configure_connection(conn: sqlite3.Connection) -> None:
+    """Apply connection-level PRAGMAs"""
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute(f'PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT_MS)}')
+    # Negative cache_size is interpreted by SQLite as KiB
+    conn.execute(f'PRAGMA cache_size = -{int(DB_CACHE_SIZE_KB)}')
+    conn.execute(f'PRAGMA mmap_size = {int(DB_MMAP_SIZE)}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+
+
+def _open_connection() -> sqlite3.Connection:
+    """Open and configure a new connection for the current thread"""
+    # A connection is only used by the thread that opened it; disabling the
+    # same-thread check lets close_all_connections() close executor threads'
+    # connections on shutdown.
+    conn = sqlite3.connect(
+        DATABASE_PATH,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=DB_STATEMENT_CACHE_SIZE,
+        check_same_thread=False,
+        # Per-statement timings and the slow-query log (database.profiling)
+        factory=ProfilingConnection if DB_PROFILING else sqlite3.Connection
+    )
+    _configure_connection(conn)
+    with _connections_lock:
+        _connections.append(conn)
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """Get the shared connection of the current thread (opened lazily)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = _open_connection()
+        _local.conn = conn
+        _local.depth = 0
+    return conn
 
 
 @contextmanager
 def get_db_connection() -> Generator[sqlite3.Connection, None, None]:
-    """Database connection context manager"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    """Database connection context manager
+
+    Nested blocks share the outer transaction: only the outermost block
+    commits or rolls back.
+    """
+    conn = get_connection()
+    _local.depth += 1
     try:
         yield conn
-        conn.commit()
+        if _local.depth == 1:
+            conn.commit()
     except Exception:
-        conn.rollback()
+        if _local.depth == 1:
+            conn.rollback()
         raise
     finally:
-        conn.close()
+        _local.depth -= 1
 
 
+@contextmanager
+def read_transaction() -> Generator[sqlite3.Connection, None, None]:
+    """Run several reads against one consistent snapshot
+
+    Repository calls made inside the block share a single deferred
+    transaction, so e.g. statistics queries see the same data.
+    """
+    with get_db_connection() as conn:
+        if not conn.in_transaction:
+            conn.execute('BEGIN')
+        yield conn
+
+
+@contextmanager
+def write_transaction() -> Generator[sqlite3.Connection, None, None]:
+    """Run a read-modify-write sequence atomically
+
+    Takes the write lock up front (BEGIN IMMEDIATE), so a row checked at
+    the start of the block cannot be changed by another writer before the
+    block commits.
+    """
+    with get_db_connection() as conn:
+        if not conn.in_transaction:
+            conn.execute('BEGIN IMMEDIATE')
+        yield conn
+
+
+@contextmanager
 def get_db_cursor() -> Generator[sqlite3.Cursor, None, None]:
     """Database cursor context manager"""
     with get_db_connection() as conn:
@@ -28,3 +118,12 @@ def get_db_cursor() -> Generator[sqlite3.Cursor, None, None]:
         finally:
             cursor.close()
 
+
+def close_all_connections() -> None:
+    """Close every connection opened by this process (used on shutdown)"""
+    with _connections_lock:
+        connections = list(_connections)
+        _connections.clear()
+    for conn in connections:
+        conn.close()
+    _local.conn = None
@@ -1,11 +1,10 @@
 # database/db.py
-import sqlite3
 import json
 from datetime import datetime
-from config import DATABASE_PATH
+from database.connection import get_connection
 
 def init_db():
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
 
     # Users table
@@ -95,11 +94,10 @@ def init_db():
         ''', (category, datetime.utcnow().isoformat()))
 
     conn.commit()
-    conn.close()
 
 def add_user(user_id: int, username: str, role: str = None, language: str = None):
     """Foydalanuvchi qo'shish yoki yangilash"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute('SELECT user_id FROM users WHERE user_id = ?', (user_id,))
@@ -118,11 +116,10 @@ def add_user(user_id: int, username: str, role: str = None, language: str = None
         ''', (user_id, username, role, language or 'uz', datetime.utcnow().isoformat()))
     
     conn.commit()
-    conn.close()
 
 def add_ad(user_id: int, ad_type: str, data: dict, file_id: str = None, file_path: str = None, status: str = "draft"):
     """E'lon qo'shish"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     
     now = datetime.utcnow().isoformat()
@@ -141,19 +138,17 @@ def add_ad(user_id: int, ad_type: str, data: dict, file_id: str = None, file_pat
     ''', (ad_id, json.dumps(data, ensure_ascii=False), user_id, now))
     
     conn.commit()
-    conn.close()
     return ad_id
 
 def update_ad_status(ad_id: int, status: str, approved_by: int = None):
     """E'lon statusini yangilash"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     
     # Avvalgi statusni olish
     cursor.execute('SELECT status FROM ads WHERE id = ?', (ad_id,))
     result = cursor.fetchone()
     if not result:
-        conn.close()
         return False
     
     old_status = result[0]
@@ -177,19 +172,17 @@ def update_ad_status(ad_id: int, status: str, approved_by: int = None):
     ''', (ad_id, old_status, status, approved_by or 0, now))
     
     conn.commit()
-    conn.close()
     return True
 
 def update_ad_data(ad_id: int, new_data: dict, new_file_id: str = None, new_file_path: str = None):
     """E'lon ma'lumotlarini yangilash"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
 
     # Avvalgi ma'lumotlarni olish
     cursor.execute('SELECT data, file_id FROM ads WHERE id = ?', (ad_id,))
     result = cursor.fetchone()
     if not result:
-        conn.close()
         return False
 
     old_data_json, old_file_id = result
@@ -218,19 +211,17 @@ def update_ad_data(ad_id: int, new_data: dict, new_file_id: str = None, new_file
     ''', (ad_id, old_data_json, json.dumps(new_data, ensure_ascii=False), 0, now))
 
     conn.commit()
-    conn.close()
     return True
 
 def update_ad_field(ad_id: int, field_name: str, old_value: str, new_value: str, changed_by: int):
     """E'lonning bitta maydonini yangilash"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     
     # Hozirgi ma'lumotlarni olish
     cursor.execute('SELECT data FROM ads WHERE id = ?', (ad_id,))
     result = cursor.fetchone()
     if not result:
-        conn.close()
         return False
     
     ad_data = json.loads(result[0])
@@ -250,43 +241,39 @@ def update_ad_field(ad_id: int, field_name: str, old_value: str, new_value: str,
     ''', (ad_id, field_name, old_value, new_value, changed_by, now))
     
     conn.commit()
-    conn.close()
     return True
 
 def get_user(user_id: int):
     """Foydalanuvchi ma'lumotlarini olish"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('SELECT * FROM users WHERE user_id = ?', (user_id,))
     user = cursor.fetchone()
-    conn.close()
     return user
 
 def get_ad(ad_id: int):
     """E'lon ma'lumotlarini olish"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('SELECT * FROM ads WHERE id = ?', (ad_id,))
     ad = cursor.fetchone()
-    conn.close()
     return ad
 
 def get_user_ads(user_id: int):
     """Foydalanuvchi e'lonlarini olish - DELETED statusni yashirish"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('''
         SELECT * FROM ads WHERE user_id = ? AND status != 'deleted'
         ORDER BY created_at DESC
     ''', (user_id,))
     ads = cursor.fetchall()
-    conn.close()
     return ads
 
 
 def get_pending_ads(ad_type: str = None):
     """Kutilayotgan e'lonlarni olish"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     
     if ad_type:
@@ -301,43 +288,39 @@ def get_pending_ads(ad_type: str = None):
         ''')
     
     ads = cursor.fetchall()
-    conn.close()
     return ads
 
 def get_categories():
     """Kategoriyalarni olish"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('SELECT id, name FROM categories ORDER BY name')
     categories = cursor.fetchall()
-    conn.close()
     return categories
 
 def add_category(name: str):
     """Yangi kategoriya qo'shish"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('''
         INSERT INTO categories (name, created_at) VALUES (?, ?)
     ''', (name, datetime.utcnow().isoformat()))
     conn.commit()
-    conn.close()
 
 def get_ad_history(ad_id: int):
     """E'lon tarixini olish"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('''
         SELECT * FROM ad_history WHERE ad_id = ? 
         ORDER BY created_at DESC
     ''', (ad_id,))
     history = cursor.fetchall()
-    conn.close()
     return history
 
 def get_user_stats():
     """Foydalanuvchi statistikasi"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute('SELECT COUNT(*) FROM users')
@@ -349,7 +332,6 @@ def get_user_stats():
     cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'employer'")
     employers = cursor.fetchone()[0]
     
-    conn.close()
     return {
         'total': total,
         'graduates': graduates,
@@ -360,13 +342,12 @@ def get_approved_ads_by_category(category_name: str, limit: int = 20):
     """Kategoriya bo'yicha tasdiqlangan e'lonlarni olish (graduate va employer).
     Graduate uchun 'profession', employer uchun 'category' maydonlari bo'yicha filtrlanadi.
     """
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("""
         SELECT * FROM ads WHERE status = 'approved' ORDER BY approved_at DESC NULLS LAST, created_at DESC
     """)
     rows = cursor.fetchall()
-    conn.close()
 
     results = []
     for row in rows:
@@ -385,7 +366,7 @@ def get_approved_ads_by_category(category_name: str, limit: int = 20):
 
 def get_ad_stats():
     """E'lon statistikasi"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute('SELECT COUNT(*) FROM ads')
@@ -403,7 +384,6 @@ def get_ad_stats():
     cursor.execute("SELECT COUNT(*) FROM ads WHERE status = 'cancelled'")
     cancelled = cursor.fetchone()[0]
     
-    conn.close()
     return {
         'total': total,
         'approved': approved,
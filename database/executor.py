@@ -0,0 +1,94 @@
+"""Async access to the synchronous repository and service layer
+
+SQLite calls are blocking, so handlers run them on a small dedicated
+thread pool instead of the event loop. ``AsyncFacade`` wraps a repository
+or service and turns every method call into an awaitable.
+"""
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+from config import DB_EXECUTOR_ENABLED, DB_WORKER_THREADS
+from utils.metrics import add_db_time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Get (lazily create) the database executor"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=DB_WORKER_THREADS,
+            thread_name_prefix="db"
+        )
+    return _executor
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking database call without blocking the event loop
+
+    With DB_EXECUTOR_ENABLED=false the call runs inline, which is useful
+    to compare event loop lag before and after.
+    """
+    started = time.perf_counter()
+    try:
+        if not DB_EXECUTOR_ENABLED:
+            return func(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_db_executor(),
+            functools.partial(func, *args, **kwargs)
+        )
+    finally:
+        # Counted against the calling handler (utils.metrics)
+        add_db_time(time.perf_counter() - started)
+
+
+def nonblocking(func: Callable[..., T]) -> Callable[..., T]:
+    """Mark a method as safe to call directly on the event loop
+
+    ``AsyncFacade`` returns such methods unwrapped (e.g. in-memory lookups).
+    """
+    func.__db_nonblocking__ = True
+    return func
+
+
+class AsyncFacade:
+    """Awaitable view of a repository or service
+
+    Example:
+        ad_service = AsyncFacade(AdService())
+        ad = await ad_service.get_ad(ad_id)
+    """
+
+    def __init__(self, target: Any):
+        self._target = target
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr) or getattr(attr, "__db_nonblocking__", False):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await run_db(attr, *args, **kwargs)
+
+        # Cache the wrapper so subsequent lookups skip __getattr__
+        self.__dict__[name] = call
+        return call
+
+
+def shutdown_db_executor() -> None:
+    """Wait for pending database work and stop the executor"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+        logger.info("DB executor to'xtatildi")
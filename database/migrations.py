@@ -1,14 +1,20 @@
-"""Database migrations and initialization"""
+"""Database migrations and initialization
+
+Migrations are applied in order, each in its own transaction, and the
+applied versions are recorded in the ``schema_version`` table. When the
+database is already current, ``init_db()`` runs no DDL at all.
+"""
+import logging
 import sqlite3
 from datetime import datetime
-from config import DATABASE_PATH
+from typing import Callable, List, Tuple
+from database.connection import get_connection
 
+logger = logging.getLogger(__name__)
 
-def init_db():
-    """Initialize database with all tables"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
 
+def _create_base_tables(cursor: sqlite3.Cursor) -> None:
+    """Version 1: base tables and default categories"""
     # Users table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -95,6 +101,481 @@ def init_db():
             VALUES (?, ?)
         ''', (category, datetime.utcnow().isoformat()))
 
-    conn.commit()
-    conn.close()
+
+def _add_hot_path_indexes(cursor: sqlite3.Cursor) -> None:
+    """Version 2: indexes for the hot repository queries"""
+    # AdRepository.get_pending(ad_type)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ads_status_type_created
+        ON ads (status, ad_type, created_at)
+    ''')
+    # AdRepository.get_pending() without ad_type
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ads_pending_created
+        ON ads (created_at) WHERE status = 'pending'
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ads_user_id
+        ON ads (user_id)
+    ''')
+    # AdRepository.get_by_user_id: status != 'deleted' ORDER BY created_at
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ads_user_active
+        ON ads (user_id, created_at) WHERE status != 'deleted'
+    ''')
+    # FileRepository.register_legacy
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ads_file_path_active
+        ON ads (file_path) WHERE status != 'deleted' AND file_path IS NOT NULL
+    ''')
+    # AdRepository.get_history
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ad_history_ad_created
+        ON ad_history (ad_id, created_at)
+    ''')
+    # StudentRepository.get_by_group_message_id
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_student_messages_group_message
+        ON student_messages (group_message_id)
+    ''')
+
+
+def _add_ads_category_id(cursor: sqlite3.Cursor) -> None:
+    """Version 3: indexed ads.category_id for category browsing"""
+    cursor.execute('ALTER TABLE ads ADD COLUMN category_id INTEGER REFERENCES categories (id)')
+    
+    # Backfill from the category name stored in the ad JSON
+    # (employer -> 'category', graduate -> 'profession')
+    cursor.execute('''
+        UPDATE ads SET category_id = (
+            SELECT c.id FROM categories c
+            WHERE c.name = CASE
+                WHEN NOT json_valid(ads.data) THEN NULL
+                WHEN ads.ad_type = 'employer' THEN json_extract(ads.data, '$.category')
+                ELSE json_extract(ads.data, '$.profession')
+            END
+        )
+    ''')
+    
+    # AdRepository.get_approved_by_category
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ads_approved_category
+        ON ads (category_id, approved_at DESC, created_at DESC)
+        WHERE status = 'approved'
+    ''')
+
+
+def rebuild_counters(cursor: sqlite3.Cursor) -> None:
+    """Recompute all ads/users counters from the tables"""
+    cursor.execute("DELETE FROM counters WHERE name LIKE 'ads:%' OR name LIKE 'users:%'")
+    cursor.execute("INSERT INTO counters (name, value) SELECT 'ads:total', COUNT(*) FROM ads")
+    cursor.execute('''
+        INSERT INTO counters (name, value)
+        SELECT 'ads:status:' || COALESCE(status, ''), COUNT(*) FROM ads GROUP BY 1
+    ''')
+    cursor.execute('''
+        INSERT INTO counters (name, value)
+        SELECT 'ads:type:' || COALESCE(ad_type, ''), COUNT(*) FROM ads GROUP BY 1
+    ''')
+    cursor.execute("INSERT INTO counters (name, value) SELECT 'users:total', COUNT(*) FROM users")
+    cursor.execute('''
+        INSERT INTO counters (name, value)
+        SELECT 'users:role:' || COALESCE(role, ''), COUNT(*) FROM users GROUP BY 1
+    ''')
+
+
+def _add_stat_counters(cursor: sqlite3.Cursor) -> None:
+    """Version 4: trigger-maintained counters for admin statistics"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    
+    # Ads: total, per status, per ad_type
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ads_counters_insert AFTER INSERT ON ads
+        BEGIN
+            INSERT OR IGNORE INTO counters (name, value) VALUES
+                ('ads:total', 0),
+                ('ads:status:' || COALESCE(NEW.status, ''), 0),
+                ('ads:type:' || COALESCE(NEW.ad_type, ''), 0);
+            UPDATE counters SET value = value + 1 WHERE name IN (
+                'ads:total',
+                'ads:status:' || COALESCE(NEW.status, ''),
+                'ads:type:' || COALESCE(NEW.ad_type, '')
+            );
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ads_counters_delete AFTER DELETE ON ads
+        BEGIN
+            UPDATE counters SET value = value - 1 WHERE name IN (
+                'ads:total',
+                'ads:status:' || COALESCE(OLD.status, ''),
+                'ads:type:' || COALESCE(OLD.ad_type, '')
+            );
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ads_counters_status AFTER UPDATE OF status ON ads
+        WHEN OLD.status IS NOT NEW.status
+        BEGIN
+            INSERT OR IGNORE INTO counters (name, value)
+            VALUES ('ads:status:' || COALESCE(NEW.status, ''), 0);
+            UPDATE counters SET value = value - 1 WHERE name = 'ads:status:' || COALESCE(OLD.status, '');
+            UPDATE counters SET value = value + 1 WHERE name = 'ads:status:' || COALESCE(NEW.status, '');
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ads_counters_type AFTER UPDATE OF ad_type ON ads
+        WHEN OLD.ad_type IS NOT NEW.ad_type
+        BEGIN
+            INSERT OR IGNORE INTO counters (name, value)
+            VALUES ('ads:type:' || COALESCE(NEW.ad_type, ''), 0);
+            UPDATE counters SET value = value - 1 WHERE name = 'ads:type:' || COALESCE(OLD.ad_type, '');
+            UPDATE counters SET value = value + 1 WHERE name = 'ads:type:' || COALESCE(NEW.ad_type, '');
+        END
+    ''')
+    
+    # Users: total, per role
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_users_counters_insert AFTER INSERT ON users
+        BEGIN
+            INSERT OR IGNORE INTO counters (name, value) VALUES
+                ('users:total', 0),
+                ('users:role:' || COALESCE(NEW.role, ''), 0);
+            UPDATE counters SET value = value + 1 WHERE name IN (
+                'users:total',
+                'users:role:' || COALESCE(NEW.role, '')
+            );
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_users_counters_delete AFTER DELETE ON users
+        BEGIN
+            UPDATE counters SET value = value - 1 WHERE name IN (
+                'users:total',
+                'users:role:' || COALESCE(OLD.role, '')
+            );
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_users_counters_role AFTER UPDATE OF role ON users
+        WHEN OLD.role IS NOT NEW.role
+        BEGIN
+            INSERT OR IGNORE INTO counters (name, value)
+            VALUES ('users:role:' || COALESCE(NEW.role, ''), 0);
+            UPDATE counters SET value = value - 1 WHERE name = 'users:role:' || COALESCE(OLD.role, '');
+            UPDATE counters SET value = value + 1 WHERE name = 'users:role:' || COALESCE(NEW.role, '');
+        END
+    ''')
+    
+    rebuild_counters(cursor)
+
+
+def _add_outbox(cursor: sqlite3.Cursor) -> None:
+    """Version 5: transactional outbox for Telegram deliveries"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TEXT NOT NULL,
+            last_error TEXT,
+            created_at TEXT NOT NULL
+        )
+    ''')
+    
+    # OutboxRepository.get_due
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_outbox_pending_due
+        ON outbox (next_attempt_at, id)
+        WHERE status = 'pending'
+    ''')
+
+
+def _add_broadcasts(cursor: sqlite3.Cursor) -> None:
+    """Version 6: admin broadcasts with per-recipient progress"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT NOT NULL,
+            created_by INTEGER,
+            chat_id INTEGER,
+            progress_message_id INTEGER,
+            status TEXT NOT NULL DEFAULT 'running',
+            last_user_id INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            blocked INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT,
+            finished_at TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS broadcast_deliveries (
+            broadcast_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            error TEXT,
+            created_at TEXT,
+            PRIMARY KEY (broadcast_id, user_id)
+        ) WITHOUT ROWID
+    ''')
+    
+    # Users that blocked the bot or were deactivated; skipped by broadcasts
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS blocked_users (
+            user_id INTEGER PRIMARY KEY,
+            reason TEXT,
+            blocked_at TEXT
+        )
+    ''')
+
+
+def _add_history_diffs(cursor: sqlite3.Cursor) -> None:
+    """Version 7: field-level diffs in ad_history"""
+    cursor.execute('ALTER TABLE ad_history ADD COLUMN diff TEXT')
+    
+    # AdRepository.compact_history: legacy rows still holding full blobs
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ad_history_uncompacted
+        ON ad_history (ad_id) WHERE action = 'updated' AND old_data IS NOT NULL
+    ''')
+
+
+def _add_file_store(cursor: sqlite3.Cursor) -> None:
+    """Version 8: content-addressed resume store"""
+    # One row per stored content; refcount = live ads referencing the path
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS files (
+            sha256 TEXT PRIMARY KEY,
+            path TEXT NOT NULL UNIQUE,
+            size INTEGER NOT NULL,
+            refcount INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            accessed_at TEXT NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    # Telegram file_unique_id -> stored content
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS file_ids (
+            unique_id TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    
+    # FileRepository.delete_unreferenced
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_files_unreferenced
+        ON files (accessed_at) WHERE refcount <= 0
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_file_ids_sha256 ON file_ids (sha256)
+    ''')
+    
+    # Reference counts follow ads.file_path of non-deleted ads
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ads_files_insert AFTER INSERT ON ads
+        WHEN NEW.file_path IS NOT NULL AND NEW.status != 'deleted'
+        BEGIN
+            UPDATE files SET refcount = refcount + 1 WHERE path = NEW.file_path;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ads_files_update AFTER UPDATE OF file_path, status ON ads
+        WHEN OLD.file_path IS NOT NEW.file_path
+          OR (OLD.status = 'deleted') IS NOT (NEW.status = 'deleted')
+        BEGIN
+            UPDATE files SET refcount = refcount - 1
+            WHERE path = OLD.file_path AND OLD.status != 'deleted';
+            UPDATE files SET refcount = refcount + 1
+            WHERE path = NEW.file_path AND NEW.status != 'deleted';
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ads_files_delete AFTER DELETE ON ads
+        WHEN OLD.file_path IS NOT NULL AND OLD.status != 'deleted'
+        BEGIN
+            UPDATE files SET refcount = refcount - 1 WHERE path = OLD.file_path;
+        END
+    ''')
+
+
+def _add_file_metadata(cursor: sqlite3.Cursor) -> None:
+    """Version 9: file mtime and owning ad for SQL-driven cleanup"""
+    cursor.execute('ALTER TABLE files ADD COLUMN mtime TEXT')
+    cursor.execute('ALTER TABLE files ADD COLUMN ad_id INTEGER')
+    cursor.execute('UPDATE files SET mtime = created_at')
+    cursor.execute('''
+        UPDATE files SET ad_id = (
+            SELECT MAX(id) FROM ads
+            WHERE ads.file_path = files.path AND ads.status != 'deleted'
+        )
+    ''')
+    
+    # FileCleanupService.cleanup_old_files
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_mtime ON files (mtime)')
+    
+    # files.ad_id: the latest ad that attached the file
+    cursor.execute('DROP TRIGGER IF EXISTS trg_ads_files_insert')
+    cursor.execute('DROP TRIGGER IF EXISTS trg_ads_files_update')
+    cursor.execute('''
+        CREATE TRIGGER trg_ads_files_insert AFTER INSERT ON ads
+        WHEN NEW.file_path IS NOT NULL AND NEW.status != 'deleted'
+        BEGIN
+            UPDATE files SET refcount = refcount + 1, ad_id = NEW.id
+            WHERE path = NEW.file_path;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER trg_ads_files_update AFTER UPDATE OF file_path, status ON ads
+        WHEN OLD.file_path IS NOT NEW.file_path
+          OR (OLD.status = 'deleted') IS NOT (NEW.status = 'deleted')
+        BEGIN
+            UPDATE files SET refcount = refcount - 1
+            WHERE path = OLD.file_path AND OLD.status != 'deleted';
+            UPDATE files SET refcount = refcount + 1, ad_id = NEW.id
+            WHERE path = NEW.file_path AND NEW.status != 'deleted';
+        END
+    ''')
+
+
+def _add_file_quota(cursor: sqlite3.Cursor) -> None:
+    """Version 10: stored bytes counter and LRU index for the resume quota"""
+    cursor.execute('''
+        INSERT OR REPLACE INTO counters (name, value)
+        SELECT 'files:bytes', COALESCE(SUM(size), 0) FROM files
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO counters (name, value)
+        SELECT 'files:count', COUNT(*) FROM files
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_files_counters_insert AFTER INSERT ON files
+        BEGIN
+            UPDATE counters SET value = value + NEW.size WHERE name = 'files:bytes';
+            UPDATE counters SET value = value + 1 WHERE name = 'files:count';
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_files_counters_delete AFTER DELETE ON files
+        BEGIN
+            UPDATE counters SET value = value - OLD.size WHERE name = 'files:bytes';
+            UPDATE counters SET value = value - 1 WHERE name = 'files:count';
+        END
+    ''')
+    
+    # FileRepository.delete_least_recently_used
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_accessed ON files (accessed_at)')
+
+
+def _add_category_version(cursor: sqlite3.Cursor) -> None:
+    """Version 11: categories version counter for cross-process revalidation"""
+    cursor.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('categories:version', 0)")
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_categories_version_{event.lower()}
+            AFTER {event} ON categories
+            BEGIN
+                UPDATE counters SET value = value + 1 WHERE name = 'categories:version';
+            END
+        ''')
+
+
+def _add_fsm_storage(cursor: sqlite3.Cursor) -> None:
+    """Version 12: persistent FSM state and data"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fsm_storage (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT NOT NULL DEFAULT '{}',
+            updated_at TEXT NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    
+    # FsmRepository.delete_expired
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_fsm_storage_updated
+        ON fsm_storage (updated_at)
+    ''')
+
+
+def _add_pending_file_index(cursor: sqlite3.Cursor) -> None:
+    """Version 13: files attached to pending ads (cleanup pin check)"""
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ads_file_path_pending
+        ON ads (file_path) WHERE status = 'pending' AND file_path IS NOT NULL
+    ''')
+
+
+# (version, description, migration) - append only, never renumber
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, "base tables", _create_base_tables),
+    (2, "hot path indexes", _add_hot_path_indexes),
+    (3, "ads.category_id", _add_ads_category_id),
+    (4, "statistics counters", _add_stat_counters),
+    (5, "outbox", _add_outbox),
+    (6, "broadcasts", _add_broadcasts),
+    (7, "ad_history diffs", _add_history_diffs),
+    (8, "resume file store", _add_file_store),
+    (9, "file metadata", _add_file_metadata),
+    (10, "resume quota", _add_file_quota),
+    (11, "categories version", _add_category_version),
+    (12, "fsm storage", _add_fsm_storage),
+    (13, "pending file index", _add_pending_file_index),
+]
+
+
+def get_schema_version(cursor: sqlite3.Cursor) -> int:
+    """Get the current schema version (0 for a fresh or legacy database)"""
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    )
+    if not cursor.fetchone():
+        return 0
+    cursor.execute('SELECT MAX(version) FROM schema_version')
+    return cursor.fetchone()[0] or 0
+
+
+def init_db():
+    """Bring the database schema up to the latest version"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    current_version = get_schema_version(cursor)
+    latest_version = MIGRATIONS[-1][0]
+    if current_version >= latest_version:
+        logger.info(f"Database schema is current (version {current_version})")
+        return
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT
+        )
+    ''')
+    
+    for version, description, migrate in MIGRATIONS:
+        if version <= current_version:
+            continue
+        
+        logger.info(f"Applying migration {version}: {description}")
+        cursor.execute('BEGIN')
+        try:
+            migrate(cursor)
+            cursor.execute(
+                'INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+                (version, description, datetime.utcnow().isoformat())
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
 
@@ -27,6 +27,7 @@ class Ad:
     updated_at: str
     approved_at: Optional[str]
     approved_by: Optional[int]
+    category_id: Optional[int] = None
 
 
 @dataclass
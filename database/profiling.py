@@ -0,0 +1,200 @@
+"""SQL statement profiling
+
+Connections are opened with ``ProfilingConnection``, so every statement
+(repository helpers and hand-written ``with get_db_connection()`` blocks
+alike) goes through ``ProfilingCursor``. Statements are normalized
+(literals replaced by ``?``, IN lists folded, whitespace collapsed) and per
+statement the count, total and max time and rows fetched are kept. The
+time of a statement includes fetching its rows.
+
+An execution slower than DB_SLOW_QUERY_MS is logged together with its
+``EXPLAIN QUERY PLAN``.
+"""
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from config import DB_SLOW_QUERY_MS
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+# Raw SQL -> normalized SQL; statements are mostly constants, but
+# f-strings with inlined values could grow it without bound
+_normalized: Dict[str, str] = {}
+_NORMALIZED_MAX = 5000
+
+
+class QueryStats:
+    """Totals of one normalized statement"""
+
+    __slots__ = ("sql", "count", "total", "max", "rows", "slow", "raw", "params")
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.slow = 0
+        # Latest execution, to EXPLAIN it later
+        self.raw = sql
+        self.params: Any = ()
+
+
+_stats: Dict[str, QueryStats] = {}
+_stats_lock = threading.Lock()
+
+
+def normalize_sql(sql: str) -> str:
+    """Statement text with literals replaced, used as the statistics key"""
+    normalized = _normalized.get(sql)
+    if normalized is None:
+        normalized = _STRING.sub("?", sql)
+        normalized = _NUMBER.sub("?", normalized)
+        normalized = _SPACE.sub(" ", normalized).strip()
+        normalized = _IN_LIST.sub("(?...)", normalized)
+        if len(_normalized) >= _NORMALIZED_MAX:
+            _normalized.clear()
+        _normalized[sql] = normalized
+    return normalized
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: Any = ()) -> List[str]:
+    """``EXPLAIN QUERY PLAN`` lines of a statement"""
+    # A plain cursor, so plan lookups are not profiled themselves
+    cursor = conn.cursor(sqlite3.Cursor)
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Cursor timing its statements and counting fetched rows"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._sql: Optional[str] = None
+        self._params: Any = ()
+        self._stats: Optional[QueryStats] = None
+        self._elapsed = 0.0
+        self._slow_logged = False
+
+    def _begin(self, sql: str, params: Any) -> None:
+        self._sql = sql
+        self._params = params
+        self._elapsed = 0.0
+        self._slow_logged = False
+        key = normalize_sql(sql)
+        with _stats_lock:
+            stats = _stats.get(key)
+            if stats is None:
+                stats = _stats[key] = QueryStats(key)
+            stats.count += 1
+            stats.raw = sql
+            stats.params = params
+        self._stats = stats
+
+    def _add(self, seconds: float, rows: int = 0) -> None:
+        stats = self._stats
+        if stats is None:
+            return
+        self._elapsed += seconds
+        with _stats_lock:
+            stats.total += seconds
+            stats.rows += rows
+            stats.max = max(stats.max, self._elapsed)
+        if self._elapsed * 1000 >= DB_SLOW_QUERY_MS and not self._slow_logged:
+            self._slow_logged = True
+            with _stats_lock:
+                stats.slow += 1
+            self._log_slow()
+
+    def _log_slow(self) -> None:
+        try:
+            plan = explain(self.connection, self._sql, self._params)
+        except sqlite3.Error as e:
+            plan = [f"(plan yo'q: {e})"]
+        logger.warning(
+            f"Sekin so'rov {self._elapsed * 1000:.1f} ms: {self._stats.sql}\n"
+            + "\n".join(f"  {line}" for line in plan)
+        )
+
+    def execute(self, sql: str, parameters: Any = ()) -> "ProfilingCursor":
+        self._begin(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._add(time.perf_counter() - started)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "ProfilingCursor":
+        # The first parameter set stands in for all of them in EXPLAIN
+        sample = seq_of_parameters[0] if isinstance(seq_of_parameters, (list, tuple)) and seq_of_parameters else ()
+        self._begin(sql, sample)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._add(time.perf_counter() - started)
+
+    def fetchone(self) -> Any:
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._add(time.perf_counter() - started, 1 if row is not None else 0)
+        return row
+
+    def fetchmany(self, size: int = 1) -> List[Any]:
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._add(time.perf_counter() - started, len(rows))
+        return rows
+
+    def fetchall(self) -> List[Any]:
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._add(time.perf_counter() - started, len(rows))
+        return rows
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """Connection whose cursors (including ``conn.execute``) are profiled"""
+
+    def cursor(self, factory: Any = ProfilingCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    # The built-in shortcuts do not go through a Python-level cursor.execute
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def get_top_queries(limit: int = 10, order_by: str = "total") -> List[Dict[str, Any]]:
+    """Statements with the highest ``order_by`` (total, max, count, rows)"""
+    with _stats_lock:
+        rows = [
+            {
+                "sql": stats.sql,
+                "count": stats.count,
+                "total": stats.total,
+                "avg": stats.total / stats.count if stats.count else 0.0,
+                "max": stats.max,
+                "rows": stats.rows,
+                "slow": stats.slow,
+                "raw": stats.raw,
+                "params": stats.params,
+            }
+            for stats in _stats.values()
+        ]
+    rows.sort(key=lambda row: row[order_by], reverse=True)
+    return rows[:limit]
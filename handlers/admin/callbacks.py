@@ -1,33 +1,32 @@
 """Admin callback handlers"""
-import json
 import logging
+from typing import Optional
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.fsm.context import FSMContext
 
 from states.admin_states import AdminStates
-from config import MAIN_CHANNEL_USERNAME
-from services.user_service import UserService
 from utils.admin_helpers import is_admin
 from services.ad_service import AdService
 from services.category_service import CategoryService
 from services.admin_service import AdminService
-from utils.text_formatters import format_ad_text
+from database.executor import AsyncFacade
+from app.outbox import wake_outbox
+from app.broadcast import cancel_broadcast
+from utils.constants import PENDING_ADS_PAGE_SIZE
+from database.models import User
 from data.languages import get_text
 from keyboards.admin_keyboards import (
     admin_panel_keyboard, category_actions_keyboard,
     admin_categories_keyboard, categories_list_keyboard
 )
-from keyboards.graduate_keyboards import graduate_main_menu
-from keyboards.employer_keyboards import employer_main_menu
 
 router = Router()
 logger = logging.getLogger(__name__)
 
-user_service = UserService()
-ad_service = AdService()
-category_service = CategoryService()
-admin_service = AdminService()
+ad_service = AsyncFacade(AdService())
+category_service = AsyncFacade(CategoryService())
+admin_service = AsyncFacade(AdminService())
 
 
 @router.callback_query(F.data.startswith("approve_"))
@@ -38,55 +37,14 @@ async def approve_ad(callback: CallbackQuery):
         return
     
     ad_id = int(callback.data.split("_")[1])
-    ad = ad_service.get_ad(ad_id)
     
-    if not ad:
-        await callback.answer("E'lon topilmadi!")
-        return
-    
-    if ad[3] != "pending":
-        await callback.answer("E'lon allaqachon ko'rib chiqilgan!")
-        return
-    
-    # Update status to approved
-    ad_service.update_ad_status(ad_id, "approved", callback.from_user.id)
-    
-    # Send to channel
-    bot = callback.bot
-    ad_data = json.loads(ad[4])
-    ad_text = format_ad_text(ad_data, ad[2])
-    
-    try:
-        if ad[2] == "graduate" and ad[5]:  # Has resume
-            await bot.send_document(
-                chat_id=MAIN_CHANNEL_USERNAME,
-                document=ad[5],
-                caption=ad_text,
-                parse_mode="HTML"
-            )
-        else:
-            await bot.send_message(
-                chat_id=MAIN_CHANNEL_USERNAME,
-                text=ad_text,
-                parse_mode="HTML"
-            )
-    except Exception as e:
-        await callback.answer(f"Kanalga yuborishda xatolik: {str(e)}")
+    # Status change, channel post and user notification are committed
+    # together; the outbox worker delivers the messages
+    success, error = await admin_service.approve_ad(ad_id, callback.from_user.id)
+    if not success:
+        await callback.answer(error)
         return
-    
-    # Notify user
-    user = user_service.get_user(ad[1])
-    if user:
-        language = user[3] or "uz"
-        success_text = get_text("ad_approved", language)
-        
-        try:
-            if user[2] == "graduate":
-                await bot.send_message(ad[1], success_text, reply_markup=graduate_main_menu(language))
-            else:
-                await bot.send_message(ad[1], success_text, reply_markup=employer_main_menu(language))
-        except Exception:
-            pass
+    wake_outbox()
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="🔙 Orqaga", callback_data="back_admin")]
@@ -94,7 +52,7 @@ async def approve_ad(callback: CallbackQuery):
     
     try:
         await callback.message.edit_text(
-            f"✅ E'lon #{ad_id} tasdiqlandi va kanalga yuborildi!",
+            f"✅ E'lon #{ad_id} tasdiqlandi va kanalga yuborish navbatiga qo'yildi!",
             reply_markup=keyboard,
             parse_mode="HTML"
         )
@@ -104,7 +62,7 @@ async def approve_ad(callback: CallbackQuery):
             await callback.answer("✅ E'lon tasdiqlandi!")
         else:
             await callback.message.answer(
-                f"✅ E'lon #{ad_id} tasdiqlandi va kanalga yuborildi!",
+                f"✅ E'lon #{ad_id} tasdiqlandi va kanalga yuborish navbatiga qo'yildi!",
                 reply_markup=keyboard
             )
 
@@ -117,33 +75,12 @@ async def reject_ad(callback: CallbackQuery):
         return
     
     ad_id = int(callback.data.split("_")[1])
-    ad = ad_service.get_ad(ad_id)
     
-    if not ad:
-        await callback.answer("E'lon topilmadi!")
+    success, error = await admin_service.reject_ad(ad_id, callback.from_user.id)
+    if not success:
+        await callback.answer(error)
         return
-    
-    if ad[3] != "pending":
-        await callback.answer("E'lon allaqachon ko'rib chiqilgan!")
-        return
-    
-    # Update status to rejected
-    ad_service.update_ad_status(ad_id, "rejected", callback.from_user.id)
-    
-    # Notify user
-    bot = callback.bot
-    user = user_service.get_user(ad[1])
-    if user:
-        language = user[3] or "uz"
-        reject_text = get_text("ad_rejected", language)
-        
-        try:
-            if user[2] == "graduate":
-                await bot.send_message(ad[1], reject_text, reply_markup=graduate_main_menu(language))
-            else:
-                await bot.send_message(ad[1], reject_text, reply_markup=employer_main_menu(language))
-        except Exception:
-            pass
+    wake_outbox()
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="🔙 Orqaga", callback_data="back_admin")]
@@ -163,6 +100,36 @@ async def reject_ad(callback: CallbackQuery):
             await callback.message.answer(f"❌ E'lon #{ad_id} rad etildi!", reply_markup=keyboard)
 
 
+@router.callback_query(F.data == "broadcast")
+async def broadcast_start(callback: CallbackQuery, state: FSMContext):
+    """Start a broadcast to all users"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("Sizda ruxsat yo'q!")
+        return
+    
+    await callback.message.edit_text(
+        "📣 Barcha foydalanuvchilarga yuboriladigan xabarni kiriting:",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="❌ Bekor qilish", callback_data="back_admin")]
+        ])
+    )
+    await state.set_state(AdminStates.waiting_broadcast_text)
+
+
+@router.callback_query(F.data.startswith("broadcast_cancel_"))
+async def broadcast_cancel(callback: CallbackQuery):
+    """Stop a running broadcast"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("Sizda ruxsat yo'q!")
+        return
+    
+    broadcast_id = int(callback.data.split("_")[2])
+    if cancel_broadcast(broadcast_id):
+        await callback.answer("⛔ To'xtatilmoqda...")
+    else:
+        await callback.answer("Bu xabar yuborish allaqachon tugagan!")
+
+
 @router.callback_query(F.data == "manage_categories")
 async def manage_categories(callback: CallbackQuery):
     """Manage categories"""
@@ -183,7 +150,7 @@ async def list_categories(callback: CallbackQuery):
         await callback.answer("Sizda ruxsat yo'q!")
         return
     
-    categories = category_service.get_all_categories()
+    categories = await category_service.get_all_categories()
     text = "📂 Kategoriyalar ro'yxati:\n\n"
     
     for i, (cat_id, cat_name) in enumerate(categories, 1):
@@ -221,15 +188,14 @@ async def edit_category(callback: CallbackQuery):
         return
     
     cat_id = int(callback.data.split("_")[2])
-    categories = category_service.get_all_categories()
-    category = next((cat for cat in categories if cat[0] == cat_id), None)
+    category_name = category_service.get_category_name(cat_id)
     
-    if not category:
+    if not category_name:
         await callback.answer("Kategoriya topilmadi!")
         return
     
     await callback.message.edit_text(
-        f"📂 Kategoriya: {category[1]}\n\nNima qilishni xohlaysiz?",
+        f"📂 Kategoriya: {category_name}\n\nNima qilishni xohlaysiz?",
         reply_markup=category_actions_keyboard(cat_id)
     )
 
@@ -242,16 +208,15 @@ async def edit_category_name(callback: CallbackQuery, state: FSMContext):
         return
     
     cat_id = int(callback.data.split("_")[3])
-    categories = category_service.get_all_categories()
-    category = next((cat for cat in categories if cat[0] == cat_id), None)
+    category_name = category_service.get_category_name(cat_id)
     
-    if not category:
+    if not category_name:
         await callback.answer("Kategoriya topilmadi!")
         return
     
     await state.update_data(editing_category_id=cat_id)
     await callback.message.edit_text(
-        f"✏️ Hozirgi nom: {category[1]}\n\nYangi nomni kiriting:",
+        f"✏️ Hozirgi nom: {category_name}\n\nYangi nomni kiriting:",
         reply_markup=InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="❌ Bekor qilish", callback_data=f"edit_category_{cat_id}")]
         ])
@@ -267,15 +232,14 @@ async def delete_category_confirm(callback: CallbackQuery):
         return
     
     cat_id = int(callback.data.split("_")[2])
-    categories = category_service.get_all_categories()
-    category = next((cat for cat in categories if cat[0] == cat_id), None)
+    category_name = category_service.get_category_name(cat_id)
     
-    if not category:
+    if not category_name:
         await callback.answer("Kategoriya topilmadi!")
         return
     
     await callback.message.edit_text(
-        f"🗑 Kategoriyani o'chirish\n\n📂 {category[1]}\n\n⚠️ Bu amalni qaytarib bo'lmaydi!\nRostdan ham o'chirishni xohlaysizmi?",
+        f"🗑 Kategoriyani o'chirish\n\n📂 {category_name}\n\n⚠️ Bu amalni qaytarib bo'lmaydi!\nRostdan ham o'chirishni xohlaysizmi?",
         reply_markup=InlineKeyboardMarkup(inline_keyboard=[
             [
                 InlineKeyboardButton(text="✅ Ha, o'chirish", callback_data=f"confirm_delete_{cat_id}"),
@@ -294,7 +258,7 @@ async def delete_category_final(callback: CallbackQuery):
     
     cat_id = int(callback.data.split("_")[2])
     
-    success, error = category_service.delete_category(cat_id)
+    success, error = await category_service.delete_category(cat_id)
     if success:
         await callback.message.edit_text(
             f"✅ Kategoriya o'chirildi!",
@@ -313,7 +277,7 @@ async def show_stats(callback: CallbackQuery):
         await callback.answer("Sizda ruxsat yo'q!")
         return
     
-    stats = admin_service.get_full_statistics()
+    stats = await admin_service.get_full_statistics()
     user_stats = stats['users']
     ad_stats = stats['ads']
     
@@ -349,13 +313,23 @@ async def show_stats(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "pending_ads")
+@router.callback_query(F.data.startswith("pending_prev_"))
+@router.callback_query(F.data.startswith("pending_next_"))
 async def show_pending_ads(callback: CallbackQuery):
-    """Show pending ads list"""
+    """Show pending ads list (one page)"""
     if not is_admin(callback.from_user.id):
         await callback.answer("Sizda ruxsat yo'q!")
         return
     
-    ads_list = admin_service.get_pending_ads_list(limit=20)
+    after_id = before_id = None
+    if callback.data.startswith("pending_next_"):
+        after_id = int(callback.data.split("_")[2])
+    elif callback.data.startswith("pending_prev_"):
+        before_id = int(callback.data.split("_")[2])
+    
+    ads_list, has_prev, has_next = await admin_service.get_pending_ads_list(
+        limit=PENDING_ADS_PAGE_SIZE, after_id=after_id, before_id=before_id
+    )
     
     if not ads_list:
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -372,9 +346,10 @@ async def show_pending_ads(callback: CallbackQuery):
     
     # Create keyboard with ad buttons
     from keyboards.admin_keyboards import pending_ads_list_keyboard
-    keyboard = pending_ads_list_keyboard(ads_list)
+    keyboard = pending_ads_list_keyboard(ads_list, has_prev, has_next)
     
-    text = f"⏳ <b>Kutilayotgan e'lonlar ({len(ads_list)}):</b>\n\n"
+    pending_total = (await ad_service.get_ad_stats())['pending']
+    text = f"⏳ <b>Kutilayotgan e'lonlar ({pending_total}):</b>\n\n"
     text += "E'lonni ko'rish uchun tanlang:"
     
     try:
@@ -395,22 +370,23 @@ async def view_pending_ad_details(callback: CallbackQuery):
         return
     
     ad_id = int(callback.data.split("_")[3])
-    ad = ad_service.get_ad(ad_id)
+    ad_with_user = await ad_service.get_ad_with_user(ad_id)
     
-    if not ad:
+    if not ad_with_user:
         await callback.answer("E'lon topilmadi!")
         return
     
+    # Owner's username and language are read in the same query as the ad
+    ad, username, language = ad_with_user[:11], ad_with_user[11], ad_with_user[12]
+    
     if ad[3] != "pending":
         await callback.answer("Bu e'lon kutilayotgan holatda emas!")
         return
     
-    # Get user language for formatting
-    user = user_service.get_user(ad[1])
-    language = user[3] if user else "uz"
-    
     # Format full ad details
-    full_text = admin_service.format_pending_ad_details(ad, language)
+    full_text = await admin_service.format_pending_ad_details(
+        ad, language or "uz", username or "Noma'lum"
+    )
     
     # Add action buttons
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -496,7 +472,7 @@ async def back_to_admin_panel(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "exit_admin")
-async def exit_admin_panel(callback: CallbackQuery, state: FSMContext):
+async def exit_admin_panel(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Exit admin panel and return to main menu - like /start command"""
     if not is_admin(callback.from_user.id):
         await callback.answer("Sizda ruxsat yo'q!")
@@ -505,8 +481,7 @@ async def exit_admin_panel(callback: CallbackQuery, state: FSMContext):
     # Clear state like /start does
     await state.clear()
     
-    user = user_service.get_user(callback.from_user.id)
-    if not user:
+    if not db_user:
         try:
             await callback.message.edit_text(
                 "🔧 Admin Panel",
@@ -519,8 +494,8 @@ async def exit_admin_panel(callback: CallbackQuery, state: FSMContext):
             )
         return
     
-    language = user[3] or "uz"
-    role = user[2]
+    language = db_user.language or "uz"
+    role = db_user.role
     
     from keyboards.graduate_keyboards import graduate_main_menu
     from keyboards.employer_keyboards import employer_main_menu
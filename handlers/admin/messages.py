@@ -1,5 +1,7 @@
 """Admin message handlers"""
+import html
 from aiogram import Router, F
+from aiogram.filters import Command, CommandObject
 from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
@@ -9,12 +11,17 @@ from config import QUESTION_ADMIN_GROUP_ID
 from services.category_service import CategoryService
 from utils.admin_helpers import is_admin
 from services.student_service import StudentService
+from services.admin_service import AdminService
+from database.executor import AsyncFacade
 from keyboards.admin_keyboards import admin_panel_keyboard
+from app.broadcast import start_broadcast, format_progress, progress_keyboard
+from utils.metrics import get_percentiles
 
 router = Router()
 
-category_service = CategoryService()
-student_service = StudentService()
+category_service = AsyncFacade(CategoryService())
+student_service = AsyncFacade(StudentService())
+admin_service = AsyncFacade(AdminService())
 
 
 @router.message(F.text == "/admin")
@@ -29,6 +36,69 @@ async def admin_panel(message: Message):
     )
 
 
+@router.message(Command("perf"))
+async def perf_stats(message: Message, command: CommandObject):
+    """Handler latency percentiles: /perf [N]"""
+    if not is_admin(message.from_user.id):
+        return
+    
+    limit = max(1, int(command.args)) if command.args and command.args.isdigit() else 15
+    rows = get_percentiles(limit)
+    if not rows:
+        await message.answer("📊 Hali statistika yo'q")
+        return
+    
+    # Stay under Telegram's message length limit
+    text = (
+        "📊 <b>Handlerlar tezligi</b> (p95 bo'yicha, shu jarayon)\n"
+        "<pre>handler / soni\n  wall | db | api: p50 / p95 / p99 ms"
+    )
+    for row in rows:
+        block = f"\n{html.escape(row['handler'].removeprefix('handlers.'))} / {row['count']}\n  " + " | ".join(
+            " / ".join(f"{row[f'{kind}_p{q}'] * 1000:.0f}" for q in (50, 95, 99))
+            for kind in ("wall", "db", "api")
+        )
+        if len(text) + len(block) > 4000:
+            break
+        text += block
+    await message.answer(text + "</pre>", parse_mode="HTML")
+
+
+@router.message(Command("sqltop"))
+async def sql_top(message: Message, command: CommandObject):
+    """Most expensive SQL statements: /sqltop [N] [total|max|count|rows]"""
+    if not is_admin(message.from_user.id):
+        return
+    
+    args = (command.args or "").split()
+    limit = next((max(1, int(arg)) for arg in args if arg.isdigit()), 10)
+    order_by = next((arg for arg in args if arg in ("total", "max", "count", "rows")), "total")
+    queries = await admin_service.get_top_queries(limit, order_by)
+    if not queries:
+        await message.answer("📊 Hali statistika yo'q")
+        return
+    
+    blocks = []
+    for query in queries:
+        full_scan = any(line.startswith("SCAN ") for line in query['plan'])
+        blocks.append(
+            f"{'⚠️ ' if full_scan else ''}{query['count']}x, jami {query['total'] * 1000:.0f} ms, "
+            f"o'rtacha {query['avg'] * 1000:.2f} ms, max {query['max'] * 1000:.1f} ms, "
+            f"{query['rows']} qator, sekin {query['slow']}\n"
+            f"<pre>{html.escape(query['sql'][:300])}"
+            + "".join(f"\n  {html.escape(line)}" for line in query['plan'])
+            + "</pre>"
+        )
+    
+    # Stay under Telegram's message length limit
+    text = f"🐢 <b>SQL so'rovlar</b> ({order_by} bo'yicha, shu jarayon)"
+    for block in blocks:
+        if len(text) + len(block) > 4000:
+            break
+        text += "\n\n" + block
+    await message.answer(text, parse_mode="HTML")
+
+
 @router.message(AdminStates.waiting_category_name)
 async def process_new_category(message: Message, state: FSMContext):
     """Process new category name"""
@@ -37,7 +107,7 @@ async def process_new_category(message: Message, state: FSMContext):
     
     category_name = message.text.strip()
     
-    is_valid, error = category_service.create_category(category_name)
+    is_valid, error = await category_service.create_category(category_name)
     if is_valid:
         await message.answer(
             f"✅ Kategoriya '{category_name}' muvaffaqiyatli qo'shildi!",
@@ -60,7 +130,7 @@ async def process_edit_category(message: Message, state: FSMContext):
     cat_id = data.get("editing_category_id")
     new_name = message.text.strip()
     
-    is_valid, error = category_service.update_category_name(cat_id, new_name)
+    is_valid, error = await category_service.update_category_name(cat_id, new_name)
     if is_valid:
         await message.answer(
             f"✅ Kategoriya nomi '{new_name}' ga o'zgartirildi!",
@@ -73,6 +143,30 @@ async def process_edit_category(message: Message, state: FSMContext):
         await message.answer(f"❌ {error}")
 
 
+@router.message(AdminStates.waiting_broadcast_text)
+async def process_broadcast_text(message: Message, state: FSMContext):
+    """Create and start a broadcast"""
+    if not is_admin(message.from_user.id):
+        return
+    
+    if not message.text:
+        await message.answer("❌ Faqat matnli xabar yuborish mumkin. Qaytadan kiriting:")
+        return
+    
+    await state.clear()
+    broadcast_id, total = await admin_service.create_broadcast(
+        message.html_text, message.from_user.id, message.chat.id
+    )
+    broadcast = await admin_service.get_broadcast(broadcast_id)
+    progress = await message.answer(
+        format_progress(broadcast),
+        reply_markup=progress_keyboard(broadcast_id, True),
+        parse_mode="HTML"
+    )
+    await admin_service.set_broadcast_message(broadcast_id, progress.message_id)
+    start_broadcast(message.bot, broadcast_id)
+
+
 @router.message(F.chat.id == QUESTION_ADMIN_GROUP_ID, F.reply_to_message)
 async def admin_reply_to_student(message: Message):
     """Admin guruhda student xabariga reply qilganda"""
@@ -85,7 +179,7 @@ async def admin_reply_to_student(message: Message):
         return
     
     # Database'dan student message'ni topish
-    student_message = student_service.get_message_by_group_id(replied_message.message_id)
+    student_message = await student_service.get_message_by_group_id(replied_message.message_id)
     
     if not student_message:
         await message.answer("⚠️ Bu xabar database'da topilmadi. Lekin javob guruhda qoldirildi.")
@@ -1,4 +1,5 @@
 """Employer callback handlers"""
+from typing import Optional
 import json
 import logging
 from aiogram import Router, F
@@ -15,19 +16,21 @@ from keyboards.employer_keyboards import (
 )
 from keyboards.graduate_keyboards import my_ads_keyboard
 from keyboards.admin_keyboards import admin_moderation_keyboard
-from services.user_service import UserService
 from services.ad_service import AdService
 from services.category_service import CategoryService
 from services.validation_service import ValidationService
+from database.executor import AsyncFacade
+from utils.constants import MY_ADS_PAGE_SIZE
+from database.models import User
+from utils.helpers import check_user_role, get_user_language
 from utils.text_formatters import format_ad_text, get_status_text, format_date
 from config import VACANCY_ADMIN_GROUP_ID
 
 router = Router()
 logger = logging.getLogger(__name__)
 
-user_service = UserService()
-ad_service = AdService()
-category_service = CategoryService()
+ad_service = AsyncFacade(AdService())
+category_service = AsyncFacade(CategoryService())
 validator = ValidationService()
 
 
@@ -39,14 +42,13 @@ async def process_category(callback: CallbackQuery, state: FSMContext):
         data = await state.get_data()
         language = data.get("language", "uz")
         
-        categories = category_service.get_all_categories()
-        category_name = next((name for id, name in categories if id == category_id), "")
+        category_name = category_service.get_category_name(category_id)
         
         if not category_name:
             await callback.message.answer("Kategoriya topilmadi!")
             return
         
-        await state.update_data(category=category_name)
+        await state.update_data(category=category_name, category_id=category_id)
         await state.set_state(EmployerStates.gender)
         await callback.message.edit_text(get_text("enter_gender", language))
     except TelegramBadRequest:
@@ -64,12 +66,12 @@ async def confirm_ad(callback: CallbackQuery, state: FSMContext):
         ad_id = data.get("ad_id")
         
         # Update status to pending
-        if not ad_service.update_ad_status(ad_id, "pending", callback.from_user.id):
+        if not await ad_service.update_ad_status(ad_id, "pending", callback.from_user.id):
             await callback.answer("E'lon topilmadi yoki statusni yangilashda xatolik!")
             return
         
         # Send to admin
-        ad = ad_service.get_ad(ad_id)
+        ad = await ad_service.get_ad(ad_id)
         if ad:
             ad_data = json.loads(ad[4])
             ad_text = format_ad_text(ad_data, "employer", language)
@@ -99,7 +101,7 @@ async def cancel_ad(callback: CallbackQuery, state: FSMContext):
         language = data.get("language", "uz")
         ad_id = data.get("ad_id")
         
-        if not ad_service.update_ad_status(ad_id, "cancelled", callback.from_user.id):
+        if not await ad_service.update_ad_status(ad_id, "cancelled", callback.from_user.id):
             await callback.message.answer("E'lon topilmadi!")
             return
         
@@ -132,18 +134,18 @@ async def edit_ad(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("emp_view_"))
-async def view_ad_employer(callback: CallbackQuery, state: FSMContext):
+async def view_ad_employer(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """View ad"""
     try:
         logger.info(f"EMPLOYER emp_view triggered: {callback.data} by {callback.from_user.id}")
         ad_id = int(callback.data.split("_")[2])
         
-        is_valid, language = user_service.check_user_role(callback.from_user.id, "employer")
+        is_valid, language = check_user_role(db_user, "employer")
         if not is_valid:
             await callback.answer("Sizda ruxsat yo'q!")
             return
         
-        ad = ad_service.get_ad(ad_id)
+        ad = await ad_service.get_ad(ad_id)
         
         if not ad or ad[1] != callback.from_user.id:
             await callback.answer("E'lon topilmadi!")
@@ -166,15 +168,15 @@ async def view_ad_employer(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data == "my_ads_employer")
-async def my_ads_callback(callback: CallbackQuery, state: FSMContext):
+async def my_ads_callback(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """My ads callback"""
     try:
-        is_valid, language = user_service.check_user_role(callback.from_user.id, "employer")
+        is_valid, language = check_user_role(db_user, "employer")
         if not is_valid:
             await callback.answer("Ruxsat yo'q!")
             return
         
-        ads = ad_service.get_user_ads(callback.from_user.id)
+        ads, has_prev, has_next = await ad_service.get_user_ads_page(callback.from_user.id, MY_ADS_PAGE_SIZE)
         
         if not ads:
             await callback.message.edit_text(
@@ -185,7 +187,7 @@ async def my_ads_callback(callback: CallbackQuery, state: FSMContext):
         
         await callback.message.edit_text(
             get_text("ads_list", language),
-            reply_markup=my_ads_keyboard(ads, language)
+            reply_markup=my_ads_keyboard(ads, language, has_prev, has_next)
         )
     except TelegramBadRequest:
         await callback.message.answer("Xabar yangilashda xatolik! Qaytadan urinib ko'ring.")
@@ -243,14 +245,13 @@ async def process_edit_category(callback: CallbackQuery, state: FSMContext):
         ad_id = data.get("ad_id")
         field_name = data.get("edit_field")
         
-        categories = category_service.get_all_categories()
-        new_value = next((name for id, name in categories if id == category_id), "")
+        new_value = category_service.get_category_name(category_id)
         
         if not new_value:
             await callback.message.answer("Kategoriya topilmadi!")
             return
         
-        ad = ad_service.get_ad(ad_id)
+        ad = await ad_service.get_ad(ad_id)
         if not ad:
             await callback.message.answer("E'lon topilmadi!")
             return
@@ -258,12 +259,15 @@ async def process_edit_category(callback: CallbackQuery, state: FSMContext):
         ad_data = json.loads(ad[4])
         old_value = ad_data.get(field_name, "")
         
-        success = ad_service.update_ad_field(ad_id, field_name, old_value, new_value, callback.from_user.id)
+        success = await ad_service.update_ad_field(
+            ad_id, field_name, old_value, new_value, callback.from_user.id,
+            category_id=category_id
+        )
         
         if success:
             await callback.message.answer(get_text("field_updated", language))
             
-            ad = ad_service.get_ad(ad_id)
+            ad = await ad_service.get_ad(ad_id)
             ad_data = json.loads(ad[4])
             ad_text = format_ad_text(ad_data, "employer", language)
             
@@ -295,7 +299,7 @@ async def back_to_confirm(callback: CallbackQuery, state: FSMContext):
         language = data.get("language", "uz")
         ad_id = data.get("ad_id")
         
-        ad = ad_service.get_ad(ad_id)
+        ad = await ad_service.get_ad(ad_id)
         if not ad:
             await callback.message.answer("E'lon topilmadi!")
             return
@@ -316,17 +320,17 @@ async def back_to_confirm(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("emp_edit_draft_"))
-async def edit_draft_ad_employer(callback: CallbackQuery, state: FSMContext):
+async def edit_draft_ad_employer(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Edit draft ad"""
     try:
         ad_id = int(callback.data.split("_")[3])
         
-        is_valid, language = user_service.check_user_role(callback.from_user.id, "employer")
+        is_valid, language = check_user_role(db_user, "employer")
         if not is_valid:
             await callback.answer("Sizda ruxsat yo'q!")
             return
         
-        ad = ad_service.get_ad(ad_id)
+        ad = await ad_service.get_ad(ad_id)
         
         if not ad or ad[1] != callback.from_user.id:
             await callback.answer("E'lon topilmadi!")
@@ -343,16 +347,16 @@ async def edit_draft_ad_employer(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("emp_confirm_draft_"))
-async def confirm_draft_ad_employer(callback: CallbackQuery, state: FSMContext):
+async def confirm_draft_ad_employer(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Confirm draft ad"""
     ad_id = int(callback.data.split("_")[3])
     
-    is_valid, language = user_service.check_user_role(callback.from_user.id, "employer")
+    is_valid, language = check_user_role(db_user, "employer")
     if not is_valid:
         await callback.answer("Sizda ruxsat yo'q!")
         return
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     
     if not ad or ad[1] != callback.from_user.id:
         await callback.answer("E'lon topilmadi!")
@@ -363,7 +367,7 @@ async def confirm_draft_ad_employer(callback: CallbackQuery, state: FSMContext):
         return
     
     # Update status to pending
-    if not ad_service.update_ad_status(ad_id, "pending", callback.from_user.id):
+    if not await ad_service.update_ad_status(ad_id, "pending", callback.from_user.id):
         await callback.message.answer("Statusni yangilashda xatolik!")
         return
     
@@ -385,16 +389,16 @@ async def confirm_draft_ad_employer(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("emp_cancel_pending_"))
-async def cancel_pending_ad_employer(callback: CallbackQuery, state: FSMContext):
+async def cancel_pending_ad_employer(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Cancel pending ad"""
     ad_id = int(callback.data.split("_")[3])
     
-    is_valid, language = user_service.check_user_role(callback.from_user.id, "employer")
+    is_valid, language = check_user_role(db_user, "employer")
     if not is_valid:
         await callback.answer("Ruxsat yo'q!")
         return
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     
     if not ad or ad[1] != callback.from_user.id:
         await callback.answer("E'lon topilmadi!")
@@ -404,7 +408,7 @@ async def cancel_pending_ad_employer(callback: CallbackQuery, state: FSMContext)
         await callback.answer("Bu e'lonni bekor qilib bo'lmaydi!")
         return
     
-    if ad_service.update_ad_status(ad_id, "cancelled", callback.from_user.id):
+    if await ad_service.update_ad_status(ad_id, "cancelled", callback.from_user.id):
         await callback.message.edit_text(
             f"❌ E'lon #{ad_id} bekor qilindi!",
             reply_markup=employer_main_menu(language)
@@ -412,17 +416,17 @@ async def cancel_pending_ad_employer(callback: CallbackQuery, state: FSMContext)
 
 
 @router.callback_query(F.data.startswith("emp_edit_pending_"))
-async def edit_pending_ad_employer(callback: CallbackQuery, state: FSMContext):
+async def edit_pending_ad_employer(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Edit pending ad"""
     try:
         ad_id = int(callback.data.split("_")[3])
         
-        is_valid, language = user_service.check_user_role(callback.from_user.id, "employer")
+        is_valid, language = check_user_role(db_user, "employer")
         if not is_valid:
             await callback.answer("Sizda ruxsat yo'q!")
             return
         
-        ad = ad_service.get_ad(ad_id)
+        ad = await ad_service.get_ad(ad_id)
         
         if not ad or ad[1] != callback.from_user.id:
             await callback.answer("E'lon topilmadi!")
@@ -439,19 +443,18 @@ async def edit_pending_ad_employer(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("browse_cat_"))
-async def browse_category(callback: CallbackQuery, state: FSMContext):
+async def browse_category(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Browse category"""
     try:
         cat_id = int(callback.data.split("_")[2])
-        categories = category_service.get_all_categories()
-        category = next((name for id, name in categories if id == cat_id), None)
+        category = category_service.get_category_name(cat_id)
         
         if not category:
             await callback.answer("Kategoriya topilmadi!")
             return
         
-        language = user_service.get_user_language(callback.from_user.id)
-        ads = ad_service.get_approved_ads_by_category(category)
+        language = get_user_language(db_user)
+        ads = await ad_service.get_approved_ads_by_category(cat_id)
         
         if not ads:
             await callback.message.edit_text(get_text("no_ads_in_category", language).format(category=category))
@@ -482,16 +485,16 @@ async def browse_category(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("emp_delete_"))
-async def delete_ad_employer(callback: CallbackQuery, state: FSMContext):
+async def delete_ad_employer(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Delete ad"""
     ad_id = int(callback.data.split("_")[2])
     
-    is_valid, language = user_service.check_user_role(callback.from_user.id, "employer")
+    is_valid, language = check_user_role(db_user, "employer")
     if not is_valid:
         await callback.answer("Ruxsat yo'q!")
         return
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     
     if not ad or ad[1] != callback.from_user.id:
         await callback.answer("E'lon topilmadi!")
@@ -512,22 +515,22 @@ async def delete_ad_employer(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("emp_confirm_delete_"))
-async def confirm_delete_ad_employer(callback: CallbackQuery, state: FSMContext):
+async def confirm_delete_ad_employer(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Confirm delete ad"""
     ad_id = int(callback.data.split("_")[3])
     
-    is_valid, language = user_service.check_user_role(callback.from_user.id, "employer")
+    is_valid, language = check_user_role(db_user, "employer")
     if not is_valid:
         await callback.answer("Ruxsat yo'q!")
         return
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     
     if not ad or ad[1] != callback.from_user.id:
         await callback.answer("E'lon topilmadi!")
         return
     
-    if ad_service.update_ad_status(ad_id, "deleted", callback.from_user.id):
+    if await ad_service.update_ad_status(ad_id, "deleted", callback.from_user.id):
         await callback.message.edit_text(
             f"✅ E'lon #{ad_id} muvaffaqiyatli o'chirildi!",
             reply_markup=InlineKeyboardMarkup(inline_keyboard=[
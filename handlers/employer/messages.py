@@ -1,4 +1,5 @@
 """Employer message handlers"""
+from typing import Optional
 import json
 import logging
 from aiogram import Router, F
@@ -7,33 +8,32 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import ReplyKeyboardRemove
 
 from states.employer_states import EmployerStates
-from data.languages import get_text
+from data.languages import get_text, button_matcher
 from keyboards.base import categories_keyboard, confirmation_keyboard
 from keyboards.employer_keyboards import employer_main_menu
-from services.user_service import UserService
 from services.ad_service import AdService
 from services.validation_service import ValidationService
 from services.category_service import CategoryService
+from database.executor import AsyncFacade
+from database.models import User
+from utils.helpers import check_user_role, get_user_language
 from utils.text_formatters import format_ad_text
-from utils.constants import MIN_AGE_EMPLOYER, MAX_AGE
+from utils.constants import MIN_AGE_EMPLOYER, MAX_AGE, MY_ADS_PAGE_SIZE
 
 router = Router()
 logger = logging.getLogger(__name__)
 
-user_service = UserService()
-ad_service = AdService()
+ad_service = AsyncFacade(AdService())
 validator = ValidationService()
-category_service = CategoryService()
+category_service = AsyncFacade(CategoryService())
 
 
-@router.message(F.text & F.text.func(lambda text: text and text.startswith("👔") and any(
-    keyword in text for keyword in ["E'lon yaratish", "Создать объявление"]
-)))
-async def start_create_ad_employer(message: Message, state: FSMContext):
+@router.message(F.text.func(button_matcher("create_ad", prefix="👔 ")))
+async def start_create_ad_employer(message: Message, state: FSMContext, db_user: Optional[User]):
     """Start creating employer ad"""
     logger.info(f"👔 EMPLOYER E'lon yaratish: {message.from_user.id}")
     
-    is_valid, language = user_service.check_user_role(message.from_user.id, "employer")
+    is_valid, language = check_user_role(db_user, "employer")
     if not is_valid:
         logger.warning(f"👔 EMPLOYER Ruxsat yo'q")
         await message.answer("Sizda ruxsat yo'q!")
@@ -202,11 +202,12 @@ async def process_requirements(message: Message, state: FSMContext):
         "requirements": requirements_text
     }
     
-    ad_id = ad_service.create_ad(
+    ad_id = await ad_service.create_ad(
         user_id=message.from_user.id,
         ad_type="employer",
         data=ad_data,
-        status="draft"
+        status="draft",
+        category_id=data.get("category_id")
     )
     
     await state.update_data(ad_id=ad_id)
@@ -264,7 +265,7 @@ async def process_edit_field(message: Message, state: FSMContext):
             return
     
     # Get current ad
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     if not ad:
         await message.answer("E'lon topilmadi!")
         return
@@ -273,13 +274,13 @@ async def process_edit_field(message: Message, state: FSMContext):
     old_value = ad_data.get(field_name, "")
     
     # Update field
-    success = ad_service.update_ad_field(ad_id, field_name, old_value, new_value, message.from_user.id)
+    success = await ad_service.update_ad_field(ad_id, field_name, old_value, new_value, message.from_user.id)
     
     if success:
         await message.answer(get_text("field_updated", language))
         
         # Show updated ad
-        ad = ad_service.get_ad(ad_id)
+        ad = await ad_service.get_ad(ad_id)
         ad_data = json.loads(ad[4])
         ad_text = format_ad_text(ad_data, "employer", language)
         
@@ -294,19 +295,17 @@ async def process_edit_field(message: Message, state: FSMContext):
         await message.answer("Xatolik yuz berdi!")
 
 
-@router.message(F.text & F.text.func(lambda text: text and text.startswith("👔") and any(
-    keyword in text for keyword in ["Mening e'lonlarim", "Мои объявления"]
-)))
-async def my_ads_employer(message: Message, state: FSMContext):
+@router.message(F.text.func(button_matcher("my_ads", prefix="👔 ")))
+async def my_ads_employer(message: Message, state: FSMContext, db_user: Optional[User]):
     """My ads message handler"""
     logger.info(f"👔 EMPLOYER My ads: {message.from_user.id}")
     
-    is_valid, language = user_service.check_user_role(message.from_user.id, "employer")
+    is_valid, language = check_user_role(db_user, "employer")
     if not is_valid:
         await message.answer("Sizda ruxsat yo'q!")
         return
     
-    ads = ad_service.get_user_ads(message.from_user.id)
+    ads, has_prev, has_next = await ad_service.get_user_ads_page(message.from_user.id, MY_ADS_PAGE_SIZE)
     
     if not ads:
         await message.answer(
@@ -319,14 +318,14 @@ async def my_ads_employer(message: Message, state: FSMContext):
     from keyboards.graduate_keyboards import my_ads_keyboard
     await message.answer(
         get_text("ads_list", language),
-        reply_markup=my_ads_keyboard(ads, language)
+        reply_markup=my_ads_keyboard(ads, language, has_prev, has_next)
     )
 
 
-@router.message(F.text & F.text.func(lambda text: text == get_text("browse_by_category", "uz") or text == get_text("browse_by_category", "ru")))
-async def browse_by_category_entry(message: Message, state: FSMContext):
+@router.message(F.text.func(button_matcher("browse_by_category")))
+async def browse_by_category_entry(message: Message, state: FSMContext, db_user: Optional[User]):
     """Browse by category entry"""
-    language = user_service.get_user_language(message.from_user.id)
+    language = get_user_language(db_user)
     from keyboards.employer_keyboards import browse_categories_keyboard
     await message.answer(
         get_text("select_category", language),
@@ -334,12 +333,10 @@ async def browse_by_category_entry(message: Message, state: FSMContext):
     )
 
 
-@router.message(F.text & F.text.func(lambda text: text and text in [
-    get_text("contact_admin", "uz"), get_text("contact_admin", "ru")
-]))
-async def contact_admin(message: Message, state: FSMContext):
+@router.message(F.text.func(button_matcher("contact_admin")))
+async def contact_admin(message: Message, state: FSMContext, db_user: Optional[User]):
     """Contact admin"""
-    is_valid, language = user_service.check_user_role(message.from_user.id, "employer")
+    is_valid, language = check_user_role(db_user, "employer")
     if not is_valid:
         await message.answer("Sizda ruxsat yo'q!")
         return
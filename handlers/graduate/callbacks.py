@@ -1,4 +1,5 @@
 """Graduate callback handlers"""
+from typing import Optional
 import json
 import logging
 from aiogram import Router, F
@@ -15,18 +16,21 @@ from keyboards.graduate_keyboards import (
     my_ads_keyboard, ad_actions_keyboard_graduate
 )
 from keyboards.admin_keyboards import admin_moderation_keyboard
-from services.user_service import UserService
 from services.ad_service import AdService
 from services.category_service import CategoryService
+from database.executor import AsyncFacade
+from utils.constants import MY_ADS_PAGE_SIZE
+from database.models import User
+from utils.helpers import check_user_role, get_user_language
 from utils.text_formatters import format_ad_text, get_status_text, format_date
+from app.resume_store import collect_garbage
 from config import RESUME_ADMIN_GROUP_ID
 
 router = Router()
 logger = logging.getLogger(__name__)
 
-user_service = UserService()
-ad_service = AdService()
-category_service = CategoryService()
+ad_service = AsyncFacade(AdService())
+category_service = AsyncFacade(CategoryService())
 
 
 @router.callback_query(F.data.startswith("region_"), GraduateStates.region)
@@ -53,14 +57,13 @@ async def process_profession(callback: CallbackQuery, state: FSMContext):
     data = await state.get_data()
     language = data.get("language", "uz")
     
-    categories = category_service.get_all_categories()
-    category_name = next((name for id, name in categories if id == category_id), "")
+    category_name = category_service.get_category_name(category_id)
     
     if not category_name:
         await callback.answer("Kategoriya topilmadi!")
         return
     
-    await state.update_data(profession=category_name)
+    await state.update_data(profession=category_name, profession_id=category_id)
     await state.set_state(GraduateStates.contact_time)
     
     await callback.message.answer(get_text("enter_contact_time", language))
@@ -75,10 +78,10 @@ async def confirm_ad(callback: CallbackQuery, state: FSMContext):
     ad_id = data.get("ad_id")
     
     # Update status to pending
-    ad_service.update_ad_status(ad_id, "pending", callback.from_user.id)
+    await ad_service.update_ad_status(ad_id, "pending", callback.from_user.id)
     
     # Send to admin
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     if ad:
         ad_data = json.loads(ad[4])
         ad_text = format_ad_text(ad_data, "graduate", language)
@@ -114,7 +117,7 @@ async def cancel_ad(callback: CallbackQuery, state: FSMContext):
     language = data.get("language", "uz")
     ad_id = data.get("ad_id")
     
-    ad_service.update_ad_status(ad_id, "cancelled", callback.from_user.id)
+    await ad_service.update_ad_status(ad_id, "cancelled", callback.from_user.id)
     await callback.message.answer(
         get_text("ad_cancelled", language),
         reply_markup=graduate_main_menu(language)
@@ -137,17 +140,17 @@ async def edit_ad(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("grad_view_"))
-async def view_ad_graduate(callback: CallbackQuery, state: FSMContext):
+async def view_ad_graduate(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """View ad"""
     logger.info(f"GRADUATE grad_view triggered: {callback.data} by {callback.from_user.id}")
     ad_id = int(callback.data.split("_")[2])
     
-    is_valid, language = user_service.check_user_role(callback.from_user.id, "graduate")
+    is_valid, language = check_user_role(db_user, "graduate")
     if not is_valid:
         await callback.answer("Sizda ruxsat yo'q!")
         return
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     
     if not ad or ad[1] != callback.from_user.id:
         await callback.answer("E'lon topilmadi!")
@@ -230,17 +233,17 @@ async def process_edit_region(callback: CallbackQuery, state: FSMContext):
     regions = get_text("regions", language)
     new_value = regions[region_index]
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     if ad:
         ad_data = json.loads(ad[4])
         old_value = ad_data.get("region", "")
         
-        success = ad_service.update_ad_field(ad_id, "region", old_value, new_value, callback.from_user.id)
+        success = await ad_service.update_ad_field(ad_id, "region", old_value, new_value, callback.from_user.id)
         
         if success:
             await callback.message.answer(get_text("field_updated", language))
             
-            ad = ad_service.get_ad(ad_id)
+            ad = await ad_service.get_ad(ad_id)
             ad_data = json.loads(ad[4])
             ad_text = format_ad_text(ad_data, "graduate", language)
             
@@ -264,20 +267,22 @@ async def process_edit_category(callback: CallbackQuery, state: FSMContext):
     ad_id = data.get("ad_id")
     field_name = data.get("edit_field")
     
-    categories = category_service.get_all_categories()
-    new_value = next((name for id, name in categories if id == category_id), "")
+    new_value = category_service.get_category_name(category_id) or ""
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     if ad:
         ad_data = json.loads(ad[4])
         old_value = ad_data.get(field_name, "")
         
-        success = ad_service.update_ad_field(ad_id, field_name, old_value, new_value, callback.from_user.id)
+        success = await ad_service.update_ad_field(
+            ad_id, field_name, old_value, new_value, callback.from_user.id,
+            category_id=category_id
+        )
         
         if success:
             await callback.message.answer(get_text("field_updated", language))
             
-            ad = ad_service.get_ad(ad_id)
+            ad = await ad_service.get_ad(ad_id)
             ad_data = json.loads(ad[4])
             ad_text = format_ad_text(ad_data, "graduate", language)
             
@@ -299,7 +304,7 @@ async def back_to_confirm_from_edit(callback: CallbackQuery, state: FSMContext):
     language = data.get("language", "uz")
     ad_id = data.get("ad_id")
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     if ad:
         ad_data = json.loads(ad[4])
         ad_text = format_ad_text(ad_data, "graduate", language)
@@ -319,7 +324,7 @@ async def back_to_confirm_from_edit_field(callback: CallbackQuery, state: FSMCon
     language = data.get("language", "uz")
     ad_id = data.get("ad_id")
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     if ad:
         ad_data = json.loads(ad[4])
         ad_text = format_ad_text(ad_data, "graduate", language)
@@ -332,10 +337,10 @@ async def back_to_confirm_from_edit_field(callback: CallbackQuery, state: FSMCon
 
 
 @router.callback_query(F.data == "my_ads")
-async def my_ads_callback(callback: CallbackQuery, state: FSMContext):
+async def my_ads_callback(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """My ads callback"""
-    language = user_service.get_user_language(callback.from_user.id)
-    ads = ad_service.get_user_ads(callback.from_user.id)
+    language = get_user_language(db_user)
+    ads, has_prev, has_next = await ad_service.get_user_ads_page(callback.from_user.id, MY_ADS_PAGE_SIZE)
     
     if not ads:
         await callback.message.edit_text(
@@ -346,21 +351,46 @@ async def my_ads_callback(callback: CallbackQuery, state: FSMContext):
     
     await callback.message.edit_text(
         get_text("ads_list", language),
-        reply_markup=my_ads_keyboard(ads, language)
+        reply_markup=my_ads_keyboard(ads, language, has_prev, has_next)
+    )
+
+
+@router.callback_query(F.data.startswith("myads_prev_"))
+@router.callback_query(F.data.startswith("myads_next_"))
+async def my_ads_page(callback: CallbackQuery, db_user: Optional[User]):
+    """Another page of my ads (graduate and employer)"""
+    language = get_user_language(db_user)
+    direction, anchor_id = callback.data.split("_")[1:3]
+    if direction == "next":
+        ads, has_prev, has_next = await ad_service.get_user_ads_page(
+            callback.from_user.id, MY_ADS_PAGE_SIZE, after_id=int(anchor_id)
+        )
+    else:
+        ads, has_prev, has_next = await ad_service.get_user_ads_page(
+            callback.from_user.id, MY_ADS_PAGE_SIZE, before_id=int(anchor_id)
+        )
+    
+    if not ads:
+        await callback.answer(get_text("no_ads", language))
+        return
+    
+    await callback.message.edit_text(
+        get_text("ads_list", language),
+        reply_markup=my_ads_keyboard(ads, language, has_prev, has_next)
     )
 
 
 @router.callback_query(F.data.startswith("grad_confirm_draft_"))
-async def confirm_draft_ad_graduate(callback: CallbackQuery, state: FSMContext):
+async def confirm_draft_ad_graduate(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Confirm draft ad"""
     ad_id = int(callback.data.split("_")[3])
     
-    is_valid, language = user_service.check_user_role(callback.from_user.id, "graduate")
+    is_valid, language = check_user_role(db_user, "graduate")
     if not is_valid:
         await callback.answer("Sizda ruxsat yo'q!")
         return
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     
     if not ad or ad[1] != callback.from_user.id:
         await callback.answer("E'lon topilmadi!")
@@ -371,7 +401,7 @@ async def confirm_draft_ad_graduate(callback: CallbackQuery, state: FSMContext):
         return
     
     # Update status to pending
-    ad_service.update_ad_status(ad_id, "pending", callback.from_user.id)
+    await ad_service.update_ad_status(ad_id, "pending", callback.from_user.id)
     
     # Send to admin
     ad_data = json.loads(ad[4])
@@ -400,16 +430,16 @@ async def confirm_draft_ad_graduate(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("grad_cancel_pending_"))
-async def cancel_pending_ad_graduate(callback: CallbackQuery, state: FSMContext):
+async def cancel_pending_ad_graduate(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Cancel pending ad"""
     ad_id = int(callback.data.split("_")[3])
     
-    is_valid, language = user_service.check_user_role(callback.from_user.id, "graduate")
+    is_valid, language = check_user_role(db_user, "graduate")
     if not is_valid:
         await callback.answer("Ruxsat yo'q!")
         return
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     
     if not ad or ad[1] != callback.from_user.id:
         await callback.answer("E'lon topilmadi!")
@@ -419,7 +449,7 @@ async def cancel_pending_ad_graduate(callback: CallbackQuery, state: FSMContext)
         await callback.answer("Bu e'lonni bekor qilib bo'lmaydi!")
         return
     
-    ad_service.update_ad_status(ad_id, "cancelled", callback.from_user.id)
+    await ad_service.update_ad_status(ad_id, "cancelled", callback.from_user.id)
     
     await callback.message.edit_text(
         f"❌ E'lon #{ad_id} bekor qilindi!",
@@ -428,16 +458,16 @@ async def cancel_pending_ad_graduate(callback: CallbackQuery, state: FSMContext)
 
 
 @router.callback_query(F.data.startswith("grad_edit_draft_"))
-async def edit_draft_ad_graduate(callback: CallbackQuery, state: FSMContext):
+async def edit_draft_ad_graduate(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Edit draft ad"""
     ad_id = int(callback.data.split("_")[3])
     
-    is_valid, language = user_service.check_user_role(callback.from_user.id, "graduate")
+    is_valid, language = check_user_role(db_user, "graduate")
     if not is_valid:
         await callback.answer("Sizda ruxsat yo'q!")
         return
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     
     if not ad or ad[1] != callback.from_user.id:
         await callback.answer("E'lon topilmadi!")
@@ -452,16 +482,16 @@ async def edit_draft_ad_graduate(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("grad_edit_pending_"))
-async def edit_pending_ad_graduate(callback: CallbackQuery, state: FSMContext):
+async def edit_pending_ad_graduate(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Edit pending ad"""
     ad_id = int(callback.data.split("_")[3])
     
-    is_valid, language = user_service.check_user_role(callback.from_user.id, "graduate")
+    is_valid, language = check_user_role(db_user, "graduate")
     if not is_valid:
         await callback.answer("Sizda ruxsat yo'q!")
         return
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     
     if not ad or ad[1] != callback.from_user.id:
         await callback.answer("E'lon topilmadi!")
@@ -476,16 +506,16 @@ async def edit_pending_ad_graduate(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("grad_delete_"))
-async def delete_ad_graduate(callback: CallbackQuery, state: FSMContext):
+async def delete_ad_graduate(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Delete ad"""
     ad_id = int(callback.data.split("_")[2])
     
-    is_valid, language = user_service.check_user_role(callback.from_user.id, "graduate")
+    is_valid, language = check_user_role(db_user, "graduate")
     if not is_valid:
         await callback.answer("Ruxsat yo'q!")
         return
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     
     if not ad or ad[1] != callback.from_user.id:
         await callback.answer("E'lon topilmadi!")
@@ -506,22 +536,23 @@ async def delete_ad_graduate(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("grad_confirm_delete_"))
-async def confirm_delete_ad_graduate(callback: CallbackQuery, state: FSMContext):
+async def confirm_delete_ad_graduate(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Confirm delete ad"""
     ad_id = int(callback.data.split("_")[3])
     
-    is_valid, language = user_service.check_user_role(callback.from_user.id, "graduate")
+    is_valid, language = check_user_role(db_user, "graduate")
     if not is_valid:
         await callback.answer("Ruxsat yo'q!")
         return
     
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     
     if not ad or ad[1] != callback.from_user.id:
         await callback.answer("E'lon topilmadi!")
         return
     
-    if ad_service.update_ad_status(ad_id, "deleted", callback.from_user.id):
+    if await ad_service.update_ad_status(ad_id, "deleted", callback.from_user.id):
+        await collect_garbage()
         await callback.message.edit_text(
             f"✅ E'lon #{ad_id} muvaffaqiyatli o'chirildi!",
             reply_markup=InlineKeyboardMarkup(inline_keyboard=[
@@ -1,5 +1,5 @@
 """Graduate message handlers"""
-import os
+from typing import Optional
 import json
 import logging
 from aiogram import Router, F
@@ -8,38 +8,38 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import ReplyKeyboardRemove
 
 from states.graduate_states import GraduateStates
-from data.languages import get_text
+from data.languages import get_text, button_matcher
 from keyboards.base import (
     contact_keyboard, regions_keyboard, categories_keyboard,
     confirmation_keyboard
 )
 from keyboards.graduate_keyboards import graduate_main_menu
-from services.user_service import UserService
 from services.ad_service import AdService
 from services.validation_service import ValidationService
 from services.category_service import CategoryService
+from database.executor import AsyncFacade
+from database.models import User
+from utils.helpers import check_user_role
 from utils.text_formatters import format_ad_text
 from utils.validators import validate_phone, clean_phone
-from utils.constants import MIN_AGE, MAX_AGE, MAX_FILE_SIZE, ALLOWED_FILE_FORMATS
-from config import RESUME_FOLDER
+from utils.constants import MIN_AGE, MAX_AGE, MAX_FILE_SIZE, ALLOWED_FILE_FORMATS, MY_ADS_PAGE_SIZE
+from app.downloads import FileTooLarge
+from app.resume_store import store_resume, collect_garbage
 
 router = Router()
 logger = logging.getLogger(__name__)
 
-user_service = UserService()
-ad_service = AdService()
+ad_service = AsyncFacade(AdService())
 validator = ValidationService()
-category_service = CategoryService()
+category_service = AsyncFacade(CategoryService())
 
 
-@router.message(F.text & F.text.func(lambda text: text and text.startswith("🎓") and any(
-    keyword in text for keyword in ["E'lon yaratish", "Создать объявление"]
-)))
-async def start_create_ad_graduate(message: Message, state: FSMContext):
+@router.message(F.text.func(button_matcher("create_ad", prefix="🎓 ")))
+async def start_create_ad_graduate(message: Message, state: FSMContext, db_user: Optional[User]):
     """Start creating graduate ad"""
     logger.info(f"🎓 GRADUATE E'lon yaratish: {message.from_user.id}")
     
-    is_valid, language = user_service.check_user_role(message.from_user.id, "graduate")
+    is_valid, language = check_user_role(db_user, "graduate")
     if not is_valid:
         logger.warning(f"🎓 GRADUATE Ruxsat yo'q")
         await message.answer("Sizda ruxsat yo'q!")
@@ -173,10 +173,12 @@ async def process_resume(message: Message, state: FSMContext):
         await message.answer(f"Faqat {', '.join(ALLOWED_FILE_FORMATS)} formatdagi fayllar qabul qilinadi!")
         return
     
-    # Download file
-    file_info = await message.bot.get_file(message.document.file_id)
-    file_path = os.path.join(RESUME_FOLDER, f"{message.document.file_id}_{file_name}")
-    await message.bot.download_file(file_info.file_path, file_path)
+    # Store file (skipped if this file is already stored)
+    try:
+        file_path = await store_resume(message.bot, message.document, MAX_FILE_SIZE)
+    except FileTooLarge:
+        await message.answer(f"Fayl hajmi {MAX_FILE_SIZE//1024//1024}MB dan kichik bo'lishi kerak!")
+        return
     
     # Create ad
     ad_data = {
@@ -191,13 +193,14 @@ async def process_resume(message: Message, state: FSMContext):
         "goal": data.get("goal")
     }
     
-    ad_id = ad_service.create_ad(
+    ad_id = await ad_service.create_ad(
         user_id=message.from_user.id,
         ad_type="graduate",
         data=ad_data,
         file_id=message.document.file_id,
         file_path=file_path,
-        status="draft"
+        status="draft",
+        category_id=data.get("profession_id")
     )
     
     await state.update_data(ad_id=ad_id)
@@ -220,19 +223,17 @@ async def resume_not_document(message: Message, state: FSMContext):
     await message.answer(get_text("enter_resume", language))
 
 
-@router.message(F.text & F.text.func(lambda text: text and text.startswith("🎓") and any(
-    keyword in text for keyword in ["Mening e'lonlarim", "Мои объявления"]
-)))
-async def my_ads_message_graduate(message: Message, state: FSMContext):
+@router.message(F.text.func(button_matcher("my_ads", prefix="🎓 ")))
+async def my_ads_message_graduate(message: Message, state: FSMContext, db_user: Optional[User]):
     """My ads message handler"""
     logger.info(f"🎓 GRADUATE My ads: {message.from_user.id}")
     
-    is_valid, language = user_service.check_user_role(message.from_user.id, "graduate")
+    is_valid, language = check_user_role(db_user, "graduate")
     if not is_valid:
         await message.answer("Sizda ruxsat yo'q!")
         return
     
-    ads = ad_service.get_user_ads(message.from_user.id)
+    ads, has_prev, has_next = await ad_service.get_user_ads_page(message.from_user.id, MY_ADS_PAGE_SIZE)
     
     if not ads:
         await message.answer(
@@ -245,7 +246,7 @@ async def my_ads_message_graduate(message: Message, state: FSMContext):
     from keyboards.graduate_keyboards import my_ads_keyboard
     await message.answer(
         get_text("ads_list", language),
-        reply_markup=my_ads_keyboard(ads, language)
+        reply_markup=my_ads_keyboard(ads, language, has_prev, has_next)
     )
 
 
@@ -258,7 +259,7 @@ async def process_edit_field(message: Message, state: FSMContext):
     ad_id = data.get("ad_id")
     
     # Get current ad
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     if not ad:
         await message.answer("E'lon topilmadi!")
         return
@@ -284,13 +285,13 @@ async def process_edit_field(message: Message, state: FSMContext):
             return
     
     # Update field
-    success = ad_service.update_ad_field(ad_id, field_name, old_value, new_value, message.from_user.id)
+    success = await ad_service.update_ad_field(ad_id, field_name, old_value, new_value, message.from_user.id)
     
     if success:
         await message.answer(get_text("field_updated", language))
         
         # Show updated ad
-        ad = ad_service.get_ad(ad_id)
+        ad = await ad_service.get_ad(ad_id)
         ad_data = json.loads(ad[4])
         ad_text = format_ad_text(ad_data, "graduate", language)
         
@@ -322,20 +323,24 @@ async def process_edit_resume(message: Message, state: FSMContext):
         await message.answer(f"Faqat {', '.join(ALLOWED_FILE_FORMATS)} formatdagi fayllar qabul qilinadi!")
         return
     
-    # Download file
-    file_info = await message.bot.get_file(message.document.file_id)
-    file_path = os.path.join(RESUME_FOLDER, f"{message.document.file_id}_{file_name}")
-    await message.bot.download_file(file_info.file_path, file_path)
+    # Store file (skipped if this file is already stored)
+    try:
+        file_path = await store_resume(message.bot, message.document, MAX_FILE_SIZE)
+    except FileTooLarge:
+        await message.answer(f"Fayl hajmi {MAX_FILE_SIZE//1024//1024}MB dan kichik bo'lishi kerak!")
+        return
     
     # Update ad
-    ad = ad_service.get_ad(ad_id)
+    ad = await ad_service.get_ad(ad_id)
     if ad:
         ad_data = json.loads(ad[4])
         old_file_id = ad[5]
-        success = ad_service.update_ad_data(ad_id, ad_data, message.document.file_id, file_path)
+        success = await ad_service.update_ad_data(ad_id, ad_data, message.document.file_id, file_path)
         
         if success:
             await message.answer(get_text("field_updated", language))
+            # The previous resume may no longer be referenced
+            await collect_garbage()
             
             ad_text = format_ad_text(ad_data, "graduate", language)
             await state.update_data(ad_id=ad_id)
@@ -1,4 +1,5 @@
 # handlers/start.py
+from typing import Optional
 from aiogram import Router, F
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove
@@ -10,9 +11,12 @@ from keyboards.graduate_keyboards import graduate_main_menu
 from keyboards.employer_keyboards import employer_main_menu
 from keyboards.student_keyboards import student_main_menu
 from services.user_service import UserService
+from database.executor import AsyncFacade
+from database.models import User
 from config import ADMIN_IDS
 
 router = Router()
+user_service = AsyncFacade(UserService())
 
 @router.message(Command("start"))
 async def cmd_start(message: Message, state: FSMContext):
@@ -22,8 +26,7 @@ async def cmd_start(message: Message, state: FSMContext):
     username = message.from_user.username
     
     # Foydalanuvchini bazaga qo'shish
-    user_service = UserService()
-    user_service.create_or_update_user(user_id, username)
+    await user_service.create_or_update_user(user_id, username)
     
     await message.answer(
         get_text("welcome", "uz"),
@@ -38,8 +41,7 @@ async def select_language(callback: CallbackQuery, state: FSMContext):
     username = callback.from_user.username
     
     # Tilni saqlash
-    user_service = UserService()
-    user_service.create_or_update_user(user_id, username, language=language)
+    await user_service.create_or_update_user(user_id, username, language=language)
     await state.update_data(language=language)
     
     await callback.message.edit_text(
@@ -58,8 +60,7 @@ async def select_role(callback: CallbackQuery, state: FSMContext):
     language = data.get("language", "uz")
     
     # Rolni saqlash
-    user_service = UserService()
-    user_service.create_or_update_user(user_id, username, role=role, language=language)
+    await user_service.create_or_update_user(user_id, username, role=role, language=language)
     await state.update_data(role=role)
     
     if role == "graduate":
@@ -83,15 +84,13 @@ async def select_role(callback: CallbackQuery, state: FSMContext):
     await callback.message.delete()
 
 @router.callback_query(F.data == "main_menu")
-async def main_menu(callback: CallbackQuery, state: FSMContext):
+async def main_menu(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Asosiy menyuga qaytish"""
-    user_service = UserService()
-    user = user_service.get_user(callback.from_user.id)
-    if not user:
+    if not db_user:
         await callback.answer("Iltimos /start ni bosing")
         return
     
-    user_id, username, role, language, created_at = user
+    role, language = db_user.role, db_user.language
     await state.update_data(language=language, role=role)
     
     if role == "graduate":
@@ -1,4 +1,5 @@
 """Student callback handlers"""
+from typing import Optional
 import logging
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
@@ -7,23 +8,24 @@ from aiogram.types import ReplyKeyboardRemove
 
 from states.student_states import StudentStates
 from data.languages import get_text
-from services.user_service import UserService
 from services.student_service import StudentService
 from services.category_service import CategoryService
+from database.executor import AsyncFacade
+from database.models import User
+from utils.helpers import get_user_language
 from config import QUESTION_ADMIN_GROUP_ID
 
 router = Router()
 logger = logging.getLogger(__name__)
 
-user_service = UserService()
-student_service = StudentService()
-category_service = CategoryService()
+student_service = AsyncFacade(StudentService())
+category_service = AsyncFacade(CategoryService())
 
 
 @router.callback_query(F.data == "student_send")
-async def student_start(callback: CallbackQuery, state: FSMContext):
+async def student_start(callback: CallbackQuery, state: FSMContext, db_user: Optional[User]):
     """Start student message flow"""
-    language = user_service.get_user_language(callback.from_user.id)
+    language = get_user_language(db_user)
     await state.update_data(language=language)
     await state.set_state(StudentStates.name)
     
@@ -44,8 +46,7 @@ async def student_direction_select(callback: CallbackQuery, state: FSMContext):
     language = data.get("language", "uz")
     cat_id = int(callback.data.split("_")[2])
     
-    categories = category_service.get_all_categories()
-    name = next((n for i, n in categories if i == cat_id), None)
+    name = category_service.get_category_name(cat_id)
     
     if not name:
         await callback.answer("Topilmadi")
@@ -96,7 +97,7 @@ async def student_confirm(callback: CallbackQuery, state: FSMContext):
         sent_message = await callback.bot.send_message(QUESTION_ADMIN_GROUP_ID, text)
         await callback.message.edit_text(get_text("student_message_sent", language))
         
-        student_service.create_message(
+        await student_service.create_message(
             user_id=user_id,
             message_id=sent_message.message_id,
             group_message_id=sent_message.message_id,
@@ -11,9 +11,10 @@ from keyboards.student_keyboards import (
     student_directions_keyboard
 )
 from services.student_service import StudentService
+from database.executor import AsyncFacade
 
 router = Router()
-student_service = StudentService()
+student_service = AsyncFacade(StudentService())
 
 
 @router.message(StudentStates.name)
@@ -1,8 +1,10 @@
 """Admin keyboards"""
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from services.category_service import CategoryService
+from keyboards.registry import cached_keyboard, catalog_keyboard
 
 
+@cached_keyboard
 def admin_panel_keyboard() -> InlineKeyboardMarkup:
     """Admin panel keyboard"""
     keyboard = [
@@ -11,7 +13,8 @@ def admin_panel_keyboard() -> InlineKeyboardMarkup:
             InlineKeyboardButton(text="⏳ Kutilayotgan e'lonlar", callback_data="pending_ads")
         ],
         [
-            InlineKeyboardButton(text="📂 Kategoriyalar", callback_data="manage_categories")
+            InlineKeyboardButton(text="📂 Kategoriyalar", callback_data="manage_categories"),
+            InlineKeyboardButton(text="📣 Xabar yuborish", callback_data="broadcast")
         ],
         [
             InlineKeyboardButton(text="🚪 Chiqish", callback_data="exit_admin")
@@ -34,6 +37,7 @@ def admin_moderation_keyboard(ad_id: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@cached_keyboard
 def admin_categories_keyboard() -> InlineKeyboardMarkup:
     """Admin categories management keyboard"""
     keyboard = [
@@ -48,6 +52,7 @@ def admin_categories_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@catalog_keyboard
 def categories_list_keyboard() -> InlineKeyboardMarkup:
     """Categories list keyboard"""
     category_service = CategoryService()
@@ -84,8 +89,12 @@ def category_actions_keyboard(cat_id: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def pending_ads_list_keyboard(ads_list: list) -> InlineKeyboardMarkup:
-    """Pending ads list keyboard"""
+def pending_ads_list_keyboard(
+    ads_list: list,
+    has_prev: bool = False,
+    has_next: bool = False
+) -> InlineKeyboardMarkup:
+    """Pending ads list keyboard (one page)"""
     keyboard = []
     
     for ad_info in ads_list:
@@ -102,6 +111,14 @@ def pending_ads_list_keyboard(ads_list: list) -> InlineKeyboardMarkup:
             )
         ])
     
+    nav = []
+    if has_prev and ads_list:
+        nav.append(InlineKeyboardButton(text="⬅️", callback_data=f"pending_prev_{ads_list[0]['ad_id']}"))
+    if has_next and ads_list:
+        nav.append(InlineKeyboardButton(text="➡️", callback_data=f"pending_next_{ads_list[-1]['ad_id']}"))
+    if nav:
+        keyboard.append(nav)
+    
     keyboard.append([
         InlineKeyboardButton(text="🔙 Orqaga", callback_data="back_admin")
     ])
@@ -2,8 +2,10 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
 from data.languages import LANGUAGES, get_text
 from services.category_service import CategoryService
+from keyboards.registry import cached_keyboard, catalog_keyboard
 
 
+@cached_keyboard
 def language_keyboard() -> InlineKeyboardMarkup:
     """Language selection keyboard"""
     keyboard = []
@@ -12,6 +14,7 @@ def language_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@cached_keyboard
 def role_keyboard(language: str) -> InlineKeyboardMarkup:
     """Role selection keyboard"""
     keyboard = [
@@ -35,6 +38,7 @@ def role_keyboard(language: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@cached_keyboard
 def contact_keyboard(language: str) -> ReplyKeyboardMarkup:
     """Contact sharing keyboard"""
     keyboard = [
@@ -43,6 +47,7 @@ def contact_keyboard(language: str) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True, one_time_keyboard=True)
 
 
+@cached_keyboard
 def regions_keyboard(language: str) -> InlineKeyboardMarkup:
     """Regions selection keyboard"""
     regions = get_text("regions", language)
@@ -57,6 +62,7 @@ def regions_keyboard(language: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@catalog_keyboard
 def categories_keyboard() -> InlineKeyboardMarkup:
     """Categories selection keyboard"""
     category_service = CategoryService()
@@ -72,6 +78,7 @@ def categories_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@cached_keyboard
 def confirmation_keyboard(language: str) -> InlineKeyboardMarkup:
     """Confirmation keyboard"""
     keyboard = [
@@ -2,8 +2,10 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
 from data.languages import get_text
 from services.category_service import CategoryService
+from keyboards.registry import cached_keyboard, catalog_keyboard
 
 
+@cached_keyboard
 def employer_main_menu(language: str) -> ReplyKeyboardMarkup:
     """Employer main menu"""
     keyboard = [
@@ -21,6 +23,7 @@ def employer_main_menu(language: str) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True, one_time_keyboard=True)
 
 
+@cached_keyboard
 def edit_fields_keyboard_employer(language: str) -> InlineKeyboardMarkup:
     """Edit fields keyboard for employer"""
     fields = [
@@ -54,6 +57,7 @@ def edit_fields_keyboard_employer(language: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@catalog_keyboard
 def browse_categories_keyboard() -> InlineKeyboardMarkup:
     """Browse categories keyboard"""
     category_service = CategoryService()
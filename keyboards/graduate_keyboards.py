@@ -3,8 +3,10 @@ import json
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
 from data.languages import get_text
 from utils.constants import STATUS_EMOJI
+from keyboards.registry import cached_keyboard
 
 
+@cached_keyboard
 def graduate_main_menu(language: str) -> ReplyKeyboardMarkup:
     """Graduate main menu"""
     keyboard = [
@@ -16,6 +18,7 @@ def graduate_main_menu(language: str) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True, one_time_keyboard=True)
 
 
+@cached_keyboard
 def edit_fields_keyboard_graduate(language: str) -> InlineKeyboardMarkup:
     """Edit fields keyboard for graduate"""
     fields = [
@@ -47,8 +50,13 @@ def edit_fields_keyboard_graduate(language: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def my_ads_keyboard(ads, language: str) -> InlineKeyboardMarkup:
-    """My ads keyboard"""
+def my_ads_keyboard(
+    ads,
+    language: str,
+    has_prev: bool = False,
+    has_next: bool = False
+) -> InlineKeyboardMarkup:
+    """My ads keyboard (one page)"""
     keyboard = []
     
     for ad in ads:
@@ -77,6 +85,14 @@ def my_ads_keyboard(ads, language: str) -> InlineKeyboardMarkup:
             callback_data=callback_data
         )])
     
+    nav = []
+    if has_prev and ads:
+        nav.append(InlineKeyboardButton(text="⬅️", callback_data=f"myads_prev_{ads[0][0]}"))
+    if has_next and ads:
+        nav.append(InlineKeyboardButton(text="➡️", callback_data=f"myads_next_{ads[-1][0]}"))
+    if nav:
+        keyboard.append(nav)
+    
     keyboard.append([InlineKeyboardButton(text=get_text("main_menu", language), callback_data="main_menu")])
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
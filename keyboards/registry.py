@@ -0,0 +1,66 @@
+"""Keyboard registry
+
+A markup built once for a given set of arguments (usually just the
+language) can be sent any number of times. The decorators below memoize
+keyboard factories:
+
+- ``cached_keyboard`` builds once per argument tuple.
+- ``catalog_keyboard`` additionally rebuilds when the category catalog
+  version changes, for keyboards listing categories.
+
+Every caller gets the same markup object, and aiogram models are not
+frozen, so cached markups are read-only: build a new markup (or take a
+``model_copy(deep=True)``) instead of changing a returned one.
+"""
+import functools
+from typing import Any, Callable, Dict, Hashable, Tuple, TypeVar
+from repositories.category_repository import category_catalog
+
+T = TypeVar("T")
+
+_registries: list = []
+
+
+def _key(args: Tuple, kwargs: Dict[str, Any]) -> Hashable:
+    return args + tuple(sorted(kwargs.items())) if kwargs else args
+
+
+def cached_keyboard(func: Callable[..., T]) -> Callable[..., T]:
+    """Build a keyboard once per argument tuple"""
+    cache: Dict[Hashable, T] = {}
+    _registries.append(cache)
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        key = _key(args, kwargs)
+        markup = cache.get(key)
+        if markup is None:
+            markup = cache[key] = func(*args, **kwargs)
+        return markup
+
+    return wrapper
+
+
+def catalog_keyboard(func: Callable[..., T]) -> Callable[..., T]:
+    """Build a category keyboard once per argument tuple and catalog version"""
+    cache: Dict[Hashable, Tuple[int, T]] = {}
+    _registries.append(cache)
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        key = _key(args, kwargs)
+        # Read the version before building so a concurrent catalog refresh
+        # leaves the entry stale rather than wrongly current
+        version = category_catalog.version
+        entry = cache.get(key)
+        if entry is None or entry[0] != version:
+            entry = cache[key] = (version, func(*args, **kwargs))
+        return entry[1]
+
+    return wrapper
+
+
+def clear_keyboard_cache() -> None:
+    """Drop every memoized keyboard"""
+    for cache in _registries:
+        cache.clear()
@@ -2,8 +2,10 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from data.languages import get_text
 from services.category_service import CategoryService
+from keyboards.registry import cached_keyboard, catalog_keyboard
 
 
+@cached_keyboard
 def student_main_menu(language: str) -> InlineKeyboardMarkup:
     """Student main menu"""
     keyboard = [
@@ -12,6 +14,7 @@ def student_main_menu(language: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@cached_keyboard
 def student_type_keyboard(language: str) -> InlineKeyboardMarkup:
     """Student type selection keyboard"""
     keyboard = [[
@@ -21,6 +24,7 @@ def student_type_keyboard(language: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@cached_keyboard
 def student_confirmation_keyboard(language: str) -> InlineKeyboardMarkup:
     """Student confirmation keyboard"""
     keyboard = [
@@ -32,6 +36,7 @@ def student_confirmation_keyboard(language: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@catalog_keyboard
 def student_directions_keyboard() -> InlineKeyboardMarkup:
     """Student directions keyboard"""
     category_service = CategoryService()
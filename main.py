@@ -3,14 +3,12 @@ import asyncio
 import logging
 from logging.handlers import RotatingFileHandler
 
-from app.bot import create_bot, create_dispatcher, setup_bot, shutdown_bot
-from app.tasks import start_background_tasks
-from config import FILE_CLEANUP_HOURS, CLEANUP_INTERVAL_HOURS
-from handlers.start import router as start_router
-from handlers.admin import router as admin_router
-from handlers.employer import router as employer_router
-from handlers.graduate import router as graduate_router
-from handlers.student import router as student_router
+from app.bot import create_bot, create_dispatcher, include_routers, setup_bot, shutdown_bot
+from app.tasks import start_background_tasks, start_outbox_worker, start_metrics_export
+from app.broadcast import resume_broadcasts
+from app.webhook import run_webhook
+from app.supervisor import run_supervisor
+from config import FILE_CLEANUP_HOURS, CLEANUP_INTERVAL_HOURS, RUN_MODE, WORKER_PROCESSES
 
 # Setup logging
 logging.basicConfig(
@@ -32,30 +30,45 @@ async def main():
         # Setup bot
         await setup_bot()
         
+        if WORKER_PROCESSES > 1:
+            # Updates are handled by worker processes (background jobs too)
+            bot = create_bot()
+            await run_supervisor(bot, WORKER_PROCESSES)
+            return
+        
         # Start background tasks (file cleanup)
         start_background_tasks(
             cleanup_hours=FILE_CLEANUP_HOURS,
             interval_hours=CLEANUP_INTERVAL_HOURS
         )
+        start_metrics_export()
         
         # Create bot and dispatcher
         bot = create_bot()
         dp = create_dispatcher()
         
+        # Resume deliveries and broadcasts interrupted by a restart
+        start_outbox_worker(bot)
+        await resume_broadcasts(bot)
+        
         # Register routers
-        logger.info("Handlerlar ro'yxatdan o'tkazilmoqda...")
-        dp.include_router(start_router)
-        dp.include_router(admin_router)
-        dp.include_router(employer_router)
-        dp.include_router(graduate_router)
-        dp.include_router(student_router)
+        include_routers(dp)
         
-        logger.info("Polling boshlanmoqda...")
-        await dp.start_polling(bot, close_bot_session=False)
+        if RUN_MODE == "webhook":
+            logger.info("Webhook rejimi boshlanmoqda...")
+            await run_webhook(bot, dp)
+        else:
+            logger.info("Polling boshlanmoqda...")
+            # A webhook left over from webhook mode would block getUpdates
+            await bot.delete_webhook()
+            await dp.start_polling(bot, close_bot_session=False)
         
     except Exception as e:
         logger.error(f"Xatolik yuz berdi: {str(e)}", exc_info=True)
     finally:
+        # The dispatcher's shutdown (run by start_polling and the webhook
+        # app) has already closed the FSM storage, writing its pending
+        # changes before the database is closed here
         if bot:
             await shutdown_bot(bot)
 
@@ -0,0 +1,9 @@
+"""Aiogram middlewares"""
+from middlewares.user_context import UserContextMiddleware
+from middlewares.handler_metrics import HandlerMetricsMiddleware, api_timing
+
+__all__ = [
+    'UserContextMiddleware',
+    'HandlerMetricsMiddleware',
+    'api_timing',
+]
@@ -0,0 +1,46 @@
+"""Handler latency middleware"""
+import time
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from utils.metrics import HandlerTiming, current_timing, record_handler, add_api_time
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Record wall, database and Telegram API time of every handler call
+
+    Registered as an inner middleware, so it runs only for the handler
+    whose filters matched and knows which handler that is.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        handler_object = data.get("handler")
+        callback = getattr(handler_object, "callback", None)
+        name = f"{callback.__module__}.{callback.__name__}" if callback else "unknown"
+
+        timing = HandlerTiming()
+        token = current_timing.set(timing)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            record_handler(name, time.perf_counter() - started, timing)
+            current_timing.reset(token)
+
+
+async def api_timing(make_request, bot, method):
+    """Bot session middleware adding Telegram API time to the current handler
+
+    Registered before the send scheduler, so rate-limit waits count too.
+    """
+    started = time.perf_counter()
+    try:
+        return await make_request(bot, method)
+    finally:
+        add_api_time(time.perf_counter() - started)
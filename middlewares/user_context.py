@@ -0,0 +1,36 @@
+"""User context middleware"""
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from database.executor import AsyncFacade
+from repositories.user_repository import user_cache
+from services.user_service import UserService
+from utils.cache import MISSING
+
+
+class UserContextMiddleware(BaseMiddleware):
+    """Load the sender's user row once per update
+
+    The user is injected into handler data as ``db_user`` (``User`` or
+    None), so handlers read role and language without querying again.
+    """
+
+    def __init__(self):
+        self.user_service = AsyncFacade(UserService())
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        from_user = data.get("event_from_user")
+        db_user = None
+        if from_user:
+            # Cache hits are served on the loop; only misses go to the DB executor
+            db_user = user_cache.get(from_user.id)
+            if db_user is MISSING:
+                db_user = await self.user_service.get_user_context(from_user.id)
+        data["db_user"] = db_user
+        return await handler(event, data)
@@ -4,6 +4,10 @@ from repositories.user_repository import UserRepository
 from repositories.ad_repository import AdRepository
 from repositories.category_repository import CategoryRepository
 from repositories.student_repository import StudentRepository
+from repositories.outbox_repository import OutboxRepository
+from repositories.broadcast_repository import BroadcastRepository
+from repositories.file_repository import FileRepository
+from repositories.fsm_repository import FsmRepository
 
 __all__ = [
     'BaseRepository',
@@ -11,5 +15,9 @@ __all__ = [
     'AdRepository',
     'CategoryRepository',
     'StudentRepository',
+    'OutboxRepository',
+    'BroadcastRepository',
+    'FileRepository',
+    'FsmRepository',
 ]
 
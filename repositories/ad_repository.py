@@ -4,6 +4,26 @@ from datetime import datetime
 from typing import Optional, List, Tuple, Dict
 from repositories.base import BaseRepository
 from database.connection import get_db_connection
+from config import STATS_MODE, HISTORY_SNAPSHOT_INTERVAL
+from utils.history_diff import make_diff, dumps, rebuild_timeline
+
+# Explicit column list keeps the row tuple layout stable when columns are added
+AD_COLUMNS = (
+    "id, user_id, ad_type, status, data, file_id, file_path, "
+    "created_at, updated_at, approved_at, approved_by"
+)
+
+# Same columns qualified with the table name, for queries joining users
+AD_COLUMNS_QUALIFIED = ', '.join(f'ads.{column.strip()}' for column in AD_COLUMNS.split(','))
+
+# ad_history columns in the layout expected by rebuild_timeline
+HISTORY_COLUMNS = (
+    "id, ad_id, action, old_data, new_data, field_name, old_value, "
+    "new_value, changed_by, created_at, diff"
+)
+
+# Statuses reported by get_stats
+STAT_STATUSES = ('approved', 'pending', 'rejected', 'cancelled')
 
 
 class AdRepository(BaseRepository):
@@ -16,7 +36,8 @@ class AdRepository(BaseRepository):
         data: dict,
         file_id: Optional[str] = None,
         file_path: Optional[str] = None,
-        status: str = "draft"
+        status: str = "draft",
+        category_id: Optional[int] = None
     ) -> int:
         """Create a new ad"""
         now = datetime.utcnow().isoformat()
@@ -25,12 +46,12 @@ class AdRepository(BaseRepository):
             cursor = conn.cursor()
             
             cursor.execute('''
-                INSERT INTO ads (user_id, ad_type, status, data, file_id, file_path, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO ads (user_id, ad_type, status, data, file_id, file_path, created_at, updated_at, category_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 user_id, ad_type, status, 
                 json.dumps(data, ensure_ascii=False), 
-                file_id, file_path, now, now
+                file_id, file_path, now, now, category_id
             ))
             
             ad_id = cursor.lastrowid
@@ -46,7 +67,17 @@ class AdRepository(BaseRepository):
     def get_by_id(self, ad_id: int) -> Optional[Tuple]:
         """Get ad by ID"""
         return self._execute_query(
-            'SELECT * FROM ads WHERE id = ?',
+            f'SELECT {AD_COLUMNS} FROM ads WHERE id = ?',
+            (ad_id,),
+            fetch_one=True
+        )
+    
+    def get_with_user(self, ad_id: int) -> Optional[Tuple]:
+        """Get ad by ID followed by the owner's username and language"""
+        return self._execute_query(
+            f'''SELECT {AD_COLUMNS_QUALIFIED}, users.username, users.language
+               FROM ads LEFT JOIN users ON users.user_id = ads.user_id
+               WHERE ads.id = ?''',
             (ad_id,),
             fetch_one=True
         )
@@ -54,7 +85,7 @@ class AdRepository(BaseRepository):
     def get_by_user_id(self, user_id: int) -> List[Tuple]:
         """Get all ads by user ID (excluding deleted)"""
         return self._execute_query(
-            '''SELECT * FROM ads WHERE user_id = ? AND status != 'deleted'
+            f'''SELECT {AD_COLUMNS} FROM ads WHERE user_id = ? AND status != 'deleted'
                ORDER BY created_at DESC''',
             (user_id,),
             fetch_all=True
@@ -64,25 +95,123 @@ class AdRepository(BaseRepository):
         """Get pending ads"""
         if ad_type:
             return self._execute_query(
-                '''SELECT * FROM ads WHERE status = 'pending' AND ad_type = ?
+                f'''SELECT {AD_COLUMNS} FROM ads WHERE status = 'pending' AND ad_type = ?
                    ORDER BY created_at ASC''',
                 (ad_type,),
                 fetch_all=True
             )
         else:
             return self._execute_query(
-                '''SELECT * FROM ads WHERE status = 'pending'
+                f'''SELECT {AD_COLUMNS} FROM ads WHERE status = 'pending'
                    ORDER BY created_at ASC''',
                 fetch_all=True
             )
     
+    def get_user_ads_page(
+        self,
+        user_id: int,
+        limit: int,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None
+    ) -> Tuple[List[Tuple], bool, bool]:
+        """Get one page of a user's ads, newest first (see _get_page)"""
+        return self._get_page(
+            "ads.user_id = ? AND ads.status != 'deleted'", (user_id,),
+            descending=True, limit=limit, after_id=after_id, before_id=before_id
+        )
+    
+    def get_pending_page(
+        self,
+        limit: int,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None
+    ) -> Tuple[List[Tuple], bool, bool]:
+        """Get one page of pending ads, oldest first (see _get_page)
+        
+        Each row is the ad columns followed by the owner's username and
+        language (NULL if the user is unknown), read in the same query.
+        """
+        # Without ANALYZE statistics the planner prefers the wider
+        # (status, ad_type, created_at) index and sorts all pending ads
+        return self._get_page(
+            "ads.status = 'pending'", (),
+            descending=False, limit=limit, after_id=after_id, before_id=before_id,
+            index='idx_ads_pending_created', join_users=True
+        )
+    
+    def _get_page(
+        self,
+        where: str,
+        params: tuple,
+        descending: bool,
+        limit: int,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None,
+        index: Optional[str] = None,
+        join_users: bool = False
+    ) -> Tuple[List[Tuple], bool, bool]:
+        """Keyset pagination over (created_at, id)
+        
+        The cursor is the id of the last (after_id) or first (before_id) ad
+        of the current page; its (created_at, id) key is looked up in the
+        same query, so callback data only has to carry the id. Only
+        limit + 1 rows are read, the extra row telling whether there is
+        another page in that direction.
+        
+        Returns:
+            (rows, has_prev, has_next)
+        """
+        forward = before_id is None
+        # Scan direction: reversed when paging backwards
+        scan_desc = descending if forward else not descending
+        order = 'DESC' if scan_desc else 'ASC'
+        
+        cursor_sql = ''
+        cursor_params: tuple = ()
+        anchor_id = after_id if forward else before_id
+        if anchor_id is not None:
+            op = '<' if scan_desc else '>'
+            cursor_sql = (
+                f'AND (ads.created_at, ads.id) {op} '
+                f'(SELECT created_at, id FROM ads AS anchor WHERE anchor.id = ?)'
+            )
+            cursor_params = (anchor_id,)
+        
+        columns = AD_COLUMNS_QUALIFIED
+        join_sql = ''
+        if join_users:
+            columns += ', users.username, users.language'
+            join_sql = 'LEFT JOIN users ON users.user_id = ads.user_id'
+        
+        rows = self._execute_query(
+            f'''SELECT {columns} FROM ads {f"INDEXED BY {index}" if index else ""}
+               {join_sql}
+               WHERE {where} {cursor_sql}
+               ORDER BY ads.created_at {order}, ads.id {order}
+               LIMIT ?''',
+            params + cursor_params + (limit + 1,),
+            fetch_all=True
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        if forward:
+            return rows, after_id is not None, has_more
+        rows.reverse()
+        return rows, has_more, True
+    
     def update_status(
         self, 
         ad_id: int, 
         status: str, 
-        approved_by: Optional[int] = None
+        approved_by: Optional[int] = None,
+        expected_status: Optional[str] = None
     ) -> bool:
-        """Update ad status"""
+        """Update ad status
+        
+        With expected_status the update only happens if the ad is currently
+        in that status (e.g. moderation of a 'pending' ad).
+        """
         with get_db_connection() as conn:
             cursor = conn.cursor()
             
@@ -93,6 +222,8 @@ class AdRepository(BaseRepository):
                 return False
             
             old_status = result[0]
+            if expected_status is not None and old_status != expected_status:
+                return False
             now = datetime.utcnow().isoformat()
             
             # Update status
@@ -121,63 +252,93 @@ class AdRepository(BaseRepository):
         new_file_id: Optional[str] = None,
         new_file_path: Optional[str] = None
     ) -> bool:
-        """Update ad data"""
+        """Update ad data
+        
+        category_id is re-derived when the category (employer) or
+        profession (graduate) name in the data changes; an unchanged name
+        keeps the stored id, which survives category renames.
+        """
         with get_db_connection() as conn:
             cursor = conn.cursor()
             
             # Get old data
-            cursor.execute('SELECT data, file_id FROM ads WHERE id = ?', (ad_id,))
+            cursor.execute('SELECT data, file_id, ad_type FROM ads WHERE id = ?', (ad_id,))
             result = cursor.fetchone()
             if not result:
                 return False
             
-            old_data_json, old_file_id = result
+            old_data_json, old_file_id, ad_type = result
+            old_data = json.loads(old_data_json)
             now = datetime.utcnow().isoformat()
+            category_field = 'category' if ad_type == 'employer' else 'profession'
+            category_name = new_data.get(category_field)
+            if category_name == old_data.get(category_field):
+                category_id_sql = 'COALESCE(?, category_id)'
+                category_name = None
+            else:
+                category_id_sql = '(SELECT id FROM categories WHERE name = ?)'
             
             # Update data
             if new_file_id and new_file_path:
-                cursor.execute('''
-                    UPDATE ads SET data = ?, file_id = ?, file_path = ?, updated_at = ?
-                    WHERE id = ?
+                cursor.execute(f'''
+                    UPDATE ads SET data = ?, category_id = {category_id_sql}, file_id = ?, file_path = ?,
+                    updated_at = ? WHERE id = ?
                 ''', (
-                    json.dumps(new_data, ensure_ascii=False), 
+                    json.dumps(new_data, ensure_ascii=False), category_name,
                     new_file_id, new_file_path, now, ad_id
                 ))
             elif new_file_id:
-                cursor.execute('''
-                    UPDATE ads SET data = ?, file_id = ?, updated_at = ?
+                cursor.execute(f'''
+                    UPDATE ads SET data = ?, category_id = {category_id_sql}, file_id = ?, updated_at = ?
                     WHERE id = ?
                 ''', (
-                    json.dumps(new_data, ensure_ascii=False), 
+                    json.dumps(new_data, ensure_ascii=False), category_name,
                     new_file_id, now, ad_id
                 ))
             else:
-                cursor.execute('''
-                    UPDATE ads SET data = ?, updated_at = ?
+                cursor.execute(f'''
+                    UPDATE ads SET data = ?, category_id = {category_id_sql}, updated_at = ?
                     WHERE id = ?
-                ''', (json.dumps(new_data, ensure_ascii=False), now, ad_id))
+                ''', (json.dumps(new_data, ensure_ascii=False), category_name, now, ad_id))
             
-            # Add to history
+            # Add to history as a field-level diff, with a full snapshot
+            # every HISTORY_SNAPSHOT_INTERVAL edits
+            diff = make_diff(old_data, new_data)
+            snapshot = None
+            if self._edits_since_snapshot(cursor, ad_id) + 1 >= HISTORY_SNAPSHOT_INTERVAL:
+                snapshot = json.dumps(new_data, ensure_ascii=False)
             cursor.execute('''
-                INSERT INTO ad_history (ad_id, action, old_data, new_data, changed_by, created_at)
+                INSERT INTO ad_history (ad_id, action, new_data, diff, changed_by, created_at)
                 VALUES (?, 'updated', ?, ?, ?, ?)
-            ''', (
-                ad_id, old_data_json, 
-                json.dumps(new_data, ensure_ascii=False), 
-                0, now
-            ))
+            ''', (ad_id, snapshot, dumps(diff), 0, now))
             
             return True
     
+    def _edits_since_snapshot(self, cursor, ad_id: int) -> int:
+        """Count 'updated' history entries after the ad's latest full snapshot"""
+        cursor.execute('''
+            SELECT COUNT(*) FROM ad_history
+            WHERE ad_id = ? AND action = 'updated'
+              AND id > COALESCE(
+                  (SELECT MAX(id) FROM ad_history WHERE ad_id = ? AND new_data IS NOT NULL), 0
+              )
+        ''', (ad_id, ad_id))
+        return cursor.fetchone()[0]
+    
     def update_field(
         self,
         ad_id: int,
         field_name: str,
         old_value: str,
         new_value: str,
-        changed_by: int
+        changed_by: int,
+        category_id: Optional[int] = None
     ) -> bool:
-        """Update a single field in ad"""
+        """Update a single field in ad
+        
+        category_id is stored alongside when the edited field is the
+        category (employer) or profession (graduate).
+        """
         with get_db_connection() as conn:
             cursor = conn.cursor()
             
@@ -192,9 +353,14 @@ class AdRepository(BaseRepository):
             now = datetime.utcnow().isoformat()
             
             # Update data
-            cursor.execute('''
-                UPDATE ads SET data = ?, updated_at = ? WHERE id = ?
-            ''', (json.dumps(ad_data, ensure_ascii=False), now, ad_id))
+            if category_id is not None:
+                cursor.execute('''
+                    UPDATE ads SET data = ?, category_id = ?, updated_at = ? WHERE id = ?
+                ''', (json.dumps(ad_data, ensure_ascii=False), category_id, now, ad_id))
+            else:
+                cursor.execute('''
+                    UPDATE ads SET data = ?, updated_at = ? WHERE id = ?
+                ''', (json.dumps(ad_data, ensure_ascii=False), now, ad_id))
             
             # Add to history
             cursor.execute('''
@@ -204,67 +370,111 @@ class AdRepository(BaseRepository):
             
             return True
     
-    def get_approved_by_category(self, category_name: str, limit: int = 20) -> List[Tuple]:
+    def get_approved_by_category(self, category_id: int, limit: int = 20) -> List[Tuple]:
         """Get approved ads by category"""
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT * FROM ads WHERE status = 'approved' 
-                ORDER BY approved_at DESC NULLS LAST, created_at DESC
-            """)
-            rows = cursor.fetchall()
-        
-        results = []
-        for row in rows:
-            try:
-                data = json.loads(row[4])
-            except Exception:
-                continue
-            
-            if row[2] == 'employer' and data.get('category') == category_name:
-                results.append(row)
-            elif row[2] == 'graduate' and data.get('profession') == category_name:
-                results.append(row)
-            
-            if len(results) >= limit:
-                break
-        
-        return results
+        # SQLite sorts NULL approved_at last under DESC
+        return self._execute_query(
+            f'''SELECT {AD_COLUMNS} FROM ads
+               WHERE status = 'approved' AND category_id = ?
+               ORDER BY approved_at DESC, created_at DESC
+               LIMIT ?''',
+            (category_id, limit),
+            fetch_all=True
+        )
     
     def get_stats(self) -> Dict[str, int]:
         """Get ad statistics"""
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT COUNT(*) FROM ads')
-            total = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM ads WHERE status = 'approved'")
-            approved = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM ads WHERE status = 'pending'")
-            pending = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM ads WHERE status = 'rejected'")
-            rejected = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM ads WHERE status = 'cancelled'")
-            cancelled = cursor.fetchone()[0]
-            
-            return {
-                'total': total,
-                'approved': approved,
-                'pending': pending,
-                'rejected': rejected,
-                'cancelled': cancelled
-            }
+        if STATS_MODE == 'scan':
+            return self._get_stats_scan()
+        
+        counters = self._get_counters(
+            ['ads:total'] + [f'ads:status:{status}' for status in STAT_STATUSES]
+        )
+        stats = {'total': counters['ads:total']}
+        for status in STAT_STATUSES:
+            stats[status] = counters[f'ads:status:{status}']
+        return stats
+    
+    def _get_stats_scan(self) -> Dict[str, int]:
+        """Get ad statistics with a single GROUP BY scan"""
+        rows = self._execute_query(
+            'SELECT status, COUNT(*) FROM ads GROUP BY status',
+            fetch_all=True
+        )
+        by_status = dict(rows)
+        stats = {'total': sum(by_status.values())}
+        for status in STAT_STATUSES:
+            stats[status] = by_status.get(status, 0)
+        return stats
     
     def get_history(self, ad_id: int) -> List[Tuple]:
-        """Get ad history"""
-        return self._execute_query(
-            '''SELECT * FROM ad_history WHERE ad_id = ? 
-               ORDER BY created_at DESC''',
+        """Get ad history (newest first)
+        
+        Diff entries are expanded back to full old_data/new_data, so rows
+        keep the original ad_history column layout.
+        """
+        rows = self._execute_query(
+            f'''SELECT {HISTORY_COLUMNS} FROM ad_history WHERE ad_id = ?
+               ORDER BY id''',
             (ad_id,),
             fetch_all=True
         )
+        timeline = rebuild_timeline(rows)
+        timeline.reverse()
+        return timeline
+    
+    def compact_history(self, batch_size: int = 200) -> Dict[str, int]:
+        """Convert legacy full-blob 'updated' entries of up to batch_size ads to diffs
+        
+        Every HISTORY_SNAPSHOT_INTERVAL-th edit of an ad keeps its full
+        new_data as a snapshot. Returns counts and the bytes saved.
+        """
+        result = {'ads': 0, 'rows': 0, 'bytes_before': 0, 'bytes_after': 0}
+        
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT DISTINCT ad_id FROM ad_history
+                WHERE action = 'updated' AND old_data IS NOT NULL
+                LIMIT ?
+            ''', (batch_size,))
+            ad_ids = [row[0] for row in cursor.fetchall()]
+            
+            for ad_id in ad_ids:
+                cursor.execute(
+                    '''SELECT id, action, old_data, new_data, diff FROM ad_history
+                       WHERE ad_id = ? ORDER BY id''',
+                    (ad_id,)
+                )
+                edits = 0
+                updates = []
+                for history_id, action, old_data, new_data, diff in cursor.fetchall():
+                    if new_data is not None and action != 'updated':
+                        edits = 0  # 'created' entry: full data
+                        continue
+                    if action != 'updated':
+                        continue
+                    edits += 1
+                    if old_data is None:
+                        if new_data is not None:
+                            edits = 0
+                        continue
+                    
+                    new_diff = dumps(make_diff(json.loads(old_data), json.loads(new_data)))
+                    keep_snapshot = edits >= HISTORY_SNAPSHOT_INTERVAL
+                    if keep_snapshot:
+                        edits = 0
+                    result['bytes_before'] += len(old_data.encode()) + len(new_data.encode())
+                    result['bytes_after'] += len(new_diff.encode()) + (len(new_data.encode()) if keep_snapshot else 0)
+                    updates.append((new_data if keep_snapshot else None, new_diff, history_id))
+                
+                cursor.executemany(
+                    'UPDATE ad_history SET old_data = NULL, new_data = ?, diff = ? WHERE id = ?',
+                    updates
+                )
+                result['ads'] += 1
+                result['rows'] += len(updates)
+        
+        result['bytes_saved'] = result['bytes_before'] - result['bytes_after']
+        return result
 
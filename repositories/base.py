@@ -1,6 +1,6 @@
 """Base repository class"""
 from abc import ABC
-from typing import Any, Optional
+from typing import Any, Dict, Iterable, Optional
 from database.connection import get_db_connection
 from config import DATABASE_PATH
 
@@ -35,4 +35,16 @@ class BaseRepository(ABC):
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.executemany(query, params_list)
-
+    
+    def _get_counters(self, names: Iterable[str]) -> Dict[str, int]:
+        """Read trigger-maintained counters (missing counters are 0)"""
+        names = list(names)
+        placeholders = ', '.join('?' for _ in names)
+        rows = self._execute_query(
+            f'SELECT name, value FROM counters WHERE name IN ({placeholders})',
+            tuple(names),
+            fetch_all=True
+        )
+        counters = dict.fromkeys(names, 0)
+        counters.update(rows)
+        return counters
@@ -0,0 +1,117 @@
+"""Broadcast repository for database operations"""
+from datetime import datetime
+from typing import List, Optional, Tuple
+from repositories.base import BaseRepository
+from database.connection import get_db_connection
+
+BROADCAST_COLUMNS = (
+    "id, text, created_by, chat_id, progress_message_id, status, "
+    "last_user_id, total, sent, failed, blocked, created_at, finished_at"
+)
+
+
+class BroadcastRepository(BaseRepository):
+    """Repository for admin broadcasts"""
+    
+    def create(self, text: str, created_by: int, chat_id: int) -> Tuple[int, int]:
+        """Create a running broadcast; returns (broadcast_id, recipients)"""
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT COUNT(*) FROM users
+                WHERE user_id NOT IN (SELECT user_id FROM blocked_users)
+            ''')
+            total = cursor.fetchone()[0]
+            cursor.execute('''
+                INSERT INTO broadcasts (text, created_by, chat_id, total, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (text, created_by, chat_id, total, datetime.utcnow().isoformat()))
+            return cursor.lastrowid, total
+    
+    def set_progress_message(self, broadcast_id: int, message_id: int) -> None:
+        """Remember the admin message that shows progress"""
+        self._execute_query(
+            'UPDATE broadcasts SET progress_message_id = ? WHERE id = ?',
+            (message_id, broadcast_id)
+        )
+    
+    def get_by_id(self, broadcast_id: int) -> Optional[Tuple]:
+        """Get broadcast by ID"""
+        return self._execute_query(
+            f'SELECT {BROADCAST_COLUMNS} FROM broadcasts WHERE id = ?',
+            (broadcast_id,),
+            fetch_one=True
+        )
+    
+    def get_running(self) -> List[Tuple]:
+        """Get broadcasts interrupted by a restart"""
+        return self._execute_query(
+            f"SELECT {BROADCAST_COLUMNS} FROM broadcasts WHERE status = 'running' ORDER BY id",
+            fetch_all=True
+        )
+    
+    def get_recipients(self, broadcast_id: int, after_user_id: int, limit: int) -> List[int]:
+        """Get the next recipients after ``after_user_id`` (keyset cursor)
+        
+        Walks the users primary key, so each batch is a short index range
+        scan; blocked users and users already handled by this broadcast are
+        skipped.
+        """
+        rows = self._execute_query(
+            '''SELECT u.user_id FROM users u
+               WHERE u.user_id > ?
+                 AND NOT EXISTS (SELECT 1 FROM blocked_users b WHERE b.user_id = u.user_id)
+                 AND NOT EXISTS (
+                     SELECT 1 FROM broadcast_deliveries d
+                     WHERE d.broadcast_id = ? AND d.user_id = u.user_id
+                 )
+               ORDER BY u.user_id
+               LIMIT ?''',
+            (after_user_id, broadcast_id, limit),
+            fetch_all=True
+        )
+        return [row[0] for row in rows]
+    
+    def record_delivery(
+        self,
+        broadcast_id: int,
+        user_id: int,
+        status: str,
+        error: Optional[str],
+        last_user_id: int
+    ) -> None:
+        """Store one recipient's result and advance the cursor atomically
+        
+        Args:
+            status: 'sent', 'failed' or 'blocked'
+            last_user_id: cursor to store; every recipient up to it must
+                already be recorded
+        """
+        now = datetime.utcnow().isoformat()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO broadcast_deliveries (broadcast_id, user_id, status, error, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (broadcast_id, user_id, status, error, now))
+            if status == 'blocked':
+                cursor.execute('''
+                    INSERT OR REPLACE INTO blocked_users (user_id, reason, blocked_at)
+                    VALUES (?, ?, ?)
+                ''', (user_id, error, now))
+            cursor.execute('''
+                UPDATE broadcasts
+                SET last_user_id = MAX(last_user_id, ?),
+                    sent = sent + ?, failed = failed + ?, blocked = blocked + ?
+                WHERE id = ?
+            ''', (
+                last_user_id, int(status == 'sent'), int(status == 'failed'), int(status == 'blocked'),
+                broadcast_id
+            ))
+    
+    def finish(self, broadcast_id: int, status: str = 'done') -> None:
+        """Mark a broadcast as finished ('done' or 'cancelled')"""
+        self._execute_query(
+            'UPDATE broadcasts SET status = ?, finished_at = ? WHERE id = ?',
+            (status, datetime.utcnow().isoformat(), broadcast_id)
+        )
@@ -1,15 +1,81 @@
 """Category repository for database operations"""
+import threading
 from datetime import datetime
-from typing import List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 from repositories.base import BaseRepository
 from database.connection import get_db_connection
 
 
+class CategoryCatalog:
+    """In-process snapshot of the categories table
+
+    Holds the categories ordered by name plus an id -> name index. The
+    snapshot is loaded on first use and replaced by ``refresh()`` after
+    every write; readers keep getting the previous snapshot until the new
+    one is loaded, so a write never makes the event loop query the
+    database. ``version`` is bumped on each replacement so derived caches
+    can tell when they are stale.
+    """
+
+    def __init__(self):
+        self._items: Optional[List[Tuple[int, str]]] = None
+        self._index: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        # Refresh tickets: handed out before loading, so the newest load wins
+        self._requested = 0
+        self._loaded = 0
+        self.version = 0
+
+    def get(self, loader: Callable[[], List[Tuple[int, str]]]) -> Tuple[List[Tuple[int, str]], Dict[int, str]]:
+        """Get (ordered list, index), loading them with ``loader`` on first use"""
+        items, index = self._items, self._index
+        if items is None:
+            self.refresh(loader)
+            items, index = self._items, self._index
+        return items, index
+
+    def refresh(self, loader: Callable[[], List[Tuple[int, str]]]) -> None:
+        """Load a new snapshot and publish it (called after category writes commit)"""
+        with self._lock:
+            self._requested += 1
+            ticket = self._requested
+        items = [tuple(row) for row in loader()]
+        with self._lock:
+            # A refresh started later saw newer data; keep its snapshot
+            if ticket > self._loaded:
+                self._loaded = ticket
+                self._index = dict(items)
+                self._items = items
+                self.version += 1
+
+
+category_catalog = CategoryCatalog()
+
+
 class CategoryRepository(BaseRepository):
     """Repository for category database operations"""
     
     def get_all(self) -> List[Tuple[int, str]]:
-        """Get all categories"""
+        """Get all categories (served from the catalog)"""
+        return category_catalog.get(self._load_all)[0]
+    
+    def get_name(self, category_id: int) -> Optional[str]:
+        """Get category name by ID (served from the catalog)"""
+        return category_catalog.get(self._load_all)[1].get(category_id)
+    
+    def reload_catalog(self) -> None:
+        """Replace the catalog snapshot with the current table"""
+        category_catalog.refresh(self._load_all)
+    
+    def get_version(self) -> int:
+        """Version of the categories table, bumped by triggers on every write
+        
+        Lets other processes notice writes they did not make.
+        """
+        return self._get_counters(['categories:version'])['categories:version']
+    
+    def _load_all(self) -> List[Tuple[int, str]]:
+        """Load all categories from the database"""
         return self._execute_query(
             'SELECT id, name FROM categories ORDER BY name',
             fetch_all=True
@@ -22,6 +88,7 @@ class CategoryRepository(BaseRepository):
             cursor.execute('''
                 INSERT INTO categories (name, created_at) VALUES (?, ?)
             ''', (name, datetime.utcnow().isoformat()))
+        self.reload_catalog()
     
     def get_by_id(self, category_id: int) -> Optional[Tuple]:
         """Get category by ID"""
@@ -39,12 +106,16 @@ class CategoryRepository(BaseRepository):
                 'UPDATE categories SET name = ? WHERE id = ?',
                 (new_name, category_id)
             )
-            return cursor.rowcount > 0
+            updated = cursor.rowcount > 0
+        self.reload_catalog()
+        return updated
     
     def delete(self, category_id: int) -> bool:
         """Delete category"""
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM categories WHERE id = ?', (category_id,))
-            return cursor.rowcount > 0
+            deleted = cursor.rowcount > 0
+        self.reload_catalog()
+        return deleted
 
@@ -0,0 +1,157 @@
+"""File repository for database operations"""
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from repositories.base import BaseRepository
+from database.connection import get_db_connection
+
+# Files attached to pending ads must survive until moderation. Only
+# referenced files can be pinned; the lookup uses idx_ads_file_path_pending.
+NOT_PINNED = '''(files.refcount <= 0 OR NOT EXISTS (
+    SELECT 1 FROM ads
+    WHERE ads.file_path = files.path AND ads.status = 'pending'
+))'''
+
+
+class FileRepository(BaseRepository):
+    """Repository for the content-addressed resume store
+    
+    ``files.refcount`` is maintained by triggers on ``ads`` (migration 8),
+    so it changes in the same transaction as the ad that references the
+    file.
+    """
+    
+    def get_path_by_unique_id(self, unique_id: str) -> Optional[str]:
+        """Get the stored path of a Telegram file that is being reused
+        
+        Reuse counts as a fresh upload for the age-based cleanup.
+        """
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT files.sha256, files.path FROM file_ids
+                JOIN files ON files.sha256 = file_ids.sha256
+                WHERE file_ids.unique_id = ?
+            ''', (unique_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            now = datetime.utcnow().isoformat()
+            cursor.execute(
+                'UPDATE files SET accessed_at = ?, mtime = ? WHERE sha256 = ?',
+                (now, now, row[0])
+            )
+            return row[1]
+    
+    def add(self, unique_id: str, sha256: str, path: str, size: int) -> str:
+        """Register stored content and return its path
+        
+        If the content is already stored (under another file_unique_id),
+        the existing path is returned and ``path`` is not used.
+        """
+        now = datetime.utcnow().isoformat()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO files (sha256, path, size, mtime, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (sha256) DO UPDATE SET
+                    accessed_at = excluded.accessed_at, mtime = excluded.mtime
+            ''', (sha256, path, size, now, now, now))
+            cursor.execute(
+                'INSERT OR REPLACE INTO file_ids (unique_id, sha256) VALUES (?, ?)',
+                (unique_id, sha256)
+            )
+            cursor.execute('SELECT path FROM files WHERE sha256 = ?', (sha256,))
+            return cursor.fetchone()[0]
+    
+    def is_known(self, path: str) -> bool:
+        """Check whether a path is tracked in the files table"""
+        return self._execute_query(
+            'SELECT 1 FROM files WHERE path = ?', (path,), fetch_one=True
+        ) is not None
+    
+    def register_legacy(self, path: str, sha256: str, size: int, mtime: str) -> str:
+        """Track a file stored before the files table existed
+        
+        Returns the tracked path. If the same content is already tracked,
+        ads pointing at ``path`` are moved to the tracked copy and the
+        caller should delete ``path``.
+        """
+        now = datetime.utcnow().isoformat()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT path FROM files WHERE sha256 = ?', (sha256,))
+            row = cursor.fetchone()
+            if row:
+                # The refcount trigger moves the references along
+                cursor.execute(
+                    'UPDATE ads SET file_path = ? WHERE file_path = ?', (row[0], path)
+                )
+                return row[0]
+            
+            cursor.execute('''
+                INSERT INTO files (sha256, path, size, mtime, refcount, ad_id, created_at, accessed_at)
+                SELECT ?, ?, ?, ?, COUNT(*), MAX(id), ?, ?
+                FROM ads WHERE file_path = ? AND status != 'deleted'
+            ''', (sha256, path, size, mtime, now, now, path))
+            return path
+    
+    def delete_modified_before(self, cutoff: str, limit: int) -> List[Tuple[str, int]]:
+        """Forget up to ``limit`` files stored before ``cutoff`` (ISO time)
+        
+        Files attached to pending ads are pinned until moderation.
+        Returns (path, size) of the forgotten files.
+        """
+        return self._delete_where(
+            f'SELECT sha256 FROM files WHERE mtime < ? AND {NOT_PINNED} ORDER BY mtime LIMIT ?',
+            (cutoff, limit)
+        )
+    
+    def delete_unreferenced(self, grace_seconds: int, limit: int) -> List[Tuple[str, int]]:
+        """Forget up to ``limit`` files no ad references
+        
+        Files accessed within ``grace_seconds`` are kept: they were just
+        stored or reused and the ad referencing them may not exist yet.
+        Returns (path, size) of the forgotten files.
+        """
+        cutoff = (datetime.utcnow() - timedelta(seconds=grace_seconds)).isoformat()
+        return self._delete_where(
+            'SELECT sha256 FROM files WHERE refcount <= 0 AND accessed_at < ? LIMIT ?',
+            (cutoff, limit)
+        )
+    
+    def delete_least_recently_used(self, bytes_needed: int, limit: int) -> List[Tuple[str, int]]:
+        """Forget the least recently accessed files until ``bytes_needed`` are freed
+        
+        Files attached to pending ads are pinned. At most ``limit`` files
+        are forgotten per call. Returns (path, size) of the forgotten files.
+        """
+        return self._delete_where(
+            f'''SELECT sha256 FROM (
+                   SELECT sha256, SUM(size) OVER (ORDER BY accessed_at ROWS UNBOUNDED PRECEDING)
+                          - size AS freed_before
+                   FROM files
+                   WHERE {NOT_PINNED}
+                   ORDER BY accessed_at
+                   LIMIT ?
+               ) WHERE freed_before < ?''',
+            (limit, bytes_needed)
+        )
+    
+    def get_total_bytes(self) -> int:
+        """Bytes of all stored files (trigger-maintained counter)"""
+        return self._get_counters(['files:bytes'])['files:bytes']
+    
+    def _delete_where(self, select_query: str, params: tuple) -> List[Tuple[str, int]]:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f'DELETE FROM files WHERE sha256 IN ({select_query}) RETURNING sha256, path, size',
+                params
+            )
+            rows = cursor.fetchall()
+            cursor.executemany(
+                'DELETE FROM file_ids WHERE sha256 = ?',
+                [(row[0],) for row in rows]
+            )
+            return [(row[1], row[2]) for row in rows]
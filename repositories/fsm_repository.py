@@ -0,0 +1,44 @@
+"""FSM storage repository for database operations"""
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple
+from repositories.base import BaseRepository
+from database.connection import get_db_connection
+
+
+class FsmRepository(BaseRepository):
+    """Repository for persisted FSM state and data (JSON text)"""
+    
+    def get(self, key: str) -> Optional[Tuple[Optional[str], str]]:
+        """Get (state, data) of a key"""
+        return self._execute_query(
+            'SELECT state, data FROM fsm_storage WHERE key = ?',
+            (key,),
+            fetch_one=True
+        )
+    
+    def save_many(
+        self,
+        rows: Iterable[Tuple[str, Optional[str], str]],
+        deleted_keys: Iterable[str]
+    ) -> None:
+        """Upsert (key, state, data) rows and delete emptied keys in one transaction"""
+        now = datetime.utcnow().isoformat()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO fsm_storage (key, state, data, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    state = excluded.state, data = excluded.data, updated_at = excluded.updated_at
+            ''', [(key, state, data, now) for key, state, data in rows])
+            cursor.executemany(
+                'DELETE FROM fsm_storage WHERE key = ?',
+                [(key,) for key in deleted_keys]
+            )
+    
+    def delete_expired(self, ttl_hours: int) -> int:
+        """Delete conversations untouched for ttl_hours; returns the count"""
+        cutoff = (datetime.utcnow() - timedelta(hours=ttl_hours)).isoformat()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM fsm_storage WHERE updated_at < ?', (cutoff,))
+            return cursor.rowcount
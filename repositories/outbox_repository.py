@@ -0,0 +1,55 @@
+"""Outbox repository for database operations"""
+import json
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from repositories.base import BaseRepository
+
+
+class OutboxRepository(BaseRepository):
+    """Repository for the transactional outbox
+
+    Rows are added inside the caller's transaction (e.g. together with an
+    ad status change), so a delivery is recorded if and only if the change
+    it belongs to is committed.
+    """
+    
+    def add(self, kind: str, payload: dict) -> int:
+        """Queue a delivery"""
+        now = datetime.utcnow().isoformat()
+        return self._execute_query(
+            '''INSERT INTO outbox (kind, payload, next_attempt_at, created_at)
+               VALUES (?, ?, ?, ?)''',
+            (kind, json.dumps(payload, ensure_ascii=False), now, now)
+        )
+    
+    def get_due(self, limit: int = 20) -> List[Tuple]:
+        """Get pending deliveries whose next attempt is due (oldest first)"""
+        return self._execute_query(
+            '''SELECT id, kind, payload, attempts FROM outbox
+               WHERE status = 'pending' AND next_attempt_at <= ?
+               ORDER BY next_attempt_at, id
+               LIMIT ?''',
+            (datetime.utcnow().isoformat(), limit),
+            fetch_all=True
+        )
+    
+    def mark_sent(self, outbox_id: int) -> None:
+        """Remove a delivered entry"""
+        self._execute_query('DELETE FROM outbox WHERE id = ?', (outbox_id,))
+    
+    def mark_retry(self, outbox_id: int, error: str, delay_seconds: float) -> None:
+        """Record a failed attempt and schedule the next one"""
+        next_attempt_at = (datetime.utcnow() + timedelta(seconds=delay_seconds)).isoformat()
+        self._execute_query(
+            '''UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?
+               WHERE id = ?''',
+            (next_attempt_at, error[:500], outbox_id)
+        )
+    
+    def mark_failed(self, outbox_id: int, error: str) -> None:
+        """Give up on an entry (kept for inspection)"""
+        self._execute_query(
+            '''UPDATE outbox SET status = 'failed', attempts = attempts + 1, last_error = ?
+               WHERE id = ?''',
+            (error[:500], outbox_id)
+        )
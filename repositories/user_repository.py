@@ -1,8 +1,13 @@
 """User repository for database operations"""
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Dict, Iterable, Optional, Tuple
 from repositories.base import BaseRepository
 from database.connection import get_db_connection
+from config import STATS_MODE, USER_CACHE_SIZE, USER_CACHE_TTL
+from utils.cache import TTLCache
+
+# user_id -> User (or None for unknown users), invalidated on write
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
 
 
 class UserRepository(BaseRepository):
@@ -32,6 +37,13 @@ class UserRepository(BaseRepository):
                     INSERT INTO users (user_id, username, role, language, created_at)
                     VALUES (?, ?, ?, ?, ?)
                 ''', (user_id, username, role, language or 'uz', datetime.utcnow().isoformat()))
+            
+            # The user is talking to the bot again, so broadcasts may reach them
+            cursor.execute('DELETE FROM blocked_users WHERE user_id = ?', (user_id,))
+        
+        # Invalidate after commit; a reader that fetched the old row before
+        # this point took its cache token earlier, so its set is dropped
+        user_cache.pop(user_id)
     
     def get_by_id(self, user_id: int) -> Optional[Tuple]:
         """Get user by ID"""
@@ -41,23 +53,41 @@ class UserRepository(BaseRepository):
             fetch_one=True
         )
     
+    def get_by_ids(self, user_ids: Iterable[int]) -> Dict[int, Tuple]:
+        """Get several users in one query per chunk; missing ids are omitted"""
+        user_ids = list(dict.fromkeys(user_ids))
+        users: Dict[int, Tuple] = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start:start + 500]
+            placeholders = ', '.join('?' for _ in chunk)
+            rows = self._execute_query(
+                f'SELECT * FROM users WHERE user_id IN ({placeholders})',
+                tuple(chunk),
+                fetch_all=True
+            )
+            users.update((row[0], row) for row in rows)
+        return users
+    
     def get_stats(self) -> dict:
         """Get user statistics"""
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT COUNT(*) FROM users')
-            total = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'graduate'")
-            graduates = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'employer'")
-            employers = cursor.fetchone()[0]
-            
+        if STATS_MODE == 'scan':
+            rows = self._execute_query(
+                'SELECT role, COUNT(*) FROM users GROUP BY role',
+                fetch_all=True
+            )
+            by_role = dict(rows)
             return {
-                'total': total,
-                'graduates': graduates,
-                'employers': employers
+                'total': sum(by_role.values()),
+                'graduates': by_role.get('graduate', 0),
+                'employers': by_role.get('employer', 0)
             }
-
+        
+        counters = self._get_counters(
+            ['users:total', 'users:role:graduate', 'users:role:employer']
+        )
+        return {
+            'total': counters['users:total'],
+            'graduates': counters['users:role:graduate'],
+            'employers': counters['users:role:employer']
+        }
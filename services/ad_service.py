@@ -18,15 +18,20 @@ class AdService:
         data: dict,
         file_id: Optional[str] = None,
         file_path: Optional[str] = None,
-        status: str = "draft"
+        status: str = "draft",
+        category_id: Optional[int] = None
     ) -> int:
         """Create a new ad"""
-        return self.repository.create(user_id, ad_type, data, file_id, file_path, status)
+        return self.repository.create(user_id, ad_type, data, file_id, file_path, status, category_id)
     
     def get_ad(self, ad_id: int) -> Optional[Tuple]:
         """Get ad by ID"""
         return self.repository.get_by_id(ad_id)
     
+    def get_ad_with_user(self, ad_id: int) -> Optional[Tuple]:
+        """Get ad by ID followed by the owner's username and language"""
+        return self.repository.get_with_user(ad_id)
+    
     def get_user_ads(self, user_id: int) -> List[Tuple]:
         """Get all ads by user ID"""
         return self.repository.get_by_user_id(user_id)
@@ -35,14 +40,44 @@ class AdService:
         """Get pending ads"""
         return self.repository.get_pending(ad_type)
     
+    def get_user_ads_page(
+        self,
+        user_id: int,
+        limit: int = 10,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None
+    ) -> Tuple[List[Tuple], bool, bool]:
+        """Get one page of user's ads: (ads, has_prev, has_next)"""
+        ads, has_prev, has_next = self.repository.get_user_ads_page(user_id, limit, after_id, before_id)
+        if not ads and (after_id or before_id):
+            # The cursor ad is gone; start over from the first page
+            return self.repository.get_user_ads_page(user_id, limit)
+        return ads, has_prev, has_next
+    
+    def get_pending_ads_page(
+        self,
+        limit: int = 20,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None
+    ) -> Tuple[List[Tuple], bool, bool]:
+        """Get one page of pending ads: (ads, has_prev, has_next)
+        
+        Each ad row ends with the owner's username and language.
+        """
+        ads, has_prev, has_next = self.repository.get_pending_page(limit, after_id, before_id)
+        if not ads and (after_id or before_id):
+            return self.repository.get_pending_page(limit)
+        return ads, has_prev, has_next
+    
     def update_ad_status(
         self,
         ad_id: int,
         status: str,
-        approved_by: Optional[int] = None
+        approved_by: Optional[int] = None,
+        expected_status: Optional[str] = None
     ) -> bool:
         """Update ad status"""
-        return self.repository.update_status(ad_id, status, approved_by)
+        return self.repository.update_status(ad_id, status, approved_by, expected_status)
     
     def update_ad_data(
         self,
@@ -60,14 +95,17 @@ class AdService:
         field_name: str,
         old_value: str,
         new_value: str,
-        changed_by: int
+        changed_by: int,
+        category_id: Optional[int] = None
     ) -> bool:
         """Update a single field in ad"""
-        return self.repository.update_field(ad_id, field_name, old_value, new_value, changed_by)
+        return self.repository.update_field(
+            ad_id, field_name, old_value, new_value, changed_by, category_id
+        )
     
-    def get_approved_ads_by_category(self, category_name: str, limit: int = 20) -> List[Tuple]:
+    def get_approved_ads_by_category(self, category_id: int, limit: int = 20) -> List[Tuple]:
         """Get approved ads by category"""
-        return self.repository.get_approved_by_category(category_name, limit)
+        return self.repository.get_approved_by_category(category_id, limit)
     
     def get_ad_stats(self) -> Dict[str, int]:
         """Get ad statistics"""
@@ -1,10 +1,17 @@
 """Admin service for admin panel business logic"""
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from services.user_service import UserService
 from services.ad_service import AdService
 from services.category_service import CategoryService
+from repositories.outbox_repository import OutboxRepository
+from repositories.broadcast_repository import BroadcastRepository
 from utils.text_formatters import format_ad_text, format_date, get_status_text
+from data.languages import get_text
+from database.connection import get_db_connection, read_transaction, write_transaction
+from database.profiling import get_top_queries, explain
+from config import MAIN_CHANNEL_USERNAME
 import json
+import sqlite3
 
 
 class AdminService:
@@ -14,19 +21,112 @@ class AdminService:
         self.user_service = UserService()
         self.ad_service = AdService()
         self.category_service = CategoryService()
+        self.outbox = OutboxRepository()
+        self.broadcasts = BroadcastRepository()
     
     def get_full_statistics(self) -> Dict:
         """Get full statistics for admin panel"""
-        user_stats = self.user_service.get_user_stats()
-        ad_stats = self.ad_service.get_ad_stats()
+        # One read transaction so user and ad numbers agree with each other
+        with read_transaction():
+            user_stats = self.user_service.get_user_stats()
+            ad_stats = self.ad_service.get_ad_stats()
         
         return {
             'users': user_stats,
             'ads': ad_stats
         }
     
-    def format_pending_ad_details(self, ad: Tuple, language: str = "uz") -> str:
-        """Format pending ad with full details"""
+    def approve_ad(self, ad_id: int, admin_id: int) -> Tuple[bool, Optional[str]]:
+        """Approve a pending ad
+        
+        The status change, the channel post and the user notification are
+        committed in one transaction; the posts are delivered by the outbox
+        worker afterwards.
+        """
+        with write_transaction():
+            ad = self.ad_service.get_ad(ad_id)
+            if not ad:
+                return False, "E'lon topilmadi!"
+            if not self.ad_service.update_ad_status(ad_id, "approved", admin_id, expected_status="pending"):
+                return False, "E'lon allaqachon ko'rib chiqilgan!"
+            
+            ad_type, data, file_id = ad[2], ad[4], ad[5]
+            ad_text = format_ad_text(json.loads(data), ad_type)
+            if ad_type == "graduate" and file_id:  # Has resume
+                self.outbox.add('send_document', {
+                    'chat_id': MAIN_CHANNEL_USERNAME,
+                    'document': file_id,
+                    'caption': ad_text,
+                    'parse_mode': "HTML"
+                })
+            else:
+                self.outbox.add('send_message', {
+                    'chat_id': MAIN_CHANNEL_USERNAME,
+                    'text': ad_text,
+                    'parse_mode': "HTML"
+                })
+            self._queue_user_notification(ad[1], "ad_approved")
+        return True, None
+    
+    def reject_ad(self, ad_id: int, admin_id: int) -> Tuple[bool, Optional[str]]:
+        """Reject a pending ad and queue the user notification"""
+        with write_transaction():
+            ad = self.ad_service.get_ad(ad_id)
+            if not ad:
+                return False, "E'lon topilmadi!"
+            if not self.ad_service.update_ad_status(ad_id, "rejected", admin_id, expected_status="pending"):
+                return False, "E'lon allaqachon ko'rib chiqilgan!"
+            self._queue_user_notification(ad[1], "ad_rejected")
+        return True, None
+    
+    def get_top_queries(self, limit: int = 10, order_by: str = "total") -> List[Dict]:
+        """Most expensive SQL statements of this process with their query plans"""
+        queries = get_top_queries(limit, order_by)
+        with get_db_connection() as conn:
+            for query in queries:
+                try:
+                    query['plan'] = explain(conn, query['raw'], query['params'])
+                except sqlite3.Error:
+                    # e.g. executemany statements (no sample parameters)
+                    query['plan'] = []
+        return queries
+    
+    def create_broadcast(self, text: str, admin_id: int, chat_id: int) -> Tuple[int, int]:
+        """Create a broadcast to all users; returns (broadcast_id, recipients)"""
+        return self.broadcasts.create(text, admin_id, chat_id)
+    
+    def set_broadcast_message(self, broadcast_id: int, message_id: int) -> None:
+        """Remember the admin message that shows broadcast progress"""
+        self.broadcasts.set_progress_message(broadcast_id, message_id)
+    
+    def get_broadcast(self, broadcast_id: int) -> Optional[Tuple]:
+        """Get broadcast by ID"""
+        return self.broadcasts.get_by_id(broadcast_id)
+    
+    def _queue_user_notification(self, user_id: int, text_key: str) -> None:
+        """Queue a message to the ad owner with their main menu"""
+        user = self.user_service.get_user(user_id)
+        if not user:
+            return
+        language = user[3] or "uz"
+        self.outbox.add('send_message', {
+            'chat_id': user_id,
+            'text': get_text(text_key, language),
+            'menu': "graduate" if user[2] == "graduate" else "employer",
+            'language': language
+        })
+    
+    def format_pending_ad_details(
+        self,
+        ad: Tuple,
+        language: str = "uz",
+        username: Optional[str] = None
+    ) -> str:
+        """Format pending ad with full details
+        
+        Pass username when it is already known (e.g. from
+        AdService.get_ad_with_user) to skip the user lookup.
+        """
         ad_id, user_id, ad_type, status, data, file_id, file_path, created_at, updated_at, approved_at, approved_by = ad
         
         try:
@@ -35,8 +135,9 @@ class AdminService:
             ad_data = {}
         
         # Get user info
-        user = self.user_service.get_user(user_id)
-        username = user[1] if user else "Noma'lum"
+        if username is None:
+            user = self.user_service.get_user(user_id)
+            username = user[1] if user else "Noma'lum"
         
         # Format ad text
         ad_text = format_ad_text(ad_data, ad_type, language)
@@ -58,21 +159,31 @@ class AdminService:
         
         return full_text
     
-    def get_pending_ads_list(self, limit: int = 20) -> List[Dict]:
-        """Get pending ads with formatted details"""
-        ads = self.ad_service.get_pending_ads()
+    def get_pending_ads_list(
+        self,
+        limit: int = 20,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None
+    ) -> Tuple[List[Dict], bool, bool]:
+        """Get one page of pending ads with formatted details
+        
+        Returns:
+            (ads, has_prev, has_next)
+        """
+        ads, has_prev, has_next = self.ad_service.get_pending_ads_page(limit, after_id, before_id)
         result = []
         
-        for ad in ads[:limit]:
-            ad_id, user_id, ad_type, status, data, file_id, file_path, created_at, updated_at, approved_at, approved_by = ad
+        for ad in ads:
+            # Owner's username and language come joined with the ad row
+            (ad_id, user_id, ad_type, status, data, file_id, file_path, created_at,
+             updated_at, approved_at, approved_by, username, language) = ad
             
             try:
                 ad_data = json.loads(data)
             except Exception:
                 ad_data = {}
             
-            user = self.user_service.get_user(user_id)
-            username = user[1] if user else "Noma'lum"
+            username = username or "Noma'lum"
             
             if ad_type == "graduate":
                 title = ad_data.get('name', 'Nomsiz')
@@ -90,5 +201,5 @@ class AdminService:
                 'has_file': bool(file_id)
             })
         
-        return result
+        return result, has_prev, has_next
 
@@ -1,5 +1,6 @@
 """Category service for business logic"""
 from typing import List, Tuple, Optional
+from database.executor import nonblocking
 from repositories.category_repository import CategoryRepository
 from services.validation_service import ValidationService
 
@@ -15,6 +16,15 @@ class CategoryService:
         """Get all categories"""
         return self.repository.get_all()
     
+    @nonblocking
+    def get_category_name(self, category_id: int) -> Optional[str]:
+        """Get category name by ID from the in-memory catalog
+        
+        The catalog is loaded at startup and reloaded off the event loop
+        after writes, so this never queries the database once warmed up.
+        """
+        return self.repository.get_name(category_id)
+    
     def create_category(self, name: str) -> Tuple[bool, Optional[str]]:
         """Create a new category"""
         # Validate name
@@ -1,144 +1,166 @@
 """File cleanup service for removing old files"""
 import os
+import time
+import hashlib
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
-from config import RESUME_FOLDER
-from database.connection import get_db_connection
+from typing import List, Tuple
+from config import RESUME_FOLDER, RESUME_STORE_GRACE_SECONDS, FILE_CLEANUP_BATCH
+from repositories.file_repository import FileRepository
 
 logger = logging.getLogger(__name__)
 
+# Partial downloads older than this are left over from a crash
+TMP_MAX_AGE_SECONDS = 3600
+
 
 class FileCleanupService:
-    """Service for cleaning up old files"""
+    """Service for cleaning up old files
+    
+    Candidates come from the ``files`` table (indexed by mtime and
+    refcount) instead of walking RESUME_FOLDER; only the files actually
+    deleted are touched on disk, in batches of FILE_CLEANUP_BATCH.
+    """
     
-    def __init__(self, cleanup_hours: int = 24):
+    def __init__(self, cleanup_hours: int = 24, batch_size: int = FILE_CLEANUP_BATCH):
         """
         Initialize cleanup service
         
         Args:
             cleanup_hours: Hours after which files should be deleted (default: 24)
+            batch_size: Files forgotten and unlinked per transaction
         """
         self.cleanup_hours = cleanup_hours
+        self.batch_size = batch_size
+        self.repository = FileRepository()
     
     def cleanup_old_files(self) -> dict:
         """
-        Clean up old files from resume folder
+        Clean up files stored more than cleanup_hours ago
         
         Returns:
             dict with cleanup statistics
         """
-        deleted_count = 0
-        total_size_freed = 0
-        errors = []
-        
-        try:
-            resume_path = Path(RESUME_FOLDER)
-            if not resume_path.exists():
-                logger.warning(f"Resume folder does not exist: {RESUME_FOLDER}")
-                return {
-                    'deleted_count': 0,
-                    'total_size_freed': 0,
-                    'errors': []
-                }
-            
-            cutoff_time = datetime.now() - timedelta(hours=self.cleanup_hours)
-            
-            # Get all files in resume folder
-            for file_path in resume_path.iterdir():
-                if file_path.is_file():
-                    try:
-                        # Check file modification time
-                        file_mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                        
-                        if file_mtime < cutoff_time:
-                            file_size = file_path.stat().st_size
-                            file_path.unlink()
-                            deleted_count += 1
-                            total_size_freed += file_size
-                            logger.info(f"Deleted old file: {file_path.name} (age: {datetime.now() - file_mtime})")
-                    except Exception as e:
-                        error_msg = f"Error deleting {file_path.name}: {str(e)}"
-                        errors.append(error_msg)
-                        logger.error(error_msg)
-            
-            logger.info(
-                f"Cleanup completed: {deleted_count} files deleted, "
-                f"{total_size_freed / 1024 / 1024:.2f} MB freed"
-            )
-            
-        except Exception as e:
-            error_msg = f"Error during cleanup: {str(e)}"
-            errors.append(error_msg)
-            logger.error(error_msg)
-        
-        return {
-            'deleted_count': deleted_count,
-            'total_size_freed': total_size_freed,
-            'errors': errors
-        }
+        cutoff = (datetime.utcnow() - timedelta(hours=self.cleanup_hours)).isoformat()
+        return self._cleanup(lambda: self.repository.delete_modified_before(cutoff, self.batch_size))
     
     def cleanup_orphaned_files(self) -> dict:
         """
-        Clean up files that are not referenced in database
+        Clean up files that no ad references, and stale partial downloads
         
         Returns:
             dict with cleanup statistics
         """
-        deleted_count = 0
-        total_size_freed = 0
-        errors = []
+        result = self._cleanup(
+            lambda: self.repository.delete_unreferenced(RESUME_STORE_GRACE_SECONDS, self.batch_size)
+        )
         
-        try:
-            resume_path = Path(RESUME_FOLDER)
-            if not resume_path.exists():
-                return {
-                    'deleted_count': 0,
-                    'total_size_freed': 0,
-                    'errors': []
-                }
-            
-            # Get all file paths from database
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT file_path FROM ads WHERE status != 'deleted' AND file_path IS NOT NULL")
-                rows = cursor.fetchall()
-            
-            referenced_files = set()
-            for row in rows:
-                if row[0]:  # file_path
-                    file_name = os.path.basename(row[0])
-                    referenced_files.add(file_name)
-            
-            # Check all files in folder
-            for file_path in resume_path.iterdir():
-                if file_path.is_file():
-                    file_name = file_path.name
-                    if file_name not in referenced_files:
-                        try:
-                            file_size = file_path.stat().st_size
-                            file_path.unlink()
-                            deleted_count += 1
-                            total_size_freed += file_size
-                            logger.info(f"Deleted orphaned file: {file_name}")
-                        except Exception as e:
-                            error_msg = f"Error deleting orphaned file {file_name}: {str(e)}"
-                            errors.append(error_msg)
-                            logger.error(error_msg)
-            
-            logger.info(
-                f"Orphaned files cleanup: {deleted_count} files deleted, "
-                f"{total_size_freed / 1024 / 1024:.2f} MB freed"
-            )
-            
-        except Exception as e:
-            error_msg = f"Error during orphaned files cleanup: {str(e)}"
-            errors.append(error_msg)
-            logger.error(error_msg)
+        # Left-over temporary files of interrupted downloads
+        tmp_path = Path(RESUME_FOLDER) / ".tmp"
+        if tmp_path.exists():
+            cutoff = time.time() - TMP_MAX_AGE_SECONDS
+            stale = []
+            for entry in os.scandir(tmp_path):
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    stale.append((entry.path, entry.stat().st_size))
+            result['scanned'] += len(stale)
+            self._unlink(stale, result)
+        
+        return result
+    
+    def enforce_quota(self, quota_bytes: int) -> dict:
+        """
+        Evict least recently used files until the store fits quota_bytes
         
-        return {
-            'deleted_count': deleted_count,
-            'total_size_freed': total_size_freed,
-            'errors': errors
+        Files attached to pending ads are never evicted.
+        
+        Returns:
+            dict with cleanup statistics and the stored bytes afterwards
+        """
+        def next_batch():
+            excess = self.repository.get_total_bytes() - quota_bytes
+            if excess <= 0:
+                return []
+            return self.repository.delete_least_recently_used(excess, self.batch_size)
+        
+        result = self._cleanup(next_batch)
+        result['total_bytes'] = self.repository.get_total_bytes()
+        return result
+    
+    def backfill_legacy_files(self) -> int:
+        """
+        Track files stored flat in RESUME_FOLDER before the files table
+        
+        Legacy files are hashed once; duplicates of content that is already
+        tracked are removed and their ads repointed. Returns the number of
+        files registered.
+        """
+        resume_path = Path(RESUME_FOLDER)
+        if not resume_path.exists():
+            return 0
+        
+        registered = 0
+        for entry in os.scandir(resume_path):
+            if not entry.is_file() or self.repository.is_known(entry.path):
+                continue
+            try:
+                stat = entry.stat()
+                digest = hashlib.sha256()
+                with open(entry.path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                        digest.update(chunk)
+                
+                tracked_path = self.repository.register_legacy(
+                    entry.path, digest.hexdigest(), stat.st_size,
+                    datetime.utcfromtimestamp(stat.st_mtime).isoformat()
+                )
+                if tracked_path != entry.path:
+                    os.remove(entry.path)
+                registered += 1
+            except Exception as e:
+                logger.error(f"Error registering legacy file {entry.name}: {str(e)}")
+        
+        if registered:
+            logger.info(f"Legacy files registered: {registered}")
+        return registered
+    
+    def _cleanup(self, next_batch) -> dict:
+        """Forget and unlink batches until the query comes back short"""
+        started = time.monotonic()
+        result = {
+            'deleted_count': 0,
+            'total_size_freed': 0,
+            'errors': [],
+            'scanned': 0,
         }
-
+        
+        while True:
+            try:
+                batch = next_batch()
+            except Exception as e:
+                error_msg = f"Error during cleanup: {str(e)}"
+                result['errors'].append(error_msg)
+                logger.error(error_msg)
+                break
+            
+            result['scanned'] += len(batch)
+            self._unlink(batch, result)
+            if len(batch) < self.batch_size:
+                break
+        
+        result['duration'] = time.monotonic() - started
+        return result
+    
+    def _unlink(self, files: List[Tuple[str, int]], result: dict) -> None:
+        for path, size in files:
+            try:
+                os.remove(path)
+                result['deleted_count'] += 1
+                result['total_size_freed'] += size
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                error_msg = f"Error deleting {os.path.basename(path)}: {str(e)}"
+                result['errors'].append(error_msg)
+                logger.error(error_msg)
@@ -1,6 +1,8 @@
 """User service for business logic"""
-from typing import Optional, Tuple
-from repositories.user_repository import UserRepository
+from typing import Dict, Iterable, Optional, Tuple
+from database.models import User
+from repositories.user_repository import UserRepository, user_cache
+from utils.cache import MISSING
 
 
 class UserService:
@@ -23,6 +25,22 @@ class UserService:
         """Get user by ID"""
         return self.repository.get_by_id(user_id)
     
+    def get_users(self, user_ids: Iterable[int]) -> Dict[int, Tuple]:
+        """Get several users by ID at once: {user_id: user}"""
+        return self.repository.get_by_ids(user_ids)
+    
+    def get_user_context(self, user_id: int) -> Optional[User]:
+        """Get user model through the TTL cache"""
+        user = user_cache.get(user_id)
+        if user is MISSING:
+            # Taken before the read: a concurrent update invalidating the
+            # entry after it keeps this (maybe old) row out of the cache
+            token = user_cache.token()
+            row = self.repository.get_by_id(user_id)
+            user = User(*row) if row else None
+            user_cache.set(user_id, user, token)
+        return user
+    
     def get_user_language(self, user_id: int, default: str = "uz") -> str:
         """Get user language"""
         user = self.get_user(user_id)
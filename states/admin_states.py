@@ -7,4 +7,5 @@ class AdminStates(StatesGroup):
     waiting_category_name = State()
     waiting_category_edit = State()
     waiting_student_reply = State()
+    waiting_broadcast_text = State()
 
@@ -0,0 +1,85 @@
+"""In-process caches"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# Returned by TTLCache.get on a miss, so that None can be cached as a value
+MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after ``ttl`` seconds
+
+    Thread-safe: entries are written from DB executor threads and read on
+    the event loop.
+
+    A reader filling the cache from the database takes ``token()`` before
+    its query and passes it to ``set``; if the key was invalidated in the
+    meantime the (possibly stale) value is not stored.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Invalidation counter, and the counter value of each key's last pop
+        self._generation = 0
+        self._invalidated: "OrderedDict[Hashable, int]" = OrderedDict()
+        # Tokens older than this are treated as stale for every key
+        self._floor = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Get a value, or ``default`` if missing or expired"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def token(self) -> int:
+        """Current invalidation counter, to pass to ``set``"""
+        with self._lock:
+            return self._generation
+
+    def set(self, key: Hashable, value: Any, token: Optional[int] = None) -> None:
+        """Store a value, evicting the least recently used entry if full
+
+        With ``token``, nothing is stored if ``key`` was invalidated after
+        the token was taken.
+        """
+        with self._lock:
+            if token is not None and (token < self._floor or self._invalidated.get(key, 0) > token):
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Invalidate an entry"""
+        with self._lock:
+            self._data.pop(key, None)
+            self._generation += 1
+            self._invalidated[key] = self._generation
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.maxsize:
+                _, generation = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, generation)
+
+    def clear(self) -> None:
+        """Invalidate all entries"""
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+            self._floor = self._generation
+            self._invalidated.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -39,6 +39,10 @@ MIN_AGE = 16
 MAX_AGE = 65
 MIN_AGE_EMPLOYER = 18
 
+# Page sizes of paginated lists
+MY_ADS_PAGE_SIZE = 10
+PENDING_ADS_PAGE_SIZE = 20
+
 # Default values
 DEFAULT_LANGUAGE = 'uz'
 
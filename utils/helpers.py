@@ -1,20 +1,23 @@
 """Helper functions"""
-from typing import Tuple
-from services.user_service import UserService
+from typing import Optional, Tuple
+from database.models import User
 
 
-def get_user_language(user_id: int, default: str = "uz") -> str:
+def get_user_language(user: Optional[User], default: str = "uz") -> str:
     """Get user language"""
-    user_service = UserService()
-    return user_service.get_user_language(user_id, default)
+    if user and user.language:
+        return user.language
+    return default
 
 
-def check_user_role(user_id: int, required_role: str) -> Tuple[bool, str]:
+def check_user_role(user: Optional[User], required_role: str) -> Tuple[bool, str]:
     """Check if user has required role
     
     Returns:
         Tuple[bool, str]: (is_valid, language)
     """
-    user_service = UserService()
-    return user_service.check_user_role(user_id, required_role)
-
+    if not user:
+        return False, "uz"
+    if user.role != required_role:
+        return False, user.language or "uz"
+    return True, user.language or "uz"
@@ -0,0 +1,70 @@
+"""Field-level diffs for ad_history
+
+A diff records the fields an edit changed as
+``{"-": {field: old_value}, "+": {field: new_value}}``: a field only in
+"-" was removed, a field only in "+" was added. Diffs can be applied
+forward (old -> new) and reversed, so an ad's data at any point can be
+rebuilt from the nearest full snapshot.
+"""
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def make_diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Diff two ad data dicts"""
+    removed = {key: value for key, value in old.items() if key not in new or new[key] != value}
+    added = {key: value for key, value in new.items() if key not in old or old[key] != value}
+    return {"-": removed, "+": added}
+
+
+def apply_diff(data: Dict[str, Any], diff: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply a diff forward, returning the new data"""
+    result = {key: value for key, value in data.items() if key not in diff["-"]}
+    result.update(diff["+"])
+    return result
+
+
+def dumps(data: Any) -> str:
+    """Serialize data/diffs the way ads.data is serialized"""
+    return json.dumps(data, ensure_ascii=False)
+
+
+def rebuild_timeline(rows: Iterable[Tuple]) -> List[Tuple]:
+    """Rebuild readable history rows from compact storage
+
+    Args:
+        rows: ad_history rows of one ad in insertion order, as
+            (id, ad_id, action, old_data, new_data, field_name, old_value,
+            new_value, changed_by, created_at, diff)
+
+    Returns:
+        Rows in the original 10-column layout with old_data/new_data
+        filled in for 'updated' entries.
+    """
+    timeline = []
+    state: Optional[Dict[str, Any]] = None
+    
+    for row in rows:
+        (history_id, ad_id, action, old_data, new_data, field_name,
+         old_value, new_value, changed_by, created_at, diff) = row
+        
+        if diff is not None:
+            before = state or {}
+            after = apply_diff(before, json.loads(diff))
+            if new_data is None:
+                new_data = dumps(after)
+            old_data = old_data or dumps(before)
+            # Snapshots store the full data and reset the state
+            state = json.loads(new_data)
+        elif new_data is not None:
+            state = json.loads(new_data)
+        elif action == 'field_updated' and state is not None:
+            state = dict(state)
+            state[field_name] = new_value
+        
+        timeline.append((
+            history_id, ad_id, action, old_data, new_data, field_name,
+            old_value, new_value, changed_by, created_at
+        ))
+    
+    return timeline
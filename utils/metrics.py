@@ -0,0 +1,127 @@
+"""Handler latency metrics
+
+Every handler call gets a ``HandlerTiming`` in a context variable; the
+database executor and the bot session add the time they spend to it, so
+one handler's wall time splits into database time, Telegram API time
+and the rest. Timings are kept per handler in fixed-bucket histograms
+(per process).
+"""
+import bisect
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds in seconds; observations above the last go to +Inf
+BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+KINDS = ("wall", "db", "api")
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th quantile (0..1) by interpolating within its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if index == len(BUCKETS):
+                    return self.max
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = min(BUCKETS[index], self.max)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+
+class HandlerTiming:
+    """Time spent by one handler call outside the event loop"""
+
+    __slots__ = ("db", "api")
+
+    def __init__(self):
+        self.db = 0.0
+        self.api = 0.0
+
+
+current_timing: ContextVar[Optional[HandlerTiming]] = ContextVar("current_timing", default=None)
+
+# handler name -> {kind: Histogram}
+handler_histograms: Dict[str, Dict[str, Histogram]] = {}
+
+
+def add_db_time(seconds: float) -> None:
+    timing = current_timing.get()
+    if timing is not None:
+        timing.db += seconds
+
+
+def add_api_time(seconds: float) -> None:
+    timing = current_timing.get()
+    if timing is not None:
+        timing.api += seconds
+
+
+def record_handler(name: str, wall: float, timing: HandlerTiming) -> None:
+    """Add one handler call to its histograms"""
+    histograms = handler_histograms.get(name)
+    if histograms is None:
+        histograms = handler_histograms[name] = {kind: Histogram() for kind in KINDS}
+    histograms["wall"].observe(wall)
+    histograms["db"].observe(timing.db)
+    histograms["api"].observe(timing.api)
+
+
+def get_percentiles(limit: Optional[int] = None) -> List[Dict[str, float]]:
+    """p50/p95/p99 per handler, slowest p95 wall time first"""
+    rows = []
+    for name, histograms in handler_histograms.items():
+        row = {"handler": name, "count": histograms["wall"].count}
+        for kind, histogram in histograms.items():
+            for q in (50, 95, 99):
+                row[f"{kind}_p{q}"] = histogram.percentile(q / 100)
+        rows.append(row)
+    rows.sort(key=lambda row: row["wall_p95"], reverse=True)
+    return rows[:limit] if limit else rows
+
+
+def format_prometheus(labels: str = "") -> str:
+    """Histograms in the Prometheus text exposition format
+
+    ``labels`` (e.g. ``worker="1"``) is added to every sample.
+    """
+    extra = f",{labels}" if labels else ""
+    lines = [
+        "# HELP hhbot_handler_seconds Handler time by kind (wall, db, api)",
+        "# TYPE hhbot_handler_seconds histogram",
+    ]
+    for name, histograms in sorted(handler_histograms.items()):
+        for kind, histogram in histograms.items():
+            base = f'handler="{name}",kind="{kind}"{extra}'
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS + (float("inf"),), histogram.counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'hhbot_handler_seconds_bucket{{{base},le="{le}"}} {cumulative}')
+            lines.append(f"hhbot_handler_seconds_sum{{{base}}} {histogram.total:.6f}")
+            lines.append(f"hhbot_handler_seconds_count{{{base}}} {histogram.count}")
+    return "\n".join(lines) + "\n"